@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多仓库采集入口，按repo.json并发采集所有仓库
+所有仓库共享同一个GitHubAPI实例，即同一个令牌池、速率限制和缓存，
+每个仓库使用自己的filter_labels、pr_filter_labels和main_branch
+
+用法: python collect_repos.py [仓库键 ...]，不指定时采集repo.json中的全部仓库
+"""
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from main import collect_repository
+from file_operations.download import download_repository_main
+from src.utils.utils import load_config, read_json_file
+from src.api.github_api import GitHubAPI, MAX_REPO_WORKERS
+from src.extractor.data_extractor import DataExtractor
+from src.preprocessor.data_preprocessor import DataPreprocessor
+
+CONFIG = load_config()
+
+
+def load_repo_configs(repo_file="repo.json", keys=None):
+    """
+    读取repo.json中的仓库配置，并统一字段名
+    repo.json中部分仓库用base表示主分支、用labels表示标签，这里统一为main_branch和filter_labels
+    labels是Issue的标签，PR只按pr_filter_labels过滤，未配置时不过滤，与main.py一致
+    :param repo_file: 仓库配置文件
+    :param keys: 只返回这些仓库，为None时返回全部
+    :return: 仓库配置列表
+    """
+    repos = read_json_file(repo_file) or {}
+    repo_configs = []
+    for key, entry in repos.items():
+        if keys and key not in keys:
+            continue
+        repo_configs.append({
+            "key": key,
+            "owner": entry["owner"],
+            "repo": entry["repo"],
+            # 未配置时使用仓库的默认分支
+            "main_branch": entry.get("main_branch", entry.get("base")),
+            "filter_labels": entry.get("filter_labels", entry.get("labels", [])),
+            "pr_filter_labels": entry.get("pr_filter_labels", [])
+        })
+    return repo_configs
+
+
+class RepoProgress:
+    """
+    记录各仓库的采集阶段和数量，每次更新时输出一行总览
+    """
+
+    def __init__(self, keys):
+        self._status = {key: {"stage": "pending", "info": {}, "start": None, "end": None} for key in keys}
+        self._lock = threading.Lock()
+
+    def reporter(self, key):
+        """
+        返回某个仓库的进度回调，传给collect_repository
+        """
+        return lambda stage, **info: self.update(key, stage, **info)
+
+    def update(self, key, stage, **info):
+        with self._lock:
+            status = self._status[key]
+            if status["start"] is None:
+                status["start"] = time.time()
+            if stage != status["stage"]:
+                status["info"] = {}
+            status["stage"] = stage
+            status["info"].update(info)
+            if stage in ("done", "failed"):
+                status["end"] = time.time()
+            line = " | ".join(self._format(k, s) for k, s in self._status.items())
+        print(f"[进度] {line}")
+
+    def _format(self, key, status):
+        info = ",".join(f"{k}={v}" for k, v in status["info"].items())
+        return f"{key}: {status['stage']}" + (f"({info})" if info else "")
+
+    def summary(self):
+        """
+        输出各仓库的最终状态和耗时
+        """
+        with self._lock:
+            print("\n仓库\t状态\t耗时(秒)")
+            for key, status in self._status.items():
+                elapsed = ""
+                if status["start"] is not None and status["end"] is not None:
+                    elapsed = f"{status['end'] - status['start']:.1f}"
+                print(f"{key}\t{status['stage']}\t{elapsed}")
+
+
+def collect_one(github_api, extractor, preprocessor, repo_config, progress):
+    """
+    采集单个仓库并下载源码，出错时只影响该仓库
+    """
+    key = repo_config["key"]
+    report = progress.reporter(key)
+    try:
+        if not collect_repository(github_api, extractor, preprocessor, repo_config["owner"], repo_config["repo"],
+                                  repo_config["filter_labels"], repo_config["pr_filter_labels"], progress=report):
+            report("failed")
+            return False
+        report("download")
+        branch = repo_config["main_branch"]
+        if branch is None:
+            branch = github_api.get_repo(repo_config["owner"], repo_config["repo"]).default_branch
+        if not download_repository_main(repo_config["owner"], repo_config["repo"], branch, exit_on_failure=False):
+            report("failed")
+            return False
+        report("done")
+        return True
+    except Exception as e:
+        print(f"采集仓库 {key} 时出错: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        report("failed", error=type(e).__name__)
+        return False
+
+
+def main(keys=None):
+    """
+    并发采集repo.json中的仓库
+    :param keys: 只采集这些仓库，为None时采集全部
+    """
+    if not CONFIG:
+        print("无法加载配置文件，请检查config.json文件是否存在且格式正确")
+        return
+    repo_configs = load_repo_configs(keys=keys)
+    if not repo_configs:
+        print("repo.json中没有需要采集的仓库")
+        return
+    print(f"共 {len(repo_configs)} 个仓库:")
+    for c in repo_configs:
+        print(f"  {c['owner']}/{c['repo']}: Issue标签 {c['filter_labels'] or '不过滤'}，"
+              f"PR标签 {c['pr_filter_labels'] or '不过滤'}")
+
+    # 共享一个客户端：令牌池、请求间隔、速率限制等待和缓存对所有仓库统一生效
+    github_api = GitHubAPI(CONFIG["token"])
+    extractor = DataExtractor()
+    preprocessor = DataPreprocessor()
+    progress = RepoProgress([c["key"] for c in repo_configs])
+
+    # 与共享客户端的连接池使用同一个配置值，线程数超过连接池容量时请求会反复丢弃连接
+    with ThreadPoolExecutor(max_workers=min(MAX_REPO_WORKERS, len(repo_configs))) as executor:
+        results = list(executor.map(
+            lambda repo_config: collect_one(github_api, extractor, preprocessor, repo_config, progress),
+            repo_configs
+        ))
+
+    progress.summary()
+    github_api.export_telemetry()
+    print(f"\n采集完成: 成功 {sum(results)} 个，失败 {len(results) - sum(results)} 个")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or None)
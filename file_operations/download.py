@@ -79,23 +79,24 @@ def download_repository(owner=None, repo=None, target_dir=None, force=False, cle
         return None
 
 
-def download_without_git(owner=None, repo=None, target_dir=None, force=False, clean=True):
+def download_without_git(owner=None, repo=None, target_dir=None, force=False, clean=True, branch=None, ref=None):
     """
     不使用git，通过GitHub API下载仓库（备选方案）
+    zip文件流式写入磁盘，解压时只提取源代码文件，跳过exclude_dirs中的目录，不再事后清理
     
     Args:
         owner (str, optional): 仓库所有者，如果为None则从config读取
         repo (str, optional): 仓库名称，如果为None则从config读取
         target_dir (str, optional): 目标目录，如果为None则使用 data/{repo}/origin_src
         force (bool): 是否强制重新下载，即使目录已存在
-        clean (bool): 下载后是否清理非代码文件和空文件夹
+        clean (bool): 是否只提取源代码文件，为False时提取全部文件
+        branch (str, optional): 下载的分支，如果为None则从config读取main_branch
+        ref (str, optional): 下载指定的commit SHA或标签，提供时忽略branch
     
     Returns:
         str: 下载的仓库目录路径
     """
     import requests
-    import zipfile
-    import io
     
     config = load_config()
     
@@ -103,6 +104,8 @@ def download_without_git(owner=None, repo=None, target_dir=None, force=False, cl
         owner = config.get("owner")
     if repo is None:
         repo = config.get("repo")
+    if branch is None:
+        branch = config.get("main_branch")
     if target_dir is None:
         target_dir = os.path.join("data", repo, "origin_src")
     
@@ -122,50 +125,124 @@ def download_without_git(owner=None, repo=None, target_dir=None, force=False, cl
     os.makedirs(os.path.dirname(target_dir), exist_ok=True)
     
     # 下载zip文件
-    zip_url = f"https://github.com/{owner}/{repo}/archive/refs/heads/{CONFIG['main_branch']}.zip"
+    if ref:
+        zip_url = f"https://github.com/{owner}/{repo}/archive/{ref}.zip"
+    else:
+        zip_url = f"https://github.com/{owner}/{repo}/archive/refs/heads/{branch}.zip"
+    zip_path = target_dir + ".zip"
     print(f"正在下载: {zip_url}")
     
     try:
-        response = requests.get(zip_url)
-        response.raise_for_status()
+        # 流式写入磁盘，不把整个压缩包读入内存
+        with requests.get(zip_url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(zip_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
         
-        # 解压到临时目录
-        temp_dir = target_dir + "_temp"
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
-            zf.extractall(temp_dir)
-        
-        # 找到解压后的实际目录（通常是 repo-master）
-        extracted_dirs = os.listdir(temp_dir)
-        if len(extracted_dirs) == 1:
-            extracted_dir = os.path.join(temp_dir, extracted_dirs[0])
-            # 移动到目标目录
-            shutil.move(extracted_dir, target_dir)
-            # 删除临时目录
-            shutil.rmtree(temp_dir)
-            print("仓库下载成功!")
-            if clean:
-                print("\n开始清理仓库...")
-                clean_repository(target_dir)
-            return target_dir
+        if clean:
+            file_extensions = tuple(config.get("source_code_extensions", [".java"]))
+            exclude_dirs = config.get("exclude_dirs", [])
         else:
-            print("解压后目录结构异常")
-            shutil.rmtree(temp_dir)
+            file_extensions, exclude_dirs = None, []
+        extracted = extract_source_files(zip_path, target_dir, file_extensions, exclude_dirs)
+        if extracted is None:
             return None
-            
+        print(f"仓库下载成功! 共提取 {extracted} 个文件")
+        return target_dir
     except Exception as e:
         print(f"下载仓库时出错: {e}")
+        # 解压了一半的目录会让下次运行跳过下载
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir, ignore_errors=True)
         return None
+    finally:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
 
 
-def download_repository_main():
-    # 使用zip方式下载仓库
-    result = download_without_git(force=False, clean=True)
+def extract_source_files(zip_path, target_dir, file_extensions=None, exclude_dirs=()):
+    """
+    从GitHub生成的仓库压缩包中逐个提取文件，去掉顶层的 {repo}-{branch}/ 目录
+    
+    Args:
+        zip_path (str): 压缩包路径
+        target_dir (str): 目标目录
+        file_extensions (tuple, optional): 只提取这些扩展名的文件，为None时提取全部文件
+        exclude_dirs (list): 路径中包含这些目录的文件不提取，与calculate_code_vectors的排除规则一致
+    
+    Returns:
+        int: 提取的文件数，压缩包目录结构异常时返回None
+    """
+    import zipfile
+    
+    with zipfile.ZipFile(zip_path) as zf:
+        members = zf.infolist()
+        root = members[0].filename.split("/", 1)[0] + "/" if members else ""
+        if not root or any(not info.filename.startswith(root) for info in members):
+            print("解压后目录结构异常")
+            return None
+        
+        extracted = 0
+        skipped = 0
+        for info in members:
+            relative_path = info.filename[len(root):]
+            if info.is_dir() or not relative_path:
+                continue
+            parts = relative_path.split("/")
+            if ".." in parts:
+                print(f"跳过不安全的路径: {info.filename}")
+                continue
+            if not is_source_file(relative_path, target_dir, file_extensions, exclude_dirs):
+                skipped += 1
+                continue
+            file_path = os.path.join(target_dir, *parts)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with zf.open(info) as src, open(file_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            extracted += 1
+    
+    # 没有任何源代码文件时也创建目录，避免每次运行重复下载
+    os.makedirs(target_dir, exist_ok=True)
+    print(f"跳过 {skipped} 个非代码或排除目录中的文件")
+    return extracted
+
+
+def is_source_file(relative_path, target_dir, file_extensions=None, exclude_dirs=()):
+    """
+    判断仓库中的文件是否需要保存到本地
+    
+    Args:
+        relative_path (str): 文件在仓库中的路径，以/分隔
+        target_dir (str): 仓库的本地目录
+        file_extensions (tuple, optional): 只保留这些扩展名的文件，为None时全部保留
+        exclude_dirs (list): 本地路径中包含这些目录的文件不保留
+    
+    Returns:
+        bool: 需要保留时返回True
+    """
+    if file_extensions is not None and not relative_path.endswith(file_extensions):
+        return False
+    file_path = os.path.join(target_dir, *relative_path.split("/"))
+    return not any(exclude_dir in file_path for exclude_dir in exclude_dirs)
+
+
+def download_repository_main(owner=None, repo=None, branch=None, exit_on_failure=True):
+    if CONFIG.get("source_sync", {}).get("enabled", False):
+        # 增量同步：只获取上次快照之后变化的文件，并输出变化文件清单
+        from file_operations.sync import sync_repository
+        result = sync_repository(owner=owner, repo=repo, branch=branch)
+    else:
+        # 使用zip方式下载仓库
+        result = download_without_git(owner=owner, repo=repo, force=False, clean=True, branch=branch)
     
     if result:
         print(f"\n仓库已保存到: {result}")
     else:
         print("\n仓库下载失败")
-        sys.exit(1)
+        if exit_on_failure:
+            sys.exit(1)
+    return result
 
 if __name__ == "__main__":
     print("=" * 60)
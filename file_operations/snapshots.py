@@ -0,0 +1,150 @@
+"""
+历史源码快照
+从本地git镜像按commit物化源码目录 data/{repo}/snapshots/{sha}/origin_src，
+文件内容按blob SHA保存在blob存储中，不同快照的相同文件共享同一份内容、分析结果和代码向量
+"""
+import os
+import sys
+import shutil
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.utils.utils import load_config, save_data, read_json_file
+from src.utils.blob_store import open_blob_store
+from src.api.git_mirror import GitMirror
+from file_operations.download import is_source_file
+
+
+def get_snapshot_dir(repo, sha):
+    """
+    快照目录，代码向量等结果保存在它的上级目录中
+    """
+    return os.path.join("data", repo, "snapshots", sha, "origin_src")
+
+
+def materialize_snapshot(commit=None, before=None, owner=None, repo=None, branch=None, store=None):
+    """
+    物化某个commit的源码快照，已物化的快照直接返回
+
+    Args:
+        commit (str, optional): commit SHA、分支或标签
+        before (str, optional): ISO 8601时间，commit为None时取该时间点分支指向的commit，如Issue的created_at
+        owner (str, optional): 仓库所有者，如果为None则从config读取
+        repo (str, optional): 仓库名称，如果为None则从config读取
+        branch (str, optional): 按时间查找时使用的分支，如果为None则从config读取main_branch
+        store (BlobStore, optional): blob存储，如果为None则按配置打开
+
+    Returns:
+        str: 快照目录路径，失败时返回None
+    """
+    config = load_config()
+    if owner is None:
+        owner = config.get("owner")
+    if repo is None:
+        repo = config.get("repo")
+    if branch is None:
+        branch = config.get("main_branch")
+    own_store = store is None
+    if own_store:
+        # 快照的文件都来自blob存储，未配置时使用默认目录，显式配置为空时不物化快照
+        store = open_blob_store(config, default_root="cache/blob_store")
+        if store is None:
+            print("code_analysis.blob_store配置为空，已禁用blob存储，无法物化快照")
+            return None
+
+    try:
+        mirror = GitMirror(owner, repo, token=config.get("token") or None)
+        if commit is None:
+            sha = mirror.commit_before(branch, before)
+            if sha is None:
+                print(f"{branch} 在 {before} 之前没有提交")
+                return None
+        else:
+            sha = mirror.resolve(commit)
+
+        target_dir = get_snapshot_dir(repo, sha)
+        tree_file = os.path.join(os.path.dirname(target_dir), "snapshot.json")
+        if os.path.exists(target_dir) and os.path.exists(tree_file):
+            return target_dir
+
+        file_extensions = tuple(config.get("source_code_extensions", [".java"]))
+        exclude_dirs = config.get("exclude_dirs", [])
+        files = [entry for entry in mirror.list_tree(sha)
+                 if is_source_file(entry["path"], target_dir, file_extensions, exclude_dirs)]
+
+        # 只从镜像读取存储中还没有的blob
+        missing = list({entry["sha"] for entry in files if not store.has_blob(entry["sha"])})
+        for blob_sha, content in mirror.read_blobs(missing):
+            store.put_blob(content, blob_sha)
+        print(f"物化快照 {sha[:12]}: {len(files)} 个文件，其中 {len(missing)} 个为新内容")
+
+        # 先在临时目录中构建，完成后再改名，中断时不会留下不完整的快照
+        tmp_dir = target_dir + ".tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        for entry in files:
+            store.link_blob(entry["sha"], os.path.join(tmp_dir, *entry["path"].split("/")))
+        os.makedirs(tmp_dir, exist_ok=True)
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir)
+        os.replace(tmp_dir, target_dir)
+        save_data({
+            "owner": owner, "repo": repo, "sha": sha,
+            "files": {entry["path"]: entry["sha"] for entry in files}
+        }, tree_file)
+        return target_dir
+    except Exception as e:
+        print(f"物化快照时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+    finally:
+        if own_store:
+            store.close()
+
+
+def load_snapshot_tree(snapshot_dir):
+    """
+    读取快照的文件清单
+    :param snapshot_dir: materialize_snapshot返回的快照目录
+    :return: {"sha": commit, "files": {路径: blob SHA}}，不存在时返回None
+    """
+    tree_file = os.path.join(os.path.dirname(snapshot_dir), "snapshot.json")
+    if not os.path.exists(tree_file):
+        return None
+    return read_json_file(tree_file)
+
+
+def analyze_snapshot(commit=None, before=None):
+    """
+    物化快照并完成代码分析和向量计算，未变化的文件复用blob存储中的结果
+    未配置code_analysis.blob_store时，不同快照之间不共享分析结果和向量
+    :return: 快照目录路径，失败时返回None
+    """
+    from src.JavaCodeAnalyzer.tree_sitter_java_analyzer import analyze_directory
+    from src.model.calculate_code_vectors import process_analysis_files
+
+    snapshot_dir = materialize_snapshot(commit=commit, before=before)
+    if snapshot_dir is None:
+        return None
+    analyze_directory(snapshot_dir)
+    process_analysis_files(snapshot_dir)
+    return snapshot_dir
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python file_operations/snapshots.py <commit或ISO时间>")
+        sys.exit(1)
+    target = sys.argv[1]
+    # 能解析为时间的参数按时间查找，否则作为commit或分支
+    try:
+        datetime.fromisoformat(target.replace("Z", "+00:00"))
+        is_time = True
+    except ValueError:
+        is_time = False
+    if is_time:
+        analyze_snapshot(before=target)
+    else:
+        analyze_snapshot(commit=target)
@@ -0,0 +1,234 @@
+"""
+源码快照增量同步
+记录origin_src对应的commit，之后只获取新增、修改、删除的文件，
+并把本次同步的变化文件清单写入 data/{repo}/snapshot_manifest.json
+清单只记录最近一次同步，每次同步都会覆盖，仅供查看；代码分析的增量处理不依赖它，
+而是按分析存储中记录的文件大小、修改时间和blob SHA判断(见tree_sitter_java_analyzer.analyze_directory)
+"""
+import os
+import sys
+import shutil
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.utils.utils import load_config, save_data, read_json_file
+from src.api.git_mirror import GitMirror
+from file_operations.download import download_without_git, extract_source_files, is_source_file
+
+# compare API最多返回300个文件，达到该数量时文件列表可能不完整
+COMPARE_FILES_CAP = 300
+
+
+class GitHubSnapshotSource:
+    """
+    通过REST API获取快照信息：分支指向的commit、compare结果和文件内容
+    """
+
+    def __init__(self, owner, repo, config):
+        import requests
+        self.owner = owner
+        self.repo = repo
+        self.base_url = config.get("collection", {}).get("api_base_url", "https://api.github.com").rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        token = config.get("token", "")
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+    def _get(self, path, **kwargs):
+        response = self.session.get(f"{self.base_url}/repos/{self.owner}/{self.repo}{path}", timeout=60, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def resolve(self, ref):
+        return self._get(f"/commits/{quote(ref, safe='')}").json()["sha"]
+
+    def get_changed_paths(self, base_sha, head_sha):
+        """
+        :return: 变化的文件列表，新commit不是旧commit的后续提交(如强制推送)或文件数可能被截断时返回None
+        """
+        comparison = self._get(f"/compare/{base_sha}...{head_sha}").json()
+        if comparison.get("status") not in ("ahead", "identical"):
+            print(f"快照与 {head_sha[:7]} 的比较结果为 {comparison.get('status')}，无法增量同步")
+            return None
+        files = comparison.get("files", [])
+        if len(files) >= COMPARE_FILES_CAP:
+            print(f"变化文件达到compare API上限({COMPARE_FILES_CAP})，无法增量同步")
+            return None
+        return files
+
+    def read_file(self, sha, path):
+        return self._get(f"/contents/{quote(path)}", params={"ref": sha},
+                         headers={"Accept": "application/vnd.github.raw"}).content
+
+    def download(self, sha, target_dir):
+        return download_without_git(self.owner, self.repo, target_dir=target_dir, force=True, ref=sha)
+
+
+class MirrorSnapshotSource:
+    """
+    通过本地git镜像获取快照信息，不消耗API配额
+    """
+
+    def __init__(self, owner, repo, config):
+        self.mirror = GitMirror(owner, repo, token=config.get("token") or None)
+        self.config = config
+
+    def resolve(self, ref):
+        return self.mirror.resolve(ref)
+
+    def get_changed_paths(self, base_sha, head_sha):
+        return self.mirror.get_changed_paths(base_sha, head_sha)
+
+    def read_file(self, sha, path):
+        return self.mirror.read_file(sha, path)
+
+    def download(self, sha, target_dir):
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir)
+        zip_path = target_dir + ".zip"
+        try:
+            self.mirror.archive(sha, zip_path)
+            extracted = extract_source_files(zip_path, target_dir,
+                                             tuple(self.config.get("source_code_extensions", [".java"])),
+                                             self.config.get("exclude_dirs", []))
+            return target_dir if extracted is not None else None
+        finally:
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+
+
+def _list_files(target_dir):
+    """
+    列出快照中的全部文件，路径以/分隔
+    """
+    files = []
+    for root, dirs, filenames in os.walk(target_dir):
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(root, filename), target_dir).replace(os.sep, "/"))
+    return sorted(files)
+
+
+def _remove_file(target_dir, path):
+    """
+    删除快照中的文件，并删除因此变空的上级目录
+    :return: 文件存在并被删除时返回True
+    """
+    file_path = os.path.join(target_dir, *path.split("/"))
+    if not os.path.exists(file_path):
+        return False
+    os.remove(file_path)
+    parent = os.path.dirname(file_path)
+    while os.path.abspath(parent) != os.path.abspath(target_dir) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+    return True
+
+
+def apply_changes(source, changes, head_sha, target_dir, file_extensions, exclude_dirs):
+    """
+    把变化应用到本地快照
+    :param source: 快照来源，提供read_file
+    :param changes: 变化文件列表，与compare API的files格式一致
+    :param head_sha: 目标commit
+    :param target_dir: 本地快照目录
+    :param file_extensions: 只保留这些扩展名的文件
+    :param exclude_dirs: 本地路径中包含这些目录的文件不保留
+    :return: 变化文件清单 {"added": [...], "modified": [...], "deleted": [...]}
+    """
+    manifest = {"added": [], "modified": [], "deleted": []}
+    for change in changes:
+        status = change["status"]
+        path = change["filename"]
+        if status == "unchanged":
+            continue
+        if status == "renamed" and change.get("previous_filename"):
+            if _remove_file(target_dir, change["previous_filename"]):
+                manifest["deleted"].append(change["previous_filename"])
+        if status == "removed":
+            if _remove_file(target_dir, path):
+                manifest["deleted"].append(path)
+            continue
+        if not is_source_file(path, target_dir, file_extensions, exclude_dirs):
+            continue
+        file_path = os.path.join(target_dir, *path.split("/"))
+        existed = os.path.exists(file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(source.read_file(head_sha, path))
+        manifest["modified" if existed else "added"].append(path)
+    return manifest
+
+
+def sync_repository(owner=None, repo=None, branch=None, target_dir=None, source=None):
+    """
+    把本地快照同步到分支的最新commit
+    没有快照记录时完整下载，之后只获取变化的文件；每次同步都会覆盖写入变化文件清单(仅供查看)
+
+    Args:
+        owner (str, optional): 仓库所有者，如果为None则从config读取
+        repo (str, optional): 仓库名称，如果为None则从config读取
+        branch (str, optional): 分支，如果为None则从config读取main_branch
+        target_dir (str, optional): 快照目录，如果为None则使用 data/{repo}/origin_src
+        source (str, optional): api(compare API) 或 git_mirror(本地镜像)，如果为None则从config读取source_sync.source
+
+    Returns:
+        str: 快照目录路径，失败时返回None
+    """
+    config = load_config()
+    if owner is None:
+        owner = config.get("owner")
+    if repo is None:
+        repo = config.get("repo")
+    if branch is None:
+        branch = config.get("main_branch")
+    if target_dir is None:
+        target_dir = os.path.join("data", repo, "origin_src")
+    if source is None:
+        source = config.get("source_sync", {}).get("source", "api")
+
+    data_dir = os.path.dirname(target_dir)
+    state_file = os.path.join(data_dir, "snapshot.json")
+    manifest_file = os.path.join(data_dir, "snapshot_manifest.json")
+    state = read_json_file(state_file) if os.path.exists(state_file) else {}
+    state = state or {}
+
+    try:
+        snapshot_source = MirrorSnapshotSource(owner, repo, config) if source == "git_mirror" \
+            else GitHubSnapshotSource(owner, repo, config)
+        head_sha = snapshot_source.resolve(branch)
+        base_sha = state.get("sha") if os.path.exists(target_dir) else None
+        print(f"同步源码快照: {owner}/{repo} {branch}，本地 {base_sha or '无'} -> 最新 {head_sha}")
+
+        changes = None
+        if base_sha == head_sha:
+            changes = []
+        elif base_sha:
+            changes = snapshot_source.get_changed_paths(base_sha, head_sha)
+
+        if changes is None:
+            # 没有快照记录或无法增量同步时完整下载，清单中全部文件记为新增
+            if snapshot_source.download(head_sha, target_dir) is None:
+                return None
+            manifest = {"added": _list_files(target_dir), "modified": [], "deleted": []}
+        else:
+            manifest = apply_changes(snapshot_source, changes, head_sha, target_dir,
+                                     tuple(config.get("source_code_extensions", [".java"])),
+                                     config.get("exclude_dirs", []))
+
+        manifest.update({"base_sha": base_sha, "head_sha": head_sha, "full": changes is None})
+        save_data(manifest, manifest_file)
+        save_data({
+            "owner": owner, "repo": repo, "branch": branch, "sha": head_sha,
+            "synced_at": datetime.now(timezone.utc).isoformat()
+        }, state_file)
+        print(f"同步完成: 新增 {len(manifest['added'])}，修改 {len(manifest['modified'])}，"
+              f"删除 {len(manifest['deleted'])} 个文件")
+        return target_dir
+    except Exception as e:
+        print(f"同步源码快照时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
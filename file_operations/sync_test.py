@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+源码快照增量同步测试文件，不访问GitHub
+"""
+
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from file_operations.sync import apply_changes
+
+
+class StubSource:
+    """
+    按 (sha, path) 返回预设内容的快照来源
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.reads = []
+
+    def read_file(self, sha, path):
+        self.reads.append((sha, path))
+        return self.files[(sha, path)]
+
+
+class TestApplyChanges(unittest.TestCase):
+    """
+    apply_changes的测试
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.write("src/Main.java", b"class Main {}\n")
+        self.write("src/Old.java", b"class Old {}\n")
+        self.write("src/Gone.java", b"class Gone {}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path, content):
+        file_path = os.path.join(self.tmp_dir, *path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(os.path.join(self.tmp_dir, *path.split("/")), 'rb') as f:
+            return f.read()
+
+    def exists(self, path):
+        return os.path.exists(os.path.join(self.tmp_dir, *path.split("/")))
+
+    def test_apply_changes(self):
+        """
+        新增、修改、删除和重命名都反映到快照和清单中，非源码文件和排除目录中的文件不写入
+        """
+        source = StubSource({
+            ("head", "src/Main.java"): b"class Main { int x; }\r\n",
+            ("head", "src/pkg/Renamed.java"): b"class Renamed {}\n",
+            ("head", "src/中文.java"): "class 中文 {}\n".encode("utf-8"),
+        })
+        changes = [
+            {"status": "modified", "filename": "src/Main.java", "previous_filename": None},
+            {"status": "renamed", "filename": "src/pkg/Renamed.java", "previous_filename": "src/Old.java"},
+            {"status": "added", "filename": "src/中文.java", "previous_filename": None},
+            {"status": "removed", "filename": "src/Gone.java", "previous_filename": None},
+            {"status": "removed", "filename": "src/Missing.java", "previous_filename": None},
+            {"status": "added", "filename": "docs/README.md", "previous_filename": None},
+            {"status": "added", "filename": "src/test/FooTest.java", "previous_filename": None},
+            {"status": "unchanged", "filename": "src/Same.java", "previous_filename": None},
+        ]
+        manifest = apply_changes(source, changes, "head", self.tmp_dir, (".java",), ["test"])
+
+        self.assertEqual(manifest, {
+            "added": ["src/pkg/Renamed.java", "src/中文.java"],
+            "modified": ["src/Main.java"],
+            "deleted": ["src/Old.java", "src/Gone.java"],
+        })
+        self.assertEqual(self.read("src/Main.java"), b"class Main { int x; }\r\n")
+        self.assertEqual(self.read("src/pkg/Renamed.java"), b"class Renamed {}\n")
+        self.assertEqual(self.read("src/中文.java"), "class 中文 {}\n".encode("utf-8"))
+        for path in ("src/Old.java", "src/Gone.java", "docs/README.md", "src/test/FooTest.java"):
+            self.assertFalse(self.exists(path), path)
+        # 跳过的文件不读取内容
+        self.assertEqual(sorted(path for _, path in source.reads),
+                         ["src/Main.java", "src/pkg/Renamed.java", "src/中文.java"])
+
+    def test_remove_prunes_empty_directories(self):
+        """
+        删除或移出目录中的最后一个文件后，空目录一并删除，快照根目录保留
+        """
+        self.write("src/pkg/Only.java", b"class Only {}\n")
+        source = StubSource({("head", "lib/Only.java"): b"class Only {}\n"})
+        changes = [
+            {"status": "renamed", "filename": "lib/Only.java", "previous_filename": "src/pkg/Only.java"},
+            {"status": "removed", "filename": "src/Main.java", "previous_filename": None},
+            {"status": "removed", "filename": "src/Old.java", "previous_filename": None},
+            {"status": "removed", "filename": "src/Gone.java", "previous_filename": None},
+        ]
+        manifest = apply_changes(source, changes, "head", self.tmp_dir, (".java",), [])
+
+        self.assertEqual(manifest["added"], ["lib/Only.java"])
+        self.assertEqual(len(manifest["deleted"]), 4)
+        self.assertFalse(self.exists("src"))
+        self.assertEqual(os.listdir(self.tmp_dir), ["lib"])
+
+
+if __name__ == '__main__':
+    """
+    运行测试
+    """
+    unittest.main()
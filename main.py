@@ -1,25 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import os
-import requests_cache
 # 创建缓存目录
 os.makedirs('cache', exist_ok=True)
-# 是否启用缓存
-USE_CACHE = True
-if USE_CACHE:
-    requests_cache.install_cache(
-        cache_name='cache/github_cache',
-        backend='sqlite',
-        expire_after=24 * 3600 * 70
-    )
+# GitHub请求的缓存由GitHubAPI的条件请求缓存负责，见config.json中的collection.http_cache
 from src.model.calculate_code_vectors import process_analysis_files
 from src.JavaCodeAnalyzer.tree_sitter_java_analyzer import analyze_directory
 from file_operations.download import download_repository_main
 """
 主文件，整合各层功能模块
 """
-from src.utils.utils import load_config, save_data, get_requirements_processed_file_name
+from itertools import chain
+from src.utils.utils import load_config, get_requirements_processed_file_name
+from src.utils.utils import load_collection_state, save_collection_state, parse_datetime, get_watermark, iter_merged_records
+from src.utils.record_stream import RecordWriter, artifact_path, find_artifact, iter_records, write_records
+from src.utils.checkpoint import CheckpointLog
+from src.utils.patch_store import PatchStore
 from src.api.github_api import GitHubAPI
+from src.api.github_graphql import GitHubGraphQL
 from src.extractor.data_extractor import DataExtractor
 from src.preprocessor.data_preprocessor import DataPreprocessor
 from src.trace_link.main import trace_links
@@ -54,77 +52,213 @@ def main():
     extractor = DataExtractor()
     preprocessor = DataPreprocessor()
     
+    # 1-4. 采集Issues、Pull Requests和需求数据
+    if not collect_repository(github_api, extractor, preprocessor, repo_owner, repo_name,
+                              CONFIG["filter_labels"], CONFIG["pr_filter_labels"]):
+        return
+    
+    github_api.export_telemetry()
+    
+    # 5. 采集文件数据
+    download_repository_main()
+    print("\n数据采集、预处理和保存完成")
+
+    # 6. 分析代码，保存到code_analysis.sqlite
+    analyze_code()
+    
+    # 7. 实现需求到代码的追踪链接
+    trace_links()
+
+def collect_repository(github_api, extractor, preprocessor, repo_owner, repo_name,
+                       filter_labels, pr_filter_labels, progress=None):
+    """
+    采集单个仓库的Issues、Pull Requests和需求数据并保存到 data/{repo_name}
+    :param github_api: GitHubAPI实例，多个仓库可共享同一实例及其速率限制
+    :param extractor: DataExtractor实例
+    :param preprocessor: DataPreprocessor实例
+    :param repo_owner: 仓库所有者
+    :param repo_name: 仓库名称
+    :param filter_labels: Issue需包含的标签
+    :param pr_filter_labels: PR需包含其中任一标签
+    :param progress: 进度回调 progress(stage, **info)，可选
+    :return: 采集成功时返回True
+    """
+    report = progress or (lambda stage, **info: None)
+    
     # 获取仓库对象
     repo = github_api.get_repo(repo_owner, repo_name)
     if not repo:
         print("无法获取仓库，请检查输入信息和访问令牌权限")
-        return
+        return False
     
     print(f"成功获取仓库: {repo.name}")
     
     # 数据保存目录
     data_dir = f"data/{repo_name}"
     
+    # 增量采集：只获取水位线之后更新的Issues和PR，并按number合并到已有数据中
+    incremental = CONFIG.get("collection", {}).get("incremental", False)
+    collection_state = load_collection_state(data_dir) if incremental else {}
+    issues_since = parse_datetime(collection_state.get("issues_updated_at"))
+    prs_since = parse_datetime(collection_state.get("pull_requests_updated_at"))
+    if incremental:
+        print(f"增量采集模式，Issues水位线: {issues_since}，PR水位线: {prs_since}")
+    
+    # 断点续传：每处理完一个Issue/PR立即写入检查点，中断后重新运行时跳过已完成的部分
+    use_checkpoint = CONFIG.get("collection", {}).get("checkpoint", True)
+    checkpoint_dir = f"{data_dir}/checkpoints"
+    issues_checkpoint = None
+    
+    # patch按内容哈希单独保存一份，数据文件中只保留patch_ref引用
+    patch_store = None
+    if CONFIG.get("collection", {}).get("patch_store", True):
+        patch_store = PatchStore(f"{data_dir}/patches.sqlite")
+    
     # 1. 采集Issues数据
     print("\n开始采集Issues数据...")
-    issues = github_api.get_issues(repo, state=CONFIG["issue_state"],labels=CONFIG["filter_labels"])
-    issues_list = extractor.extract_issues(issues, github_api, repo)
-    print(f"采集到 {len(issues_list)} 个Issues")
+    report("issues")
+    if CONFIG.get("collection", {}).get("use_graphql", False):
+        # 使用GraphQL批量获取Issues及其引用的commit
+        graphql = GitHubGraphQL(github_api.access_token, token_pool=github_api.token_pool,
+                                telemetry=github_api.telemetry)
+        issues_checkpoint = CheckpointLog(f"{checkpoint_dir}/issues.jsonl") if use_checkpoint else None
+        new_issues = graphql.collect_issues(repo_owner, repo_name, github_api, repo,
+                                            state=CONFIG["issue_state"], labels=filter_labels,
+                                            since=issues_since, checkpoint=issues_checkpoint)
+    else:
+        issues = github_api.get_issues(repo, state=CONFIG["issue_state"],labels=filter_labels,
+                                       since=issues_since)
+        report("issues", fetched=len(issues))
+        refs_index = None
+        if issues and CONFIG.get("collection", {}).get("use_repo_events", False):
+            # 一次遍历仓库级issue事件，代替逐个Issue请求事件
+            print("正在遍历仓库issue事件，建立commit引用索引...")
+            refs_index = github_api.build_issue_commit_refs_index(
+                repo,
+                issue_numbers=[issue.number for issue in issues],
+                since=min(issue.created_at for issue in issues)
+            )
+        issues_checkpoint = CheckpointLog(f"{checkpoint_dir}/issues.jsonl") if use_checkpoint else None
+        new_issues = extractor.iter_issues(issues, github_api, repo, refs_index=refs_index,
+                                           checkpoint=issues_checkpoint)
     
-    # 预处理Issues数据
-    processed_issues = preprocessor.preprocess_issues(issues_list)
-    print(f"预处理完成 {len(processed_issues)} 个Issues")
-    
-    # 保存Issues数据
-    save_data(issues_list, f"{data_dir}/issues_raw.json")
-    save_data(processed_issues, f"{data_dir}/issues_processed.json")
+    # 每处理完一个Issue立即保存原始数据和预处理结果，不在内存中保留全部Issues
+    issues_stats = _save_records(new_issues, data_dir, "issues", preprocessor.preprocess_issue, incremental,
+                                 patch_store)
+    print(f"采集到 {issues_stats['count']} 个Issues")
+    report("issues", issues=issues_stats["count"])
     
     
     # 3. 采集Pull Requests数据
     print("\n开始采集Pull Requests数据...")
-    prs = github_api.get_pull_requests(repo, state="closed")
-    prs_list = extractor.extract_pull_requests(prs, github_api, repo)
-    print(f"采集到 {len(prs_list)} 个Pull Requests")
-    
-    # 预处理Pull Requests数据
-    processed_prs = preprocessor.preprocess_pull_requests(prs_list)
-    print(f"预处理完成 {len(processed_prs)} 个Pull Requests")
+    report("pull_requests")
+    prs = github_api.get_pull_requests(repo, state="closed", since=prs_since, labels=pr_filter_labels)
+    report("pull_requests", fetched=len(prs))
+    prs_checkpoint = CheckpointLog(f"{checkpoint_dir}/pull_requests.jsonl") if use_checkpoint else None
+    new_prs = extractor.iter_pull_requests(prs, github_api, repo, checkpoint=prs_checkpoint)
+    prs_stats = _save_records(new_prs, data_dir, "pull_requests", preprocessor.preprocess_pull_request, incremental,
+                              patch_store)
+    if patch_store is not None:
+        print(f"patch存储中共 {len(patch_store)} 个patch: {patch_store.db_path}")
+        patch_store.close()
+    print(f"采集到 {prs_stats['count']} 个Pull Requests")
+    report("pull_requests", pull_requests=prs_stats["count"])
     
-    # 保存Pull Requests数据
-    save_data(prs_list, f"{data_dir}/pull_requests_raw.json")
-    save_data(processed_prs, f"{data_dir}/pull_requests_processed.json")
+    if github_api.http_cache:
+        print(f"HTTP缓存统计: {github_api.http_cache.summary()}")
     
     # 4. 提取和处理需求数据
     print("\n开始提取和处理需求数据...")
-    requirements = extractor.extract_requirements(issues_list, prs_list)
+    report("requirements")
+    # 从刚保存的文件中逐条读回Issues和PR；预处理需要完整的需求列表，直接构建后再保存，不再从文件读回
+    requirements = list(filter(None, chain(
+        (extractor.issue_to_requirement(issue, repo.full_name) for issue in iter_records(issues_stats["path"])),
+        (extractor.pr_to_requirement(pr, repo.full_name) for pr in iter_records(prs_stats["path"]))
+    )))
+    write_records(requirements, artifact_path(data_dir, "requirements_raw"))
     print(f"提取到 {len(requirements)} 个需求")
-    # 保存需求数据
-    save_data(requirements, f"{data_dir}/requirements_raw.json")
+    
+    req_file_name = get_requirements_processed_file_name()
+    req_file_path = artifact_path(data_dir, req_file_name)
+    
     # 预处理需求数据
-    processed_requirements = preprocessor.preprocess_requirements(requirements)
+    if incremental:
+        # 未更新的需求直接复用上次的预处理结果（LLM处理代价较高）
+        updated_ids = {f"ISSUE-{number}" for number in issues_stats["numbers"]}
+        updated_ids |= {f"PR-{number}" for number in prs_stats["numbers"]}
+        previous = {req["req_id"]: req for req in iter_records(find_artifact(data_dir, req_file_name))}
+        reused = [previous[req["req_id"]] for req in requirements
+                  if req["req_id"] in previous and req["req_id"] not in updated_ids]
+        to_process = [req for req in requirements
+                      if req["req_id"] not in previous or req["req_id"] in updated_ids]
+        processed_requirements = preprocessor.preprocess_requirements(to_process) + reused
+        print(f"复用 {len(reused)} 个已预处理的需求")
+    else:
+        processed_requirements = preprocessor.preprocess_requirements(requirements)
     print(f"预处理完成 {len(processed_requirements)} 个需求")
+    report("requirements", requirements=len(processed_requirements))
     
     # 保存需求数据
-    req_file_name = get_requirements_processed_file_name()
-    req_file_path = f"{data_dir}/{req_file_name}"
-    
-    save_data(processed_requirements, req_file_path)
+    write_records(processed_requirements, req_file_path)
     
     print(f"需求数据已保存到: {req_file_path}")
     
-    # 5. 采集文件数据
-    download_repository_main()
-    print("\n数据采集、预处理和保存完成")
+    # 数据保存成功后再更新水位线，中途失败时下次会重新采集
+    if incremental:
+        collection_state["issues_updated_at"] = issues_stats["watermark"] or collection_state.get("issues_updated_at")
+        collection_state["pull_requests_updated_at"] = prs_stats["watermark"] or collection_state.get("pull_requests_updated_at")
+        save_collection_state(collection_state, data_dir)
+    
+    # 全部数据保存后再删除检查点
+    for checkpoint in (issues_checkpoint, prs_checkpoint):
+        if checkpoint is not None:
+            checkpoint.clear()
+    return True
 
-    # 6. 分析代码，保存为_analysis.json
-    analyze_code()
+def _save_records(records, data_dir, kind, preprocess, incremental=False, patch_store=None):
+    """
+    逐条保存原始数据({kind}_raw)和预处理后的数据({kind}_processed)
+    :param records: 新采集记录的迭代器
+    :param data_dir: 仓库数据目录
+    :param kind: issues 或 pull_requests
+    :param preprocess: 预处理单条记录的函数
+    :param incremental: 为True时按number把新记录合并到上次保存的数据中
+    :param patch_store: PatchStore实例，提供时change_files中的patch替换为patch_ref
+    :return: 统计字典，包含保存路径path、新记录数count、新记录的number集合numbers和updated_at水位线watermark
+    """
+    stats = {"path": artifact_path(data_dir, f"{kind}_raw"), "count": 0, "numbers": set(), "watermark": None}
     
-    # 7. 实现需求到代码的追踪链接
-    trace_links()
+    def track(records):
+        for record in records:
+            stats["count"] += 1
+            stats["numbers"].add(record["number"])
+            stats["watermark"] = get_watermark([record], stats["watermark"])
+            yield record
+    
+    records = track(records)
+    if incremental:
+        # 增量采集的新记录数量有限，整体读入后与已有数据逐条合并
+        new_records = list(records)
+        records = iter_merged_records(iter_records(find_artifact(data_dir, f"{kind}_raw")), new_records)
+    
+    total = 0
+    with RecordWriter(stats["path"]) as raw_writer, \
+            RecordWriter(artifact_path(data_dir, f"{kind}_processed")) as processed_writer:
+        for record in records:
+            # 上次保存的数据中仍内联的patch也一并移入存储
+            if patch_store is not None:
+                record = patch_store.externalize(record)
+            raw_writer.write(record)
+            processed_writer.write(preprocess(record))
+            total += 1
+    if incremental:
+        print(f"合并后共 {total} 条记录")
+    print(f"数据保存成功: {raw_writer.path}, {processed_writer.path}")
+    return stats
 
 def analyze_code():
     """
-    分析每个代码，保存为_analysis.json
+    分析每个代码，结果保存到code_analysis.sqlite
     将所有方法、类代码编码成向量保存为.pt文件
     """
     analyze_directory(f"data/{CONFIG['repo']}/origin_src")
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+代码分析结果的集中存储，代替每个源文件旁的_analysis.json
+保存在源码目录的上级目录中(data/{repo}/code_analysis.sqlite)，包含两张表:
+    files      每个源文件一行：相对路径、blob SHA、大小、修改时间和源码，同时作为增量分析的清单
+    units      每个类、接口或方法一行，按文件路径索引，只保存代码和注释的字节范围及所在类的声明
+代码片段变体在读取时由code_snippets从源码拼接，不重复保存
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from src.JavaCodeAnalyzer.code_snippets import compose_snippets
+
+# 分析结果中不进入units.info的字段，范围和子结构单独保存
+_UNIT_SKIP_FIELDS = ("methods", "inner_classes", "inner_interfaces", "range", "comment_ranges", "header")
+# 版本变化时删除的表，snippets是旧版本保存片段文本的表
+_TABLES = ("files", "units", "snippets")
+
+
+def get_analysis_store_path(directory):
+    """
+    分析存储的路径，与代码向量文件一样保存在源码目录的上级目录中
+    """
+    return os.path.join(os.path.dirname(os.path.normpath(directory)), "code_analysis.sqlite")
+
+
+def _make_unit(kind, depth, class_name, method_name, node, header):
+    return {
+        "kind": kind,
+        "depth": depth,
+        "class_name": class_name,
+        "method_name": method_name,
+        "range": node["range"],
+        "comment_ranges": node.get("comment_ranges", []),
+        "header": header,
+        "info": {key: value for key, value in node.items() if key not in _UNIT_SKIP_FIELDS}
+    }
+
+
+def _class_units(cls, depth):
+    kind = cls.get("type", "class")
+    method_kind = "interface_method" if kind == "interface" else "method"
+    class_name = cls.get("name", "")
+    units = [_make_unit(kind, depth, class_name, "", cls, cls.get("header"))]
+    for method in cls.get("methods", []):
+        # 方法的类上下文片段需要所在类的声明
+        units.append(_make_unit(method_kind, depth, class_name, method.get("name", ""), method, cls.get("header")))
+    for inner in cls.get("inner_classes", []) + cls.get("inner_interfaces", []):
+        units.extend(_class_units(inner, depth + 1))
+    return units
+
+
+def flatten_analysis(analysis):
+    """
+    把analyze_code的嵌套结果展开为units列表，类在前、随后是它的方法，内部类的depth加1
+    :param analysis: JavaCodeAnalyzer.analyze_code的返回值
+    :return: units列表，不含源码
+    """
+    units = []
+    for cls in analysis.get("classes", []):
+        units.extend(_class_units(cls, 0))
+    return units
+
+
+class AnalysisStore:
+    """
+    分析结果的SQLite存储，写入按批提交，读取时按路径顺序扫描
+    """
+
+    def __init__(self, db_path, version=None):
+        """
+        初始化AnalysisStore实例
+        :param db_path: SQLite文件路径
+        :param version: 分析器版本，与已保存的版本不同时清空全部结果；为None时不检查(只读取)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if version is not None and self.get_meta("analyzer_version") != str(version):
+            # 表结构可能随版本变化，重建全部表
+            for table in _TABLES:
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self.set_meta("analyzer_version", str(version))
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, sha TEXT NOT NULL, size INTEGER, mtime_ns INTEGER, source BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                id INTEGER PRIMARY KEY, path TEXT NOT NULL, kind TEXT NOT NULL, depth INTEGER NOT NULL,
+                class_name TEXT, method_name TEXT, start_byte INTEGER NOT NULL, end_byte INTEGER NOT NULL,
+                comment_ranges TEXT, header TEXT, info TEXT
+            );
+            CREATE INDEX IF NOT EXISTS units_path ON units (path);
+        """)
+        self._db.commit()
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_manifest(self):
+        """
+        :return: {相对路径: {"sha": blob SHA, "size": 字节数, "mtime_ns": 修改时间}}
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT path, sha, size, mtime_ns FROM files").fetchall()
+        return {path: {"sha": sha, "size": size, "mtime_ns": mtime_ns} for path, sha, size, mtime_ns in rows}
+
+    def put_files(self, items):
+        """
+        批量写入文件的分析结果，替换同一路径的旧结果
+        :param items: (相对路径, {"sha", "size", "mtime_ns"}, 源码文本, flatten_analysis的units) 的列表
+        """
+        if not items:
+            return
+        with self._lock:
+            for path, entry, source_code, units in items:
+                self._delete_path(path)
+                self._db.execute(
+                    "INSERT INTO files (path, sha, size, mtime_ns, source) VALUES (?, ?, ?, ?, ?)",
+                    (path, entry["sha"], entry["size"], entry["mtime_ns"], source_code.encode("utf8"))
+                )
+                self._db.executemany(
+                    "INSERT INTO units (path, kind, depth, class_name, method_name, start_byte, end_byte, "
+                    "comment_ranges, header, info) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(path, unit["kind"], unit["depth"], unit["class_name"], unit["method_name"],
+                      unit["range"][0], unit["range"][1],
+                      json.dumps(unit["comment_ranges"], separators=(",", ":")) if unit["comment_ranges"] else None,
+                      unit["header"], json.dumps(unit["info"], ensure_ascii=False, separators=(",", ":")))
+                     for unit in units]
+                )
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (str(time.time()),))
+            self._db.commit()
+
+    def update_stats(self, items):
+        """
+        内容没有变化、只有修改时间变化的文件只更新清单
+        :param items: (相对路径, {"size", "mtime_ns"}) 的列表
+        """
+        with self._lock:
+            self._db.executemany(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                [(entry["size"], entry["mtime_ns"], path) for path, entry in items]
+            )
+            self._db.commit()
+
+    def delete_files(self, paths):
+        """
+        删除已删除文件的分析结果
+        """
+        if not paths:
+            return
+        with self._lock:
+            for path in paths:
+                self._delete_path(path)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (str(time.time()),))
+            self._db.commit()
+
+    def _delete_path(self, path):
+        self._db.execute("DELETE FROM units WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def updated_at(self):
+        """
+        最近一次写入分析结果的时间戳，没有写入过时返回0
+        """
+        return float(self.get_meta("updated_at") or 0)
+
+    def iter_units(self, max_depth=0, paths=None):
+        """
+        按路径顺序逐个文件返回源码和类、方法单元
+        :param max_depth: 只返回嵌套深度不超过该值的类和方法，0为只返回顶层类；为None时不限制
+        :param paths: 只返回这些文件；为None时全部返回
+        :return: (相对路径, 源码的UTF-8字节, units列表) 的生成器
+        """
+        conditions, params = [], []
+        if max_depth is not None:
+            conditions.append("depth <= ?")
+            params.append(max_depth)
+        if paths is not None:
+            conditions.append(f"path IN ({','.join('?' * len(paths))})")
+            params.extend(paths)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        file_where = f"WHERE path IN ({','.join('?' * len(paths))})" if paths is not None else ""
+
+        # 两个按路径排序的游标合并，各自是一次顺序扫描
+        files = self._db.execute(f"SELECT path, source FROM files {file_where} ORDER BY path", tuple(paths or ()))
+        units = self._db.execute(
+            "SELECT path, kind, class_name, method_name, start_byte, end_byte, comment_ranges, header "
+            f"FROM units {where} ORDER BY path, id",
+            params
+        )
+        pending = units.fetchone()
+        for path, source in files:
+            file_units = []
+            while pending is not None and pending[0] <= path:
+                if pending[0] == path:
+                    file_units.append({
+                        "kind": pending[1], "class_name": pending[2], "method_name": pending[3],
+                        "range": [pending[4], pending[5]],
+                        "comment_ranges": json.loads(pending[6]) if pending[6] else [],
+                        "header": pending[7]
+                    })
+                pending = units.fetchone()
+            yield path, source, file_units
+
+    def iter_snippets(self, max_depth=0, snippet_types=None, paths=None):
+        """
+        按路径顺序逐条返回代码片段，每个文件先返回完整代码(FC)，再按类、方法的顺序返回各片段
+        片段在返回时才从源码拼接，同一个类或方法的各片段共享original_code字符串
+        :param max_depth: 只返回嵌套深度不超过该值的类和方法，0为只返回顶层类；为None时不限制
+        :param snippet_types: 只返回这些片段类型，如 {"FC", "CO", "MO"}；为None时全部返回
+        :param paths: 只返回这些文件；为None时全部返回
+        :return: 字典的生成器，包含path、kind(file、class、interface、method、interface_method)、
+                 class_name、method_name、original_code、snippet_type和code
+        """
+        for path, source, units in self.iter_units(max_depth, paths):
+            if snippet_types is None or "FC" in snippet_types:
+                source_code = source.decode("utf8")
+                yield {"path": path, "kind": "file", "class_name": "", "method_name": "",
+                       "original_code": source_code, "snippet_type": "FC", "code": source_code}
+            for unit in units:
+                original_code, snippets = compose_snippets(unit, source, snippet_types)
+                for snippet_type, code in snippets:
+                    yield {"path": path, "kind": unit["kind"], "class_name": unit["class_name"],
+                           "method_name": unit["method_name"], "original_code": original_code,
+                           "snippet_type": snippet_type, "code": code}
+
+    def close(self):
+        """
+        关闭SQLite连接
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
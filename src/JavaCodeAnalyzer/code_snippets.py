@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按字节范围从源码生成代码片段变体
+分析结果只保存类、接口、方法的代码范围、注释范围和所在类的声明，各变体在需要时拼接:
+    CO/IO/MO/IMO          原始代码
+    CD/ID/MD/IMD          注释+代码，没有注释时与原始代码相同(方法没有注释时不生成)
+    CC/IC/MC/IMC          注释，没有注释时不生成
+    MCC/IMCC              方法+类上下文
+    MDCC/IMDCC            方法+注释+类上下文，没有注释时与MCC相同
+"""
+
+# 单元类型 -> (原始代码, 注释+代码, 注释, 类上下文, 注释+类上下文) 的片段类型
+SNIPPET_TYPES = {
+    "class": ("CO", "CD", "CC", None, None),
+    "interface": ("IO", "ID", "IC", None, None),
+    "method": ("MO", "MD", "MC", "MCC", "MDCC"),
+    "interface_method": ("IMO", "IMD", "IMC", "IMCC", "IMDCC"),
+}
+
+
+def get_text(source_bytes, byte_range):
+    """
+    取出字节范围对应的文本
+    :param source_bytes: 源码的UTF-8字节
+    :param byte_range: [start_byte, end_byte]
+    """
+    return source_bytes[byte_range[0]:byte_range[1]].decode("utf8")
+
+
+def get_comment(source_bytes, comment_ranges):
+    """
+    拼接节点上方的注释，多段注释之间用换行连接
+    """
+    return "\n".join(get_text(source_bytes, byte_range) for byte_range in comment_ranges or ())
+
+
+def compose_snippets(unit, source_bytes, snippet_types=None):
+    """
+    生成一个类、接口或方法的代码片段变体，顺序与片段类型表一致
+    内容相同的变体返回同一个字符串对象，保存时不会重复占用空间
+    :param unit: 包含kind、range、comment_ranges，方法还需包含header(所在类的声明)
+    :param source_bytes: 源码的UTF-8字节
+    :param snippet_types: 只生成这些片段类型，为None时全部生成
+    :return: (原始代码, [(片段类型, 代码)])
+    """
+    original_type, doc_type, comment_type, context_type, doc_context_type = SNIPPET_TYPES[unit["kind"]]
+    wanted = (lambda snippet_type: True) if snippet_types is None else snippet_types.__contains__
+    code = get_text(source_bytes, unit["range"])
+    comment = get_comment(source_bytes, unit.get("comment_ranges"))
+    is_method = context_type is not None
+    snippets = []
+
+    if wanted(original_type):
+        snippets.append((original_type, code))
+    if comment:
+        if wanted(doc_type):
+            snippets.append((doc_type, f"{comment}\n{code}"))
+        if wanted(comment_type):
+            snippets.append((comment_type, comment))
+    elif not is_method and wanted(doc_type):
+        # 类和接口没有注释时CD/ID与原始代码相同
+        snippets.append((doc_type, code))
+
+    if is_method and (wanted(context_type) or wanted(doc_context_type)):
+        header = unit["header"]
+        with_context = f"{header}\n    {code}\n}}"
+        if wanted(context_type):
+            snippets.append((context_type, with_context))
+        if wanted(doc_context_type):
+            if comment:
+                indented_comment = "    " + comment.replace("\n", "\n    ")
+                snippets.append((doc_context_type, f"{header}\n    {indented_comment}\n    {code}\n}}"))
+            else:
+                snippets.append((doc_context_type, with_context))
+    return code, snippets
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+代码片段变体测试文件
+javacodetest/CrlfUnicodeTest_snippets.json 是保存片段文本的旧版本分析器对 CrlfUnicodeTest.java
+(CRLF换行、中文标识符和注释、4字节字符)的输出，每行为 [kind, class_name, method_name, 片段类型, 原始代码, 代码]
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.JavaCodeAnalyzer.tree_sitter_java_analyzer import JavaCodeAnalyzer, read_source
+from src.JavaCodeAnalyzer.analysis_store import AnalysisStore, flatten_analysis
+from src.JavaCodeAnalyzer.code_snippets import compose_snippets
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "javacodetest")
+SOURCE_FILE = os.path.join(FIXTURE_DIR, "CrlfUnicodeTest.java")
+EXPECTED_FILE = os.path.join(FIXTURE_DIR, "CrlfUnicodeTest_snippets.json")
+
+
+def _row(kind, class_name, method_name, snippet_type, original_code, code):
+    # 旧版本中接口方法的kind也是method，片段类型(IMO等)和文本不变
+    return ["method" if kind == "interface_method" else kind, class_name, method_name,
+            snippet_type, original_code, code]
+
+
+class TestComposeSnippets(unittest.TestCase):
+    """
+    按字节范围拼接的片段与旧版本保存的片段逐行一致
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with open(EXPECTED_FILE, 'r', encoding='utf-8') as f:
+            cls.expected = json.load(f)
+        raw, cls.source_code = read_source(SOURCE_FILE)
+        # 确认夹具文件没有在检出时被转换换行
+        assert b"\r\n" in raw
+        cls.units = flatten_analysis(JavaCodeAnalyzer().analyze_code(cls.source_code))
+
+    def test_compose_snippets(self):
+        """
+        compose_snippets的输出与旧版本的类、接口和方法片段一致
+        """
+        source_bytes = self.source_code.encode("utf8")
+        rows = []
+        for unit in self.units:
+            original_code, snippets = compose_snippets(unit, source_bytes)
+            rows.extend(_row(unit["kind"], unit["class_name"], unit["method_name"], snippet_type, original_code, code)
+                        for snippet_type, code in snippets)
+        self.assertEqual(rows, [row for row in self.expected if row[3] != "FC"])
+
+    def test_iter_snippets(self):
+        """
+        经过分析存储读取时，包括完整代码(FC)在内的全部片段及其顺序与旧版本一致
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        store = AnalysisStore(os.path.join(tmp_dir, "code_analysis.sqlite"))
+        self.addCleanup(store.close)
+        store.put_files([("CrlfUnicodeTest.java", {"sha": "", "size": 0, "mtime_ns": 0}, self.source_code, self.units)])
+        rows = [_row(snippet["kind"], snippet["class_name"], snippet["method_name"], snippet["snippet_type"],
+                     snippet["original_code"], snippet["code"])
+                for snippet in store.iter_snippets(max_depth=None)]
+        self.assertEqual(len(rows), len(self.expected))
+        for row, expected in zip(rows, self.expected):
+            self.assertEqual(row, expected)
+
+    def test_filtered_snippet_types(self):
+        """
+        只生成部分片段类型时，结果是全部片段的子序列
+        """
+        source_bytes = self.source_code.encode("utf8")
+        wanted = {"CO", "MO", "MDCC", "IMC"}
+        for unit in self.units:
+            _, all_snippets = compose_snippets(unit, source_bytes)
+            _, snippets = compose_snippets(unit, source_bytes, wanted)
+            self.assertEqual(snippets, [item for item in all_snippets if item[0] in wanted])
+
+
+if __name__ == '__main__':
+    """
+    运行测试
+    """
+    unittest.main()
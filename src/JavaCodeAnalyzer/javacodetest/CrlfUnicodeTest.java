@@ -0,0 +1,55 @@
+package com.example.订单;
+
+import java.util.List;
+
+/**
+ * 订单服务，处理下单和退款 🚀
+ */
+public class CrlfUnicodeTest {
+    // 默认货币
+    private String 货币 = "人民币";
+
+    /**
+     * 创建订单
+     * @param 数量 商品数量
+     */
+    public int 创建订单(int 数量) {
+        String msg = "已下单：" + 数量 + " 件 }";
+        return 数量 * 2;
+    }
+
+    public void refund() {
+        // 退款 { 不应结束方法
+        System.out.println("退款完成 ✓");
+    }
+
+    /** 内部类：订单明细 */
+    static class 明细 {
+        // 价格，单位：分
+        private long price;
+
+        /* 计算总价 */
+        long total(int count) {
+            return price * count;
+        }
+
+        class 嵌套 {
+            void 打印() { System.out.println("嵌套 ü"); }
+        }
+    }
+
+    interface 回调 {
+        // 完成时调用
+        void 完成(String 结果);
+
+        default String 名称() {
+            return "回调";
+        }
+    }
+}
+
+/** 支付接口 */
+interface 支付 {
+    /** 发起支付 */
+    boolean pay(long 金额);
+}
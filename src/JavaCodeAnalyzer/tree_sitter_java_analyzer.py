@@ -1,11 +1,17 @@
 import tree_sitter
 import tree_sitter_java
 import json
+import heapq
 import os,sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from src.utils.utils import load_config
+from src.utils.blob_store import open_blob_store, git_blob_sha
+from src.JavaCodeAnalyzer.analysis_store import AnalysisStore, get_analysis_store_path, flatten_analysis
 CONFIG = load_config()
 re_analyze_code = CONFIG["re_analyze_code"]
+# 分析结果的格式或内容变化时递增，分析存储和blob存储中旧版本的结果不再使用
+ANALYZER_VERSION = 3
 
 class JavaCodeAnalyzer:
     def __init__(self):
@@ -28,6 +34,8 @@ class JavaCodeAnalyzer:
     def analyze_code(self, source_code):
         """
         分析 Java 代码字符串
+        类、接口和方法的代码只记录为source_code的UTF-8字节范围(range、comment_ranges)，
+        需要代码文本和片段变体时用code_snippets生成
         """
         if not source_code:
             return {"classes": [], "source_code": ""}
@@ -142,39 +150,31 @@ class JavaCodeAnalyzer:
             "implements": implements,
             "methods": [],
             "inner_classes": [],
-            "original_code": self._get_text(class_node)
+            # 只记录类代码和注释的字节范围，代码片段变体(CO、CD、CC)由code_snippets按需生成
+            "range": [class_node.start_byte, class_node.end_byte],
+            "comment_ranges": self._get_comment_ranges(class_node)
         }
         
-        # 获取类的注释
-        class_comment = self._get_comments(class_node)
-        
-        # 生成类的所有代码片段变体
-        class_info["code_snippets"] = {}
-        
-        # 原始类代码 (CO：class original)
-        class_info["code_snippets"]["CO"] = class_info["original_code"]
-        
-        # 类+注释 (CD: class with docstring)
-        if class_comment:
-            class_info["code_snippets"]["CD"] = f"{class_comment}\n{class_info['original_code']}"
-                # 类注释 (CC: class comment)
-            class_info["code_snippets"]["CC"] = f"{class_comment}"
-        else:
-            class_info["code_snippets"]["CD"] = class_info["original_code"]
-        
-        # 设置默认 enriched_code（使用原始代码作为默认值）
-        class_info["enriched_code"] = class_info["code_snippets"]["CO"]
+        # 类声明，方法的类上下文片段(MCC、MDCC)使用
+        class_declaration = f"public class {class_name}"
+        if modifiers:
+            class_declaration = f"{' '.join(modifiers)} class {class_name}"
+        if extends:
+            class_declaration += f" extends {extends[0]}"
+        if implements:
+            class_declaration += f" implements {', '.join(implements)}"
+        class_info["header"] = class_declaration + " {"
 
         # 处理类体 (class_body)
         body_node = class_node.child_by_field_name('body')
         if body_node:
             for member in body_node.children:
                 if member.type == 'method_declaration':
-                    method_info = self._process_method_node(member, is_constructor=False, class_info=class_info)
+                    method_info = self._process_method_node(member, is_constructor=False)
                     class_info["methods"].append(method_info)
                 
                 elif member.type == 'constructor_declaration':
-                    method_info = self._process_method_node(member, is_constructor=True, class_info=class_info)
+                    method_info = self._process_method_node(member, is_constructor=True)
                     class_info["methods"].append(method_info)
                 
                 elif member.type == 'class_declaration':
@@ -182,9 +182,6 @@ class JavaCodeAnalyzer:
                     inner_class = self._process_class_node(member)
                     if inner_class:
                         class_info["inner_classes"].append(inner_class)
-        
-        # 添加类的最终 enriched_code（使用原始代码作为默认值）
-        class_info["enriched_code"] = class_info["code_snippets"].get("default", class_info["original_code"])
 
         return class_info
 
@@ -231,28 +228,22 @@ class JavaCodeAnalyzer:
             "methods": [],
             "inner_interfaces": [],
             "inner_classes": [],
-            "original_code": self._get_text(interface_node)
+            "range": [interface_node.start_byte, interface_node.end_byte],
+            "comment_ranges": self._get_comment_ranges(interface_node)
         }
 
-        interface_comment = self._get_comments(interface_node)
-
-        interface_info["code_snippets"] = {}
-
-        interface_info["code_snippets"]["IO"] = interface_info["original_code"]
-
-        if interface_comment:
-            interface_info["code_snippets"]["ID"] = f"{interface_comment}\n{interface_info['original_code']}"
-            interface_info["code_snippets"]["IC"] = f"{interface_comment}"
-        else:
-            interface_info["code_snippets"]["ID"] = interface_info["original_code"]
-
-        interface_info["enriched_code"] = interface_info["code_snippets"]["IO"]
+        interface_declaration = f"public interface {interface_name}"
+        if modifiers:
+            interface_declaration = f"{' '.join(modifiers)} interface {interface_name}"
+        if extends:
+            interface_declaration += f" extends {', '.join(extends)}"
+        interface_info["header"] = interface_declaration + " {"
 
         body_node = interface_node.child_by_field_name('body')
         if body_node:
             for member in body_node.children:
                 if member.type == 'method_declaration':
-                    method_info = self._process_interface_method_node(member, interface_info=interface_info)
+                    method_info = self._process_interface_method_node(member)
                     interface_info["methods"].append(method_info)
 
                 elif member.type == 'interface_declaration':
@@ -265,11 +256,9 @@ class JavaCodeAnalyzer:
                     if inner_class:
                         interface_info["inner_classes"].append(inner_class)
 
-        interface_info["enriched_code"] = interface_info["code_snippets"].get("default", interface_info["original_code"])
-
         return interface_info
 
-    def _process_interface_method_node(self, method_node, interface_info=None):
+    def _process_interface_method_node(self, method_node):
         """
         处理接口方法节点
         """
@@ -308,8 +297,6 @@ class JavaCodeAnalyzer:
 
                     parameters.append({"type": p_type, "name": p_name})
 
-        comment = self._get_comments(method_node)
-
         called_functions = self._collect_invocations(method_node)
 
         annotations = []
@@ -319,40 +306,7 @@ class JavaCodeAnalyzer:
                     if mod_child.type in ['marker_annotation', 'annotation']:
                         annotations.append(self._get_text(mod_child))
 
-        method_code = self._get_text(method_node)
-
-        code_snippets = {
-            "IMO": method_code,
-        }
-
-        if comment:
-            code_snippets["IMD"] = f"{comment}\n{method_code}"
-            code_snippets["IMC"] = f"{comment}"
-
-        if interface_info:
-            class_modifiers = " ".join(interface_info.get("modifiers", []))
-            interface_name = interface_info.get("name", "")
-            extends = interface_info.get("extends", [])
-
-            interface_declaration = f"public interface {interface_name}"
-            if class_modifiers:
-                interface_declaration = f"{class_modifiers} interface {interface_name}"
-            if extends:
-                interface_declaration += f" extends {', '.join(extends)}"
-            interface_declaration += " {"
-
-            method_with_context = f"{interface_declaration}\n    {method_code}\n}}"
-            code_snippets["IMCC"] = method_with_context
-
-            if comment:
-                indented_comment = "    " + comment.replace("\n", "\n    ")
-                method_with_context_and_doc = f"{interface_declaration}\n    {indented_comment}\n    {method_code}\n}}"
-                code_snippets["IMDCC"] = method_with_context_and_doc
-            else:
-                code_snippets["IMDCC"] = method_with_context
-
-        final_enriched_code = method_code
-
+        # 代码片段变体(IMO、IMD、IMC、IMCC、IMDCC)由code_snippets按范围和接口声明生成
         return {
             "name": method_name,
             "return_type": return_type,
@@ -360,13 +314,11 @@ class JavaCodeAnalyzer:
             "annotations": annotations,
             "parameters": parameters,
             "called_functions": called_functions,
-            "comments": comment,
-            "original_code": method_code,
-            "enriched_code": final_enriched_code,
-            "code_snippets": code_snippets
+            "range": [method_node.start_byte, method_node.end_byte],
+            "comment_ranges": self._get_comment_ranges(method_node)
         }
 
-    def _process_method_node(self, method_node, is_constructor=False, class_info=None):
+    def _process_method_node(self, method_node, is_constructor=False):
         """
         处理方法或构造函数节点
         """
@@ -415,13 +367,10 @@ class JavaCodeAnalyzer:
                     
                     parameters.append({"type": p_type, "name": p_name})
 
-        # 5. 注释提取 (Looking backwards)
-        comment = self._get_comments(method_node)
-
-        # 6. 收集方法调用
+        # 5. 收集方法调用
         called_functions = self._collect_invocations(method_node)
 
-        # 5. 提取注解
+        # 6. 提取注解
         annotations = []
         # 遍历 method_node 的所有子节点
         for child in method_node.children:
@@ -432,56 +381,8 @@ class JavaCodeAnalyzer:
                     if mod_child.type in ['marker_annotation', 'annotation']:
                         annotations.append(self._get_text(mod_child))
         
-        # 获取原始方法代码
-        method_code = self._get_text(method_node)
-        
-        # 生成代码片段字典，包含所有变体 MO:method original
-        code_snippets = {
-            "MO": method_code,
-        }
-        
-        # 方法+注释 (MD: method with docstring)
-        if comment:
-            code_snippets["MD"] = f"{comment}\n{method_code}"
-            # 方法注释 (MC: method comment)
-            code_snippets["MC"] = f"{comment}"
-        
-        # 如果有类上下文
-        if class_info:
-            # 构建类声明
-            class_modifiers = " ".join(class_info.get("modifiers", []))
-            class_name = class_info.get("name", "")
-            extends = class_info.get("extends", [])
-            implements = class_info.get("implements", [])
-            
-            class_declaration = f"public class {class_name}"
-            if class_modifiers:
-                class_declaration = f"{class_modifiers} class {class_name}"
-            if extends:
-                class_declaration += f" extends {extends[0]}"
-            if implements:
-                class_declaration += f" implements {', '.join(implements)}"
-            class_declaration += " {"
-            
-            # 方法+类上下文 (MCC: method with class context)
-            method_with_context = f"{class_declaration}\n    {method_code}\n}}"
-            code_snippets["MCC"] = method_with_context
-            
-            # 方法+注释+类上下文 (MDCC)
-            if comment:
-                indented_comment = "    " + comment.replace("\n", "\n    ")
-                method_with_context_and_doc = f"{class_declaration}\n    {indented_comment}\n    {method_code}\n}}"
-                code_snippets["MDCC"] = method_with_context_and_doc
-            else:
-                code_snippets["MDCC"] = method_with_context
-        
-        # 设置默认 enriched_code（使用原始代码作为默认值）
-        final_enriched_code = method_code
-        # for type,code in code_snippets.items():
-        #     print(type)
-        #     print(code)
-        #     print()
-        
+        # 只记录方法代码和注释(Looking backwards)的字节范围，
+        # 代码片段变体(MO、MD、MC、MCC、MDCC)由code_snippets按范围和类声明生成
         return {
             "name": method_name,
             "is_constructor": is_constructor,
@@ -490,23 +391,21 @@ class JavaCodeAnalyzer:
             "annotations": annotations,
             "parameters": parameters,
             "called_functions": called_functions,
-            "comments": comment,
-            "original_code": method_code,
-            "enriched_code": final_enriched_code,
-            "code_snippets": code_snippets
+            "range": [method_node.start_byte, method_node.end_byte],
+            "comment_ranges": self._get_comment_ranges(method_node)
         }
 
-    def _get_comments(self, node):
+    def _get_comment_ranges(self, node):
         """
-        获取节点上方的注释
+        获取节点上方注释的字节范围，按源码顺序排列
         """
-        comments = []
+        ranges = []
         curr = node.prev_sibling
         while curr:
             # Tree-sitter 中注释通常是 'line_comment' 或 'block_comment'
             # 注意：有时空格也会是兄弟节点，需要跳过
             if curr.type in ['line_comment', 'block_comment']:
-                comments.insert(0, self._get_text(curr))
+                ranges.insert(0, [curr.start_byte, curr.end_byte])
                 curr = curr.prev_sibling
             elif curr.type == 'modifiers':
                 # 如果遇到修饰符，说明注释在修饰符上面，继续往上找
@@ -517,7 +416,7 @@ class JavaCodeAnalyzer:
             else:
                 # 遇到其他代码结构，停止查找
                 break
-        return "\n".join(comments)
+        return ranges
 
     def _collect_invocations(self, method_node):
         """
@@ -557,46 +456,179 @@ class JavaCodeAnalyzer:
         print(f"Result saved to: {filepath}")
 
 
-def analyze_directory(directory):
+def read_source(file_path):
+    """
+    读取源文件
+    :return: (原始内容bytes, 文本)，文本的换行统一为\\n，与文本模式读取一致
+    """
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    return content, content.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+# 工作进程中的解析器，每个进程初始化一次
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = JavaCodeAnalyzer()
+
+
+def _analyze_chunk(chunk):
+    """
+    在工作进程中分析一组文件，结果展开为units后返回，由主进程批量写入分析存储
+    :param chunk: [(文件路径, blob SHA)]
+    :return: [(文件路径, blob SHA, 源码, units)]
+    """
+    if _worker_analyzer is None:
+        _init_worker()
+    results = []
+    for file_path, blob_sha in chunk:
+        try:
+            _, source_code = read_source(file_path)
+            units = flatten_analysis(_worker_analyzer.analyze_code(source_code))
+        except Exception as e:
+            raise RuntimeError(f"分析文件 {file_path} 时出错: {e}") from e
+        results.append((file_path, blob_sha, source_code, units))
+    return results
+
+
+def _balance_chunks(files, chunk_count):
+    """
+    按文件大小把文件分成chunk_count组，每次把最大的剩余文件放入总大小最小的组
+    :param files: [(文件路径, blob SHA, 字节数)]
+    :return: 非空分组列表，总大小大的在前
+    """
+    heap = [(0, index, []) for index in range(max(1, chunk_count))]
+    for file_path, blob_sha, size in sorted(files, key=lambda item: -item[2]):
+        total, index, chunk = heapq.heappop(heap)
+        chunk.append((file_path, blob_sha))
+        heapq.heappush(heap, (total + size, index, chunk))
+    return [chunk for total, index, chunk in sorted(heap, key=lambda item: -item[0]) if chunk]
+
+
+def _remove_legacy_outputs(directory):
+    """
+    删除旧版本在源码旁写入的_analysis.json和分析清单，分析结果已改为保存在分析存储中
+    """
+    removed = 0
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.endswith('_analysis.json'):
+                os.remove(os.path.join(root, file))
+                removed += 1
+    manifest_path = os.path.join(os.path.dirname(os.path.normpath(directory)), "analysis_manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    if removed:
+        print(f"已删除 {removed} 个旧的_analysis.json文件")
+
+
+def analyze_directory(directory, workers=None):
     """
     分析指定目录下的所有Java文件
-    分析结果保存在源代码同一目录下，文件名添加_analysis.json后缀
-    如果已存在任何_analysis.json文件，则跳过整个目录
+    分析结果保存在源码目录上级目录的code_analysis.sqlite中，见analysis_store
+    按文件内容哈希和分析器版本增量分析：只分析新增和修改的文件，删除已删除文件的分析结果；
+    re_analyze_code为True时重新分析全部文件
+    启用blob存储时按文件内容的git blob SHA复用之前(包括其他快照中)的分析结果
+    :param directory: 源码目录
+    :param workers: 解析进程数，为None时使用配置文件中的code_analysis.workers，默认CPU核数；为1时在当前进程中解析
     """
-    analyzer = JavaCodeAnalyzer()
-    
     print(f"正在分析目录: {directory}")
     print("=" * 60)
-    if not re_analyze_code :
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.endswith('_analysis.json'):
-                    print(f"发现已存在的分析文件: {os.path.join(root, file)}")
-                    print("目录已处理过，跳过分析")
-                    print("=" * 60)
-                    return
     
-    analyzed_count = 0
+    if workers is None:
+        workers = (CONFIG.get("code_analysis") or {}).get("workers") or os.cpu_count() or 1
+    _remove_legacy_outputs(directory)
+    analysis_store = AnalysisStore(get_analysis_store_path(directory), ANALYZER_VERSION)
+    stored = analysis_store.get_manifest()
+    old_manifest = {} if re_analyze_code else stored
+    store = open_blob_store(CONFIG)
+    seen = set()
+    unchanged_count = 0
+    reused_count = 0
+    reused = []
+    touched = []
+    pending = []
+    entries = {}
     
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.java'):
+    try:
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                if not file.endswith('.java'):
+                    continue
                 file_path = os.path.join(root, file)
-                print(f"分析文件: {file_path}")
-                try:
-                    result = analyzer.analyze_file(file_path)
-                    output_file = file_path.replace('.java', '_analysis.json')
-                    analyzer.save_json(result, output_file)
-                    analyzed_count += 1
-                    print()
-                except Exception as e:
-                    print(f"分析文件 {file_path} 时出错: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    exit(1)
+                relative_path = os.path.relpath(file_path, directory).replace(os.sep, "/")
+                seen.add(relative_path)
+                stat = os.stat(file_path)
+                entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                previous = old_manifest.get(relative_path)
+                # 大小和修改时间都没变时不读取文件
+                if previous and previous["size"] == entry["size"] and previous["mtime_ns"] == entry["mtime_ns"]:
+                    unchanged_count += 1
+                    continue
+                content, source_code = read_source(file_path)
+                entry["sha"] = git_blob_sha(content)
+                if previous and previous["sha"] == entry["sha"]:
+                    touched.append((relative_path, entry))
+                    unchanged_count += 1
+                    continue
+                units = None
+                if store is not None and not re_analyze_code:
+                    units = store.get_analysis(entry["sha"], ANALYZER_VERSION)
+                if units is not None:
+                    reused.append((relative_path, entry, source_code, units))
+                    reused_count += 1
+                    if len(reused) >= 500:
+                        analysis_store.put_files(reused)
+                        reused = []
+                    continue
+                entries[file_path] = (relative_path, entry)
+                pending.append((file_path, entry["sha"], stat.st_size))
+        
+        deleted = [path for path in stored if path not in seen]
+        analysis_store.put_files(reused)
+        analysis_store.update_stats(touched)
+        analysis_store.delete_files(deleted)
+        
+        total = len(pending)
+        workers = max(1, min(workers, total))
+        print(f"共 {len(seen)} 个文件，未变化 {unchanged_count} 个，复用 {reused_count} 个，"
+              f"删除 {len(deleted)} 个已删除文件的分析结果，使用 {workers} 个进程解析 {total} 个")
+        # 每个进程分到多组，先处理大的组，避免少数大文件拖慢整体
+        chunks = _balance_chunks(pending, workers * 4)
+        done = 0
+        if workers == 1:
+            results = map(_analyze_chunk, chunks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            results = (future.result() for future in as_completed([executor.submit(_analyze_chunk, chunk) for chunk in chunks]))
+        try:
+            # 每组结果在一个事务中写入
+            for chunk_results in results:
+                analysis_store.put_files([(*entries[file_path], source_code, units)
+                                          for file_path, _, source_code, units in chunk_results])
+                if store is not None:
+                    store.put_analyses(ANALYZER_VERSION, [(blob_sha, units) for _, blob_sha, _, units in chunk_results])
+                done += len(chunk_results)
+                print(f"已解析 {done}/{total} 个文件")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    except Exception as e:
+        print(f"分析目录 {directory} 时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
+    finally:
+        analysis_store.close()
+        if store is not None:
+            store.close()
     
     print("=" * 60)
-    print(f"分析完成！共分析 {analyzed_count} 个文件")
+    print(f"分析完成！解析 {total} 个文件，复用 {reused_count} 个，未变化 {unchanged_count} 个")
 
 # --- 测试代码 ---
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+commit缓存，内存LRU + 磁盘SQLite两级存储，跨运行复用已获取的commit详情
+"""
+import os
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class CommitCache:
+    """
+    按(仓库, SHA)缓存commit详情，commit内容不可变，缓存永不过期
+    内存中保留最近使用的commit，全部commit持久化到SQLite
+    """
+
+    def __init__(self, db_path="cache/commit_cache.sqlite", max_size=2048):
+        """
+        初始化CommitCache实例
+        :param db_path: SQLite文件路径，为None时只使用内存缓存
+        :param max_size: 内存中最多保留的commit数量
+        """
+        self.max_size = max_size
+        self._memory = OrderedDict()
+        # 不存在的commit只在本次运行内记录，避免网络错误被永久缓存
+        self._missing = set()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS commits ("
+                "repo TEXT NOT NULL, sha TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (repo, sha))"
+            )
+            self._db.commit()
+
+    def _remember(self, key, commit_data):
+        """
+        写入内存LRU，超出容量时淘汰最久未使用的commit
+        """
+        self._memory[key] = commit_data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get(self, repo_name, sha):
+        """
+        获取缓存的commit详情
+        :param repo_name: 仓库全名 owner/repo
+        :param sha: commit的SHA哈希值
+        :return: commit详情字典，未缓存时返回None
+        """
+        key = (repo_name, sha)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT data FROM commits WHERE repo = ? AND sha = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            commit_data = json.loads(row[0])
+            self._remember(key, commit_data)
+            return commit_data
+
+    def put(self, repo_name, sha, commit_data):
+        """
+        缓存commit详情
+        :param repo_name: 仓库全名 owner/repo
+        :param sha: commit的SHA哈希值
+        :param commit_data: commit详情字典
+        """
+        key = (repo_name, sha)
+        with self._lock:
+            self._remember(key, commit_data)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO commits (repo, sha, data) VALUES (?, ?, ?)",
+                    (repo_name, sha, json.dumps(commit_data, ensure_ascii=False))
+                )
+                self._db.commit()
+
+    def mark_missing(self, repo_name, sha):
+        """
+        记录不属于该仓库的commit
+        """
+        with self._lock:
+            self._missing.add((repo_name, sha))
+
+    def is_missing(self, repo_name, sha):
+        """
+        判断commit是否已确认不属于该仓库
+        """
+        with self._lock:
+            return (repo_name, sha) in self._missing
+
+    def close(self):
+        """
+        关闭SQLite连接
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+debug模式下的API响应日志
+日志记录先放入队列，由后台线程序列化并写入文件，采集线程只负责入队
+按接口抽样、限制单条日志长度，可选gzip压缩
+"""
+import gzip
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from src.api.token_pool import get_endpoint
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class LazyJson:
+    """
+    在写入日志时才序列化的响应数据，序列化在后台线程中进行
+    """
+
+    def __init__(self, data, max_chars=None):
+        self.data = data
+        self.max_chars = max_chars
+
+    def __str__(self):
+        if isinstance(self.data, (list, dict)):
+            text = json.dumps(self.data, ensure_ascii=False, indent=2, default=str)
+        else:
+            text = str(self.data)
+        if self.max_chars and len(text) > self.max_chars:
+            text = text[:self.max_chars] + f"\n... (已截断，共 {len(text)} 个字符)"
+        return text
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    不在调用线程格式化日志的QueueHandler，队列满时丢弃日志而不阻塞采集
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # 标准实现会在这里调用format，把序列化留给后台线程
+        # 异常的traceback对象不能跨线程保留，只提前格式化异常信息
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class ResponseSampler:
+    """
+    按接口抽样记录API响应，接口名由get_endpoint归一化得到，如 commits/:sha
+    """
+
+    def __init__(self, sample_rate=1.0, sample_rates=None):
+        """
+        初始化ResponseSampler实例
+        :param sample_rate: 默认抽样比例，1.0为全部记录
+        :param sample_rates: 接口 -> 抽样比例，如 {"commits/:sha": 0.01}
+        """
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+
+    def should_log(self, api_url):
+        """
+        判断本次响应是否记录
+        """
+        rate = self.sample_rates.get(get_endpoint(api_url), self.sample_rate)
+        return rate >= 1 or random.random() < rate
+
+
+def start_debug_log(log_file, compress=False, max_queue_size=10000):
+    """
+    配置根日志记录器，所有日志经队列由后台线程写入文件，进程退出时写完队列中剩余的日志
+    :param log_file: 日志文件路径，compress为True时追加.gz
+    :param compress: 是否gzip压缩
+    :param max_queue_size: 队列容量，写入跟不上时丢弃新日志
+    :return: (DeferredQueueHandler, 实际的日志文件路径)
+    """
+    if compress:
+        log_file += ".gz"
+        stream = gzip.open(log_file, "wt", encoding="utf-8")
+        file_handler = logging.StreamHandler(stream)
+    else:
+        stream = None
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=max_queue_size)
+    queue_handler = DeferredQueueHandler(log_queue)
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    logging.basicConfig(level=logging.DEBUG, handlers=[queue_handler])
+
+    def stop():
+        listener.stop()
+        file_handler.close()
+        if stream is not None:
+            stream.close()
+        if queue_handler.dropped:
+            print(f"debug日志队列已满，丢弃了 {queue_handler.dropped} 条日志")
+    atexit.register(stop)
+    return queue_handler, log_file
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地git镜像，用本地git操作代替REST API获取commit和PR的修改文件
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import base64
+import subprocess
+import threading
+from src.utils.utils import load_config
+
+CONFIG = load_config()
+
+
+def _unquote_path(path):
+    """
+    去掉git对含特殊字符的文件名加的引号（core.quotepath=false时中文不会被转义）
+    """
+    if len(path) >= 2 and path.startswith('"') and path.endswith('"'):
+        path = path[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return path
+
+
+def parse_unified_diff(diff_text):
+    """
+    解析git diff输出，得到与GitHub API文件列表一致的字段
+    :param diff_text: git diff / git show 的输出
+    :return: 文件列表，每项包含file_path、status、additions、deletions、changes、patch
+    """
+    files = []
+    current = None
+    in_hunk = False
+    old_path = None
+
+    def finish(file_info):
+        patch_lines = file_info["patch_lines"]
+        files.append({
+            "file_path": file_info["file_path"],
+            "status": file_info["status"],
+            "additions": file_info["additions"],
+            "deletions": file_info["deletions"],
+            "changes": file_info["additions"] + file_info["deletions"],
+            # GitHub的patch字段从第一个@@开始，二进制文件和纯重命名没有patch
+            "patch": "\n".join(patch_lines) if patch_lines else None
+        })
+
+    for line in diff_text.split("\n"):
+        if line.startswith("diff --git "):
+            if current is not None:
+                finish(current)
+            current = {"file_path": None, "status": "modified", "additions": 0, "deletions": 0, "patch_lines": []}
+            in_hunk = False
+            old_path = None
+            # 从头部行取路径作为兜底（二进制文件没有---/+++行）
+            header = line[len("diff --git "):]
+            if " b/" in header:
+                current["file_path"] = _unquote_path(header[header.rindex(" b/") + 3:])
+            continue
+        if current is None:
+            continue
+
+        if not in_hunk:
+            if line.startswith("new file mode"):
+                current["status"] = "added"
+            elif line.startswith("deleted file mode"):
+                current["status"] = "removed"
+            elif line.startswith("rename to "):
+                current["status"] = "renamed"
+                current["file_path"] = _unquote_path(line[len("rename to "):])
+            elif line.startswith("copy to "):
+                current["status"] = "copied"
+                current["file_path"] = _unquote_path(line[len("copy to "):])
+            elif line.startswith("--- "):
+                old_path = line[4:]
+            elif line.startswith("+++ "):
+                new_path = line[4:]
+                path = old_path if new_path == "/dev/null" else new_path
+                if path and path != "/dev/null":
+                    current["file_path"] = _unquote_path(path)[2:]
+            elif line.startswith("@@"):
+                in_hunk = True
+                current["patch_lines"].append(line)
+            continue
+
+        if not line:
+            continue
+        if line.startswith("+"):
+            current["additions"] += 1
+        elif line.startswith("-"):
+            current["deletions"] += 1
+        current["patch_lines"].append(line)
+
+    if current is not None:
+        finish(current)
+    return files
+
+
+class GitMirror:
+    """
+    仓库的本地bare镜像（git clone --mirror），包含所有分支和refs/pull/*
+    首次使用时克隆，之后每次运行只增量fetch一次
+    """
+
+    def __init__(self, owner, repo, mirror_dir=None, token=None):
+        """
+        初始化GitMirror实例
+        :param owner: 仓库所有者
+        :param repo: 仓库名称
+        :param mirror_dir: 镜像目录，默认 cache/mirrors/{owner}_{repo}.git
+        :param token: GitHub访问令牌，用于访问私有仓库
+        """
+        self.owner = owner
+        self.repo = repo
+        if mirror_dir is None:
+            mirror_root = CONFIG.get("collection", {}).get("git_mirror_dir", "cache/mirrors")
+            mirror_dir = os.path.join(mirror_root, f"{owner}_{repo}.git")
+        self.mirror_dir = mirror_dir
+        if token is None:
+            token = CONFIG.get("token", "")
+        # URL中不包含令牌，否则clone会把它明文写入镜像的config
+        self.repo_url = f"https://github.com/{owner}/{repo}.git"
+        self._token = token
+        self._synced = False
+        self._sync_lock = threading.Lock()
+
+    def _git(self, *args):
+        """
+        在镜像中执行git命令
+        :return: 标准输出文本
+        """
+        result = subprocess.run(
+            ["git", "-c", "core.quotepath=false", "--git-dir", self.mirror_dir, *args],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} 失败: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def _auth_env(self):
+        """
+        访问远程仓库时使用的环境变量，令牌通过GIT_CONFIG_*作为http.extraHeader传入，
+        不出现在命令行参数、镜像的config和远程URL中
+        """
+        env = dict(os.environ)
+        if self._token:
+            credential = base64.b64encode(f"x-access-token:{self._token}".encode()).decode()
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credential}",
+                "GIT_TERMINAL_PROMPT": "0"
+            })
+        return env
+
+    def _remote_git(self, *args):
+        """
+        执行需要访问远程仓库的git命令(clone、fetch)
+        :return: 标准输出文本
+        """
+        result = subprocess.run(["git", *args], capture_output=True, env=self._auth_env())
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace').strip()
+            if self._token:
+                stderr = stderr.replace(self._token, "***")
+            raise RuntimeError(f"git {args[0]} 失败: {stderr}")
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def sync(self):
+        """
+        克隆或增量更新镜像，每个实例只执行一次
+        """
+        with self._sync_lock:
+            if self._synced:
+                return
+            if os.path.exists(self.mirror_dir):
+                print(f"正在增量更新本地镜像: {self.mirror_dir}")
+                # 旧版本克隆的镜像把令牌写在了远程URL中，改回不含令牌的URL
+                if self._git("config", "--get", "remote.origin.url").strip() != self.repo_url:
+                    self._git("config", "remote.origin.url", self.repo_url)
+                self._remote_git("--git-dir", self.mirror_dir, "fetch", "--prune", "origin")
+            else:
+                print(f"正在克隆本地镜像: {self.owner}/{self.repo} -> {self.mirror_dir}")
+                os.makedirs(os.path.dirname(self.mirror_dir) or ".", exist_ok=True)
+                self._remote_git("clone", "--mirror", self.repo_url, self.mirror_dir)
+            self._synced = True
+
+    def has_commit(self, sha):
+        """
+        判断commit是否存在于镜像中
+        """
+        self.sync()
+        result = subprocess.run(
+            ["git", "--git-dir", self.mirror_dir, "cat-file", "-e", f"{sha}^{{commit}}"],
+            capture_output=True
+        )
+        return result.returncode == 0
+
+    def get_commit_files(self, sha):
+        """
+        获取commit修改的全部文件，合并提交与第一个父提交比较（与GitHub一致）
+        :param sha: commit的SHA哈希值
+        :return: 文件列表
+        """
+        self.sync()
+        parents = self._git("rev-list", "--parents", "-n", "1", sha).split()[1:]
+        if parents:
+            diff_text = self._git("diff", "--no-color", "--no-ext-diff", "-M", parents[0], sha)
+        else:
+            # 根提交没有父提交
+            diff_text = self._git("show", "--no-color", "--no-ext-diff", "-M", "--format=", sha)
+        return parse_unified_diff(diff_text)
+
+    def get_pr_files(self, pr_number, base_sha):
+        """
+        获取PR修改的全部文件，等价于GitHub的 base...head 三点比较
+        :param pr_number: PR编号
+        :param base_sha: PR的base commit
+        :return: 文件列表
+        """
+        self.sync()
+        diff_text = self._git("diff", "--no-color", "--no-ext-diff", "-M",
+                              f"{base_sha}...refs/pull/{pr_number}/head")
+        return parse_unified_diff(diff_text)
+
+    def resolve(self, ref):
+        """
+        获取分支或其他引用当前指向的commit
+        :param ref: 分支名、标签或SHA
+        :return: 完整的commit SHA
+        """
+        self.sync()
+        return self._git("rev-parse", f"{ref}^{{commit}}").strip()
+
+    def get_changed_paths(self, base_sha, head_sha):
+        """
+        获取两个commit之间变化的文件路径，状态与GitHub compare API的files[].status一致
+        :param base_sha: 起始commit
+        :param head_sha: 目标commit
+        :return: 列表，每项包含status(added、modified、removed、renamed)、filename和previous_filename
+        """
+        self.sync()
+        output = self._git("diff", "--no-color", "--name-status", "-M", "-z", base_sha, head_sha)
+        fields = output.split("\0")
+        statuses = {"A": "added", "M": "modified", "D": "removed", "T": "modified", "C": "added"}
+        changes = []
+        i = 0
+        while i < len(fields) and fields[i]:
+            code = fields[i][0]
+            if code in ("R", "C"):
+                previous, filename = fields[i + 1], fields[i + 2]
+                i += 3
+            else:
+                previous, filename = None, fields[i + 1]
+                i += 2
+            if code == "R":
+                changes.append({"status": "renamed", "filename": filename, "previous_filename": previous})
+            else:
+                changes.append({"status": statuses.get(code, "modified"), "filename": filename,
+                                "previous_filename": None})
+        return changes
+
+    def read_file(self, sha, path):
+        """
+        读取某个commit中的文件内容
+        :return: 文件内容(bytes)
+        """
+        self.sync()
+        result = subprocess.run(
+            ["git", "--git-dir", self.mirror_dir, "show", f"{sha}:{path}"],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"读取 {sha}:{path} 失败: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        return result.stdout
+
+    def archive(self, sha, zip_path):
+        """
+        把某个commit的完整目录树导出为zip，结构与GitHub的仓库压缩包一致(顶层为 {repo}-{sha}/)
+        :param sha: commit的SHA哈希值
+        :param zip_path: 输出的zip路径
+        """
+        self.sync()
+        os.makedirs(os.path.dirname(os.path.abspath(zip_path)), exist_ok=True)
+        self._git("archive", "--format=zip", f"--prefix={self.repo}-{sha}/", "-o", os.path.abspath(zip_path), sha)
+
+    def commit_before(self, ref, timestamp):
+        """
+        获取某个时间点时分支指向的commit，沿第一父提交查找
+        :param ref: 分支名
+        :param timestamp: ISO 8601时间，如Issue的created_at
+        :return: commit SHA，该时间点之前没有提交时返回None
+        """
+        self.sync()
+        return self._git("rev-list", "-1", "--first-parent", f"--before={timestamp}", ref).strip() or None
+
+    def list_tree(self, sha):
+        """
+        列出某个commit的全部文件，不含子模块和符号链接
+        :param sha: commit的SHA哈希值
+        :return: 列表，每项包含path和sha(blob SHA)
+        """
+        self.sync()
+        output = self._git("ls-tree", "-r", "-z", "--full-tree", sha)
+        files = []
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            info, path = entry.split("\t", 1)
+            mode, object_type, blob_sha = info.split()
+            if object_type == "blob" and mode != "120000":
+                files.append({"path": path, "sha": blob_sha})
+        return files
+
+    def read_blobs(self, shas):
+        """
+        用一个 git cat-file --batch 进程读取多个blob
+        :param shas: blob SHA列表
+        :return: (blob SHA, 内容bytes) 的生成器
+        """
+        shas = list(shas)
+        if not shas:
+            return
+        self.sync()
+        process = subprocess.Popen(
+            ["git", "--git-dir", self.mirror_dir, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        try:
+            # 逐个请求、逐个读取，避免管道缓冲区写满造成死锁
+            for sha in shas:
+                process.stdin.write(f"{sha}\n".encode())
+                process.stdin.flush()
+                header = process.stdout.readline().decode().split()
+                if len(header) != 3:
+                    raise RuntimeError(f"读取blob {sha} 失败: {' '.join(header)}")
+                content = process.stdout.read(int(header[2]))
+                process.stdout.read(1)
+                yield sha, content
+        finally:
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地git镜像测试文件，不访问GitHub
+"""
+
+import unittest
+import subprocess
+import tempfile
+import shutil
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.api.git_mirror import parse_unified_diff, GitMirror
+
+
+class TestParseUnifiedDiff(unittest.TestCase):
+    """
+    parse_unified_diff的测试，字段与GitHub API文件列表一致
+    """
+
+    def test_modified_without_trailing_newline(self):
+        """
+        "\\ No newline at end of file"保留在patch中，但不计入增删行数
+        """
+        diff_text = (
+            "diff --git a/src/Main.java b/src/Main.java\n"
+            "index 3b18e51..a042389 100644\n"
+            "--- a/src/Main.java\n"
+            "+++ b/src/Main.java\n"
+            "@@ -1,2 +1,3 @@\n"
+            " class Main {\n"
+            "-}\n"
+            "\\ No newline at end of file\n"
+            "+    int x;\n"
+            "+}\n"
+        )
+        files = parse_unified_diff(diff_text)
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0]["file_path"], "src/Main.java")
+        self.assertEqual(files[0]["status"], "modified")
+        self.assertEqual((files[0]["additions"], files[0]["deletions"], files[0]["changes"]), (2, 1, 3))
+        self.assertTrue(files[0]["patch"].startswith("@@ -1,2 +1,3 @@"))
+        self.assertIn("\\ No newline at end of file", files[0]["patch"])
+
+    def test_rename(self):
+        """
+        纯重命名没有patch，带修改的重命名使用新路径并统计行数
+        """
+        diff_text = (
+            "diff --git a/src/Old.java b/src/New.java\n"
+            "similarity index 100%\n"
+            "rename from src/Old.java\n"
+            "rename to src/New.java\n"
+            "diff --git a/src/A.java b/src/pkg/B.java\n"
+            "similarity index 80%\n"
+            "rename from src/A.java\n"
+            "rename to src/pkg/B.java\n"
+            "index 1111111..2222222 100644\n"
+            "--- a/src/A.java\n"
+            "+++ b/src/pkg/B.java\n"
+            "@@ -1 +1 @@\n"
+            "-class A {}\n"
+            "+class B {}\n"
+        )
+        pure, edited = parse_unified_diff(diff_text)
+        self.assertEqual((pure["file_path"], pure["status"], pure["changes"], pure["patch"]),
+                         ("src/New.java", "renamed", 0, None))
+        self.assertEqual((edited["file_path"], edited["status"]), ("src/pkg/B.java", "renamed"))
+        self.assertEqual((edited["additions"], edited["deletions"]), (1, 1))
+        self.assertEqual(edited["patch"], "@@ -1 +1 @@\n-class A {}\n+class B {}")
+
+    def test_binary_added_and_removed(self):
+        """
+        二进制文件没有---/+++行和patch，路径取自diff --git头部
+        """
+        diff_text = (
+            "diff --git a/docs/logo.png b/docs/logo.png\n"
+            "new file mode 100644\n"
+            "index 0000000..8d1f2a3\n"
+            "Binary files /dev/null and b/docs/logo.png differ\n"
+            "diff --git a/src/Gone.java b/src/Gone.java\n"
+            "deleted file mode 100644\n"
+            "index 5e1c309..0000000\n"
+            "--- a/src/Gone.java\n"
+            "+++ /dev/null\n"
+            "@@ -1 +0,0 @@\n"
+            "-class Gone {}\n"
+        )
+        binary, removed = parse_unified_diff(diff_text)
+        self.assertEqual((binary["file_path"], binary["status"], binary["changes"], binary["patch"]),
+                         ("docs/logo.png", "added", 0, None))
+        self.assertEqual((removed["file_path"], removed["status"], removed["deletions"]),
+                         ("src/Gone.java", "removed", 1))
+
+    def test_quoted_path(self):
+        """
+        含空格或特殊字符的路径被git加上引号时去掉引号
+        """
+        diff_text = (
+            'diff --git "a/src/my \\"file\\".java" "b/src/my \\"file\\".java"\n'
+            "new file mode 100644\n"
+            "index 0000000..e69de29\n"
+            "--- /dev/null\n"
+            '+++ "b/src/my \\"file\\".java"\n'
+            "@@ -0,0 +1 @@\n"
+            "+class Quoted {}\n"
+        )
+        files = parse_unified_diff(diff_text)
+        self.assertEqual(files[0]["file_path"], 'src/my "file".java')
+        self.assertEqual((files[0]["status"], files[0]["additions"]), ("added", 1))
+
+
+class TestChangedPaths(unittest.TestCase):
+    """
+    GitMirror.get_changed_paths的测试，解析 git diff --name-status -z 的输出
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.mirror = GitMirror("octo", "demo", mirror_dir=os.path.join(self.tmp_dir, ".git"), token="")
+        # 测试仓库已在本地，不需要克隆或fetch
+        self.mirror._synced = True
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_rename_and_copy_records(self):
+        """
+        R和C记录有两个路径，其余记录只有一个路径
+        """
+        output = "\0".join([
+            "M", "src/Main.java",
+            "R100", "src/Old.java", "src/New.java",
+            "C075", "src/Base.java", "src/Copy.java",
+            "A", "src/中文.java",
+            "D", "src/Gone.java",
+            "T", "src/Link.java",
+        ]) + "\0"
+        self.mirror._git = lambda *args: output
+        self.assertEqual(self.mirror.get_changed_paths("base", "head"), [
+            {"status": "modified", "filename": "src/Main.java", "previous_filename": None},
+            {"status": "renamed", "filename": "src/New.java", "previous_filename": "src/Old.java"},
+            {"status": "added", "filename": "src/Copy.java", "previous_filename": None},
+            {"status": "added", "filename": "src/中文.java", "previous_filename": None},
+            {"status": "removed", "filename": "src/Gone.java", "previous_filename": None},
+            {"status": "modified", "filename": "src/Link.java", "previous_filename": None},
+        ])
+
+    def test_real_repository(self):
+        """
+        在真实仓库中重命名、修改和删除文件
+        """
+        def git(*args):
+            subprocess.run(["git", "-C", self.tmp_dir, "-c", "user.name=test", "-c", "user.email=test@example.com",
+                            *args], check=True, capture_output=True)
+
+        def write(path, content):
+            os.makedirs(os.path.dirname(os.path.join(self.tmp_dir, path)), exist_ok=True)
+            with open(os.path.join(self.tmp_dir, path), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        git("init", "-q")
+        write("src/Old.java", "class Old {\n" + "    int field;\n" * 20 + "}\n")
+        write("src/Main.java", "class Main {}\n")
+        write("src/Gone.java", "class Gone {}\n")
+        git("add", "-A")
+        git("commit", "-q", "-m", "base")
+        base = self.mirror.resolve("HEAD")
+        os.renames(os.path.join(self.tmp_dir, "src", "Old.java"), os.path.join(self.tmp_dir, "src", "pkg", "Renamed.java"))
+        write("src/Main.java", "class Main { int x; }\n")
+        git("rm", "-q", "src/Gone.java")
+        write("src/空 格.java", "class Space {}\n")
+        git("add", "-A")
+        git("commit", "-q", "-m", "head")
+
+        changes = self.mirror.get_changed_paths(base, self.mirror.resolve("HEAD"))
+        self.assertEqual(sorted((c["status"], c["filename"], c["previous_filename"]) for c in changes), [
+            ("added", "src/空 格.java", None),
+            ("modified", "src/Main.java", None),
+            ("removed", "src/Gone.java", None),
+            ("renamed", "src/pkg/Renamed.java", "src/Old.java"),
+        ])
+
+
+if __name__ == '__main__':
+    """
+    运行测试
+    """
+    unittest.main()
@@ -11,18 +11,43 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 from github import Github
 from github import GithubRetry
+from github import GithubException
 from src.utils.utils import load_config
+from src.api.commit_cache import CommitCache
+from src.api.git_mirror import GitMirror
+from src.api.token_pool import TokenPool, PooledConnectionMixin, install_token_pool
+from src.api.http_cache import HttpCache, CachingConnectionMixin, install_http_cache
+from src.api.http_archive import install_http_archive
+from src.api.debug_log import LazyJson, ResponseSampler, start_debug_log
+from src.api.telemetry import Telemetry, TelemetryConnectionMixin, install_telemetry, instrumented
 import github.Auth
-import json
 import logging
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 
 # 尝试从main.py导入全局配置变量
 CONFIG = load_config()
 
 limits = CONFIG["limits"]
+# 并发采集相关配置
+collection_config = CONFIG.get("collection", {})
+# 同时采集的仓库数，collect_repos.py的线程数和共享客户端的连接池大小都按它计算
+MAX_REPO_WORKERS = collection_config.get("max_repo_workers", 5)
 # 全局DEBUG变量，用于控制debug模式
 DEBUG = True
+# 搜索API对每个查询最多返回1000条结果
+SEARCH_RESULT_CAP = 1000
+
+
+def _format_search_time(value):
+    """
+    将时间格式化为搜索语句中使用的UTC时间
+    """
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
 retry_strategy = GithubRetry(
     total=5,              # 总重试次数
     backoff_factor=2,     # 指数退避因子 (重试间隔会变成 2s, 4s, 8s...)
@@ -36,6 +61,9 @@ class GitHubAPI:
     GitHub API访问类，提供与GitHub API交互的方法
     """
     
+    # 录制或回放的归档，同一进程内只安装一次
+    http_archive = None
+    
     def __init__(self, access_token=CONFIG["token"], debug=None, log_dir="logs"):
         """
         初始化GitHubAPI实例
@@ -59,17 +87,99 @@ class GitHubAPI:
         if self.debug:
             self._init_logger()
         
+        # 速率限制保护：剩余配额低于该值时等待重置
+        self.min_rate_remaining = collection_config.get("min_rate_remaining", 50)
+        self._rate_limit_lock = threading.Lock()
+        
+        # commit缓存，is_commit_in_repo、get_commit_detail和get_issue_change_files共用
+        self.commit_cache = CommitCache(
+            db_path=collection_config.get("commit_cache_path", "cache/commit_cache.sqlite"),
+            max_size=collection_config.get("commit_cache_size", 2048)
+        )
+        # 修改文件的来源: api(REST API) 或 git_mirror(本地镜像，不消耗API配额)
+        self.change_files_source = collection_config.get("change_files_source", "api")
+        self._git_mirrors = {}
+        self._git_mirrors_lock = threading.Lock()
+        
+        # 每个commit一把锁，并发线程引用同一commit时只有一个线程发起请求
+        self._commit_locks = {}
+        self._commit_locks_guard = threading.Lock()
+        
+        # 录制或回放HTTP交互，用于离线评估采集性能
+        archive_config = collection_config.get("http_archive", {})
+        archive_mode = archive_config.get("mode", "off")
+        if archive_mode != "off" and self.http_archive is None:
+            GitHubAPI.http_archive = install_http_archive(
+                archive_mode,
+                archive_config.get("path", "cache/archives/collection.jsonl.gz"),
+                latency=archive_config.get("latency", 0.0),
+                latency_scale=archive_config.get("latency_scale", 0.0),
+                rate_limit=archive_config.get("rate_limit")
+            )
+        
+        # 配置了多个令牌时使用令牌池，请求路由到剩余配额最多的令牌，由令牌池控制请求节奏
+        seconds_between_requests = collection_config.get("seconds_between_requests", 0.25)
+        tokens = list(dict.fromkeys([access_token] + CONFIG.get("tokens", [])))
+        self.token_pool = None
+        if len(tokens) > 1:
+            # 同一进程内的GitHubAPI实例共享令牌池
+            self.token_pool = PooledConnectionMixin.token_pool or TokenPool(tokens, min_interval=seconds_between_requests)
+            install_token_pool(self.token_pool)
+            seconds_between_requests = None
+            print(f"已启用令牌池，共 {self.token_pool.size} 个令牌")
+        
+        # 条件请求缓存：保存ETag和Last-Modified，返回304的请求不消耗速率限制配额
+        http_cache_config = collection_config.get("http_cache", {})
+        self.http_cache = None
+        # 取代了原先main.py中的全局requests_cache，没有http_cache配置时也默认启用
+        # 录制和回放时不使用缓存，保证归档中是完整的响应
+        if http_cache_config.get("enabled", True) and self.http_archive is None:
+            self.http_cache = CachingConnectionMixin.http_cache or HttpCache(
+                db_path=http_cache_config.get("path", "cache/http_cache.sqlite"),
+                max_size_mb=http_cache_config.get("max_size_mb", 1024),
+                ttl_policies=http_cache_config.get("ttl", {}),
+                default_ttl=http_cache_config.get("default_ttl", 0)
+            )
+            install_http_cache(self.http_cache)
+        
+        # 运行统计：按方法和接口统计调用次数、耗时、传输量、缓存命中和配额，需在缓存之后安装
+        # 默认不开启，与debug_log一样需要在配置中启用
+        telemetry_config = collection_config.get("telemetry", {})
+        self.telemetry = None
+        if telemetry_config.get("enabled", False):
+            self.telemetry = TelemetryConnectionMixin.telemetry or Telemetry()
+            install_telemetry(self.telemetry)
+            if telemetry_config.get("live_interval", 0):
+                self.telemetry.start_live(telemetry_config["live_interval"])
+        
         # 使用新的认证方式
         auth = github.Auth.Token(access_token)
         self.g = Github(auth=auth,
+        # 可指向GitHub Enterprise或本地模拟服务(src/api/mock_github_server.py)
+        base_url=collection_config.get("api_base_url", "https://api.github.com"),
         retry=retry_strategy,
-        timeout=50
+        timeout=50,
+        # 每页返回最大条数，减少分页请求
+        per_page=100,
+        # 连接池大小需不小于并发线程数，否则多线程请求会排队等待连接
+        # 多仓库并发采集时共享同一客户端，需乘以同时采集的仓库数
+        pool_size=collection_config.get("max_workers", 8) * MAX_REPO_WORKERS,
+        # 请求之间的最小间隔，避免并发时触发二次速率限制
+        seconds_between_requests=seconds_between_requests
         )
     
     def _init_logger(self):
         """
         初始化日志记录器
+        日志经队列由后台线程序列化并写入，按接口抽样，见配置文件中的debug_log
         """
+        log_config = CONFIG.get("debug_log", {})
+        self.log_max_chars = log_config.get("max_chars", 20000)
+        self.response_sampler = ResponseSampler(
+            sample_rate=log_config.get("sample_rate", 1.0),
+            sample_rates=log_config.get("sample_rates", {})
+        )
+        
         # 确保日志目录存在
         os.makedirs(self.log_dir, exist_ok=True)
         
@@ -78,35 +188,78 @@ class GitHubAPI:
         log_file = os.path.join(self.log_dir, f"github_api_debug_{timestamp}.log")
         
         # 配置日志
-        logging.basicConfig(
-            filename=log_file,
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            encoding='utf-8'
+        _, log_file = start_debug_log(
+            log_file,
+            compress=log_config.get("compress", False),
+            max_queue_size=log_config.get("max_queue_size", 10000)
         )
         
         self.logger = logging.getLogger(__name__)
         print(f"Debug模式已开启，日志将保存到: {log_file}")
     
+    def _should_log(self, api_url):
+        """
+        判断是否记录本次API响应，未被抽中时调用方不必构造日志数据
+        :param api_url: API请求URL
+        """
+        return self.debug and hasattr(self, 'logger') and self.response_sampler.should_log(api_url)
+    
     def _log_api_response(self, api_url, response_data):
         """
-        记录API响应到日志
+        记录API响应到日志，序列化在后台日志线程中进行
         :param api_url: API请求URL
         :param response_data: API响应数据
         """
         if self.debug and hasattr(self, 'logger'):
-            try:
-                # 确保数据可序列化
-                if isinstance(response_data, (list, dict)):
-                    serialized_data = json.dumps(response_data, ensure_ascii=False, indent=2)
-                else:
-                    serialized_data = str(response_data)
-                
-                log_message = f"API URL: {api_url}\nResponse: {serialized_data}"
-                self.logger.debug(log_message)
-            except Exception as e:
-                self.logger.error(f"记录API响应失败: {str(e)}")
+            self.logger.debug("API URL: %s\nResponse: %s", api_url, LazyJson(response_data, self.log_max_chars))
     
+    def export_telemetry(self):
+        """
+        导出本次运行的统计汇总，默认保存到日志目录下的telemetry_{时间}.json
+        :return: 汇总字典，未开启统计时返回None
+        """
+        if self.telemetry is None:
+            return None
+        path = collection_config.get("telemetry", {}).get("path")
+        if not path:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(self.log_dir, f"telemetry_{timestamp}.json")
+        return self.telemetry.export(path)
+    
+    @instrumented
+    def wait_for_rate_limit(self):
+        """
+        检查主速率限制的剩余配额，不足时等待至重置时间
+        配额信息来自最近一次响应头，不额外发起请求；多线程调用时只有一个线程等待，其余线程排队
+        使用令牌池时由令牌池在每次请求前选择和等待令牌，这里不再检查
+        """
+        if self.token_pool:
+            return
+        with self._rate_limit_lock:
+            # 直接读取requester中的值，Github.rate_limiting在无数据时会额外请求/rate_limit
+            remaining, limit = self.g.requester.rate_limiting
+            # 尚未发起过请求时为(-1, -1)
+            if remaining < 0 or remaining >= self.min_rate_remaining:
+                return
+            wait_seconds = self.g.requester.rate_limiting_resettime - time.time() + 1
+            if wait_seconds > 0:
+                print(f"API剩余配额 {remaining}/{limit}，等待 {int(wait_seconds)} 秒后继续...")
+                time.sleep(wait_seconds)
+    
+    def _get_git_mirror(self, repo):
+        """
+        获取仓库的本地镜像，不使用本地镜像时返回None
+        :param repo: 仓库对象
+        :return: GitMirror实例或None
+        """
+        if self.change_files_source != "git_mirror":
+            return None
+        with self._git_mirrors_lock:
+            if repo.full_name not in self._git_mirrors:
+                self._git_mirrors[repo.full_name] = GitMirror(repo.owner.login, repo.name, token=self.access_token)
+            return self._git_mirrors[repo.full_name]
+    
+    @instrumented
     def get_repo(self, repo_owner, repo_name):
         """
         获取指定仓库
@@ -120,7 +273,7 @@ class GitHubAPI:
             repo = self.g.get_repo(f"{repo_owner}/{repo_name}")
             
             # 记录API响应
-            if self.debug:
+            if self._should_log(api_url):
                 repo_data = {
                     "name": repo.name,
                     "full_name": repo.full_name,
@@ -139,35 +292,44 @@ class GitHubAPI:
             traceback.print_exc()
             return None
     
-    def get_issues(self, repo, state="all", labels=[]):
+    @instrumented
+    def get_issues(self, repo, state="all", labels=[], since=None):
         """
         获取仓库的Issues
         :param repo: 仓库对象
         :param state: Issues状态 (open, closed, all)
         :param labels: 标签列表，用于过滤
+        :param since: 只获取在该时间之后更新的Issues，用于增量采集
         :return: Issues列表
         """
         api_url = f"https://api.github.com/repos/{repo.owner.login}/{repo.name}/issues"
         params = f"?state={state}"
         if labels:
             params += f"&labels={','.join(labels)}"
+        if since:
+            params += f"&since={since.isoformat()}&sort=updated&direction=asc"
         api_url += params
         
         try:
             ## 返回issues迭代器
-            issues = repo.get_issues(state=state, labels=labels)
+            if since:
+                # 增量采集按更新时间升序，达到数量上限时水位线之前的Issues都已获取
+                issues = repo.get_issues(state=state, labels=labels, since=since, sort="updated", direction="asc")
+            else:
+                issues = repo.get_issues(state=state, labels=labels)
             issue_list = []
             count = 0
             for issue in issues:
                 if count >= limits["max_issues"]:
                     break
-                if "pull_request" in issue.raw_data:
+                # raw_data会触发对象补全请求，用html_url判断是否为PR
+                if "/pull/" in issue.html_url:
                     continue
                 issue_list.append(issue)
                 print(f"当前获取到第 {count+1} 个Issue: {issue.title}")
                 count += 1
             # 记录API响应
-            if self.debug:
+            if self._should_log(api_url):
                 issues_data = []
                 for issue in issue_list:  
                     issues_data.append({
@@ -188,6 +350,7 @@ class GitHubAPI:
             traceback.print_exc()
             return []
     
+    @instrumented
     def get_commits(self, repo, since=None, until=None):
         """
         获取仓库的Commits
@@ -222,7 +385,7 @@ class GitHubAPI:
                 count += 1
             
             # 记录API响应
-            if self.debug:
+            if self._should_log(api_url):
                 commits_data = []
                 for commit in commits_list:  # 只记录前10个，避免日志过大
                     commits_data.append({
@@ -240,30 +403,44 @@ class GitHubAPI:
             traceback.print_exc()
             return []
     
-    def get_pull_requests(self, repo, state="closed"):
+    @instrumented
+    def get_pull_requests(self, repo, state="closed", since=None, labels=None):
         """
         获取仓库的Pull Requests，包含关联的commit列表
         :param repo: 仓库对象
         :param state: PR状态 (open, closed, all)
+        :param since: 只获取在该时间之后更新的PR，用于增量采集
+        :param labels: PR需包含其中任一标签，为None时使用配置文件中的pr_filter_labels
         :return: Pull Requests列表
         """
         api_url = f"https://api.github.com/repos/{repo.owner.login}/{repo.name}/pulls?state={state}"
-        query = f"repo:{CONFIG['owner']}/{CONFIG['repo']} is:pr is:merged"
+        if labels is None:
+            labels = CONFIG["pr_filter_labels"]
+        query = f"repo:{repo.full_name} is:pr is:merged"
+        if since:
+            query += f" updated:>={_format_search_time(since)} sort:updated-asc"
+        if labels:
+            # 在搜索语句中按标签过滤（逗号分隔表示任一匹配），减少需要翻页的结果
+            query += " label:" + ",".join(f'"{label}"' for label in labels)
         try:
-            pulls = self.g.search_issues(query=query)
-            pulls_list = []
-            count = 0
-            for pr in pulls:
-                if count >= limits["max_pull_requests"]:
-                    break
-                if CONFIG["pr_filter_labels"]: 
-                    labels = [label.name for label in pr.labels]
-                    if not any(label in CONFIG["pr_filter_labels"] for label in labels):
+            use_list, total_hits = self._should_list_pulls(repo, query, since)
+            if use_list:
+                pulls_list = self._list_merged_pulls(repo, since, labels)
+            else:
+                pulls = self._search_pull_requests(repo, query, total_hits, since)
+                hits = []
+                for pr in pulls:
+                    if len(hits) >= limits["max_pull_requests"]:
+                        break
+                    if labels and not any(label.name in labels for label in pr.labels):
                         continue
-                pr = pr.as_pull_request()
-                pulls_list.append(pr)
-                print(f"当前获取到第 {count+1} 个PR: {pr.title}")
-                count += 1
+                    hits.append(pr)
+                # 搜索结果缺少head、base等字段，每个PR请求一次完整数据，并发进行
+                max_workers = collection_config.get("max_workers", 8)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pulls_list = list(executor.map(lambda hit: hit.as_pull_request(), hits))
+                for count, pr in enumerate(pulls_list):
+                    print(f"当前获取到第 {count+1} 个PR: {pr.title}")
             
             # # 记录API响应
             # if self.debug:
@@ -308,6 +485,202 @@ class GitHubAPI:
             traceback.print_exc()
             return []
     
+    @instrumented
+    def _get_commit_data(self, repo, commit_hash):
+        """
+        获取commit详情，优先读取缓存，同一commit最多请求一次
+        :param repo: 仓库对象
+        :param commit_hash: commit的SHA哈希值
+        :return: commit详情字典，commit不存在时返回None
+        """
+        repo_name = repo.full_name
+        commit_data = self.commit_cache.get(repo_name, commit_hash)
+        if commit_data is not None:
+            return commit_data
+        
+        with self._commit_locks_guard:
+            commit_lock = self._commit_locks.setdefault((repo_name, commit_hash), threading.Lock())
+        with commit_lock:
+            # 等待锁期间其他线程可能已经获取过该commit
+            commit_data = self.commit_cache.get(repo_name, commit_hash)
+            if commit_data is not None:
+                return commit_data
+            if self.commit_cache.is_missing(repo_name, commit_hash):
+                return None
+            return self._fetch_commit_data(repo, commit_hash)
+    
+    @instrumented
+    def _fetch_commit_data(self, repo, commit_hash):
+        """
+        请求commit详情并写入缓存
+        :param repo: 仓库对象
+        :param commit_hash: commit的SHA哈希值
+        :return: commit详情字典
+        """
+        repo_name = repo.full_name
+        try:
+            commit = repo.get_commit(commit_hash)
+        except GithubException as e:
+            # 404/422说明commit不属于该仓库，其他错误不记录，下次仍会重试
+            if e.status in (404, 422):
+                self.commit_cache.mark_missing(repo_name, commit_hash)
+            raise
+        
+        # 提取commit基本信息
+        commit_data = {
+            "sha": commit.sha,
+            "message": commit.commit.message,
+            "url": commit.html_url,
+            "stats": {
+                "additions": commit.stats.additions,
+                "deletions": commit.stats.deletions,
+                "total": commit.stats.total
+            },
+            "files": []
+        }
+        
+        # 提取文件变动信息
+        for file in commit.files:
+            commit_data["files"].append({
+                "filename": file.filename,
+                "changes": file.changes,
+                "additions": file.additions,
+                "deletions": file.deletions,
+                "status": file.status,
+                "patch": file.patch,
+                "blob_url": file.blob_url,
+                "raw_url": file.raw_url,
+                "contents_url": file.contents_url
+            })
+        
+        # 缓存键使用请求的SHA，短SHA与完整SHA分别缓存
+        self.commit_cache.put(repo_name, commit_hash, commit_data)
+        return commit_data
+    
+    @instrumented
+    def _search_total_count(self, query):
+        """
+        获取搜索结果总数
+        PaginatedList.totalCount按Link头的最后一页计算，搜索结果超过1000条时也只有1000，
+        这里直接读取响应中的total_count
+        :param query: 搜索语句
+        :return: 结果总数
+        """
+        _, data = self.g.requester.requestJsonAndCheck(
+            "GET", "/search/issues", parameters={"q": query, "per_page": 1}
+        )
+        return data["total_count"]
+    
+    def _should_list_pulls(self, repo, query, since=None):
+        """
+        估算两种获取方式的请求数，选择代价更小的一种
+        搜索方式：每个命中的PR还需请求一次完整数据
+        列表方式：pulls接口每页返回100个完整PR，但需要翻过不满足条件的PR
+        :return: (使用列表方式时为True, 搜索结果总数)，总数供_search_pull_requests复用，不再重复查询
+        """
+        total_hits = self._search_total_count(query)
+        if total_hits == 0:
+            return False, 0
+        closed_query = f"repo:{repo.full_name} is:pr is:closed"
+        if since:
+            closed_query += f" updated:>={_format_search_time(since)}"
+        total_closed = self._search_total_count(closed_query)
+        wanted = total_hits if since else min(total_hits, limits["max_pull_requests"])
+        search_cost = wanted + wanted / 100
+        list_cost = wanted * total_closed / total_hits / 100
+        print(f"符合条件的PR {total_hits} 个，已关闭PR {total_closed} 个，"
+              f"预计请求数: 搜索 {int(search_cost)}，列表 {int(list_cost) + 1}")
+        return list_cost < search_cost, total_hits
+    
+    @instrumented
+    def _list_merged_pulls(self, repo, since=None, filter_labels=None):
+        """
+        通过pulls列表接口获取已合并的PR，列表中已包含head、base等完整字段，无需逐个请求
+        :param repo: 仓库对象
+        :param since: 增量采集的水位线
+        :param filter_labels: PR需包含其中任一标签
+        :return: PullRequest对象列表
+        """
+        if since:
+            pulls = repo.get_pulls(state="closed", sort="updated", direction="desc")
+        else:
+            pulls = repo.get_pulls(state="closed")
+        
+        pulls_list = []
+        for pr in pulls:
+            if since and pr.updated_at < since:
+                break
+            # 列表数据中没有merged字段，用merged_at判断，避免触发补全请求
+            if pr.merged_at is None:
+                continue
+            if filter_labels and not any(label.name in filter_labels for label in pr.labels):
+                continue
+            pulls_list.append(pr)
+            print(f"当前获取到第 {len(pulls_list)} 个PR: {pr.title}")
+            if not since and len(pulls_list) >= limits["max_pull_requests"]:
+                break
+        
+        if since:
+            # 增量采集按更新时间升序截断，保证水位线之前的PR都已获取
+            pulls_list.reverse()
+            pulls_list = pulls_list[:limits["max_pull_requests"]]
+        return pulls_list
+    
+    @instrumented
+    def _search_pull_requests(self, repo, query, total, since=None):
+        """
+        执行PR搜索，结果超过搜索API的1000条上限时按合并时间分段依次获取
+        :param repo: 仓库对象
+        :param query: 搜索语句
+        :param total: 搜索结果总数(_should_list_pulls已查询)
+        :param since: 增量采集的水位线，决定结果排序
+        :return: 搜索结果(Issue对象)的可迭代对象
+        """
+        pulls = self.g.search_issues(query=query)
+        if total <= SEARCH_RESULT_CAP or limits["max_pull_requests"] <= SEARCH_RESULT_CAP:
+            return pulls
+        
+        print(f"搜索结果共 {total} 条，超过 {SEARCH_RESULT_CAP} 条上限，按合并时间分段获取...")
+        # since是更新时间的水位线，已由updated:>=过滤；水位线之前合并、之后更新的PR也要落在某个时间段中，
+        # 因此合并时间总是从仓库创建时开始划分
+        start = repo.created_at
+        end = datetime.now(timezone.utc)
+        windows = self._partition_search_windows(query, start, end)
+        print(f"共划分为 {len(windows)} 个时间段")
+        
+        # 搜索配额只有每分钟30次，并发获取只会触发二次速率限制，按时间段依次获取，
+        # 请求节奏由客户端的请求间隔或令牌池的search配额控制
+        merged = {}
+        for window_query in windows:
+            # 相邻时间段的边界是闭区间，按编号去重
+            for pr in self.g.search_issues(query=window_query):
+                merged[pr.number] = pr
+        
+        if since:
+            # 增量采集保持按更新时间升序
+            return sorted(merged.values(), key=lambda pr: pr.updated_at)
+        return sorted(merged.values(), key=lambda pr: pr.number, reverse=True)
+    
+    def _partition_search_windows(self, query, start, end):
+        """
+        将合并时间范围二分，直到每段的结果数不超过搜索上限
+        :param query: 搜索语句
+        :param start: 开始时间
+        :param end: 结束时间
+        :return: 每个时间段的搜索语句列表
+        """
+        window_query = f"{query} merged:{_format_search_time(start)}..{_format_search_time(end)}"
+        count = self._search_total_count(window_query)
+        if count == 0:
+            return []
+        # 时间段已经很短时不再拆分，只能获取前1000条
+        if count <= SEARCH_RESULT_CAP or end - start <= timedelta(minutes=1):
+            return [window_query]
+        middle = start + (end - start) / 2
+        return (self._partition_search_windows(query, start, middle)
+                + self._partition_search_windows(query, middle, end))
+    
+    @instrumented
     def get_commit_detail(self, repo, commit_hash):
         """
         获取commit的详细信息，包括文件具体变动
@@ -318,38 +691,18 @@ class GitHubAPI:
         api_url = f"https://api.github.com/repos/{repo.owner.login}/{repo.name}/commits/{commit_hash}"
         
         try:
-            commit = repo.get_commit(commit_hash)
+            cached = self._get_commit_data(repo, commit_hash)
+            if cached is None:
+                print(f"获取commit详细信息失败: commit {commit_hash} 不存在")
+                return None
             
-            # 提取commit基本信息
-            commit_detail = {
-                "sha": commit.sha,
-                "message": commit.commit.message,
-                "url": commit.html_url,
-                "stats": {
-                    "additions": commit.stats.additions,
-                    "deletions": commit.stats.deletions,
-                    "total": commit.stats.total
-                },
-                "files": []
-            }
-            
-            # 提取文件变动信息
-            for file in commit.files:
-                file_change = {
-                    "filename": file.filename,
-                    "changes": file.changes,
-                    "additions": file.additions,
-                    "deletions": file.deletions,
-                    "status": file.status,
-                    "patch": file.patch,
-                    "blob_url": file.blob_url,
-                    "raw_url": file.raw_url,
-                    "contents_url": file.contents_url
-                }
-                commit_detail["files"].append(file_change)
+            # 返回副本，避免调用方修改缓存中的数据
+            commit_detail = dict(cached)
+            commit_detail["stats"] = dict(cached["stats"])
+            commit_detail["files"] = [dict(f) for f in cached["files"]]
             
             # 记录API响应
-            if self.debug:
+            if self._should_log(api_url):
                 # 只记录文件信息摘要，不记录完整的patch，避免日志过大
                 commit_data = commit_detail.copy()
                 commit_data["files"] = [
@@ -358,8 +711,7 @@ class GitHubAPI:
                         "changes": f["changes"],
                         "additions": f["additions"],
                         "deletions": f["deletions"],
-                        "status": f["status"],
-                        "patch": f["patch"]
+                        "status": f["status"]
                     }
                     for f in commit_data["files"]
                 ]
@@ -372,6 +724,7 @@ class GitHubAPI:
             traceback.print_exc()
             return None
     
+    @instrumented
     def get_contents(self, repo, path="."):
         """
         获取仓库指定路径的内容
@@ -385,7 +738,7 @@ class GitHubAPI:
             contents = repo.get_contents(path)
             
             # 记录API响应
-            if self.debug:
+            if self._should_log(api_url):
                 contents_data = []
                 for content in contents:
                     content_info = {
@@ -405,6 +758,7 @@ class GitHubAPI:
             traceback.print_exc()
             return []
     
+    @instrumented
     def get_file_content(self, repo, file_path):
         """
         获取指定文件的内容
@@ -425,7 +779,7 @@ class GitHubAPI:
                 file_content = content.content
             
             # 记录API响应（只记录文件信息，不记录文件内容，避免日志过大）
-            if self.debug:
+            if self._should_log(api_url):
                 file_info = {
                     "name": content.name,
                     "path": content.path,
@@ -442,13 +796,77 @@ class GitHubAPI:
             traceback.print_exc()
             return None
     
-    def get_issue_commit_refs(self, repo, issue):
+    @instrumented
+    def build_issue_commit_refs_index(self, repo, issue_numbers=None, since=None):
+        """
+        一次遍历仓库级的issue events，建立 Issue编号 -> commit引用 的索引
+        请求次数与事件总数成正比，代替逐个Issue分页调用issue.get_events()
+        索引中的引用尚未校验commit是否属于仓库，由get_issue_commit_refs在使用时校验
+        :param repo: 仓库对象
+        :param issue_numbers: 只为这些Issue建立索引，为None时索引全部Issue
+        :param since: 事件按时间倒序返回，早于该时间的事件不再遍历（如最早Issue的创建时间）
+        :return: 索引字典 {issue_number: [commit引用, ...]}，每个Issue的引用按时间正序排列
+        """
+        api_url = f"https://api.github.com/repos/{repo.owner.login}/{repo.name}/issues/events"
+        if issue_numbers is not None:
+            issue_numbers = set(issue_numbers)
+        
+        refs_index = {}
+        event_count = 0
+        try:
+            for event in repo.get_issues_events():
+                event_count += 1
+                if event_count % 1000 == 0:
+                    print(f"已遍历 {event_count} 个issue事件...")
+                if since and event.created_at and event.created_at < since:
+                    break
+                # 只处理引用了commit的事件；event.issue来自列表数据，不会触发额外请求
+                if event.commit_id is None or event.issue is None:
+                    continue
+                issue_number = event.issue.number
+                if issue_numbers is not None and issue_number not in issue_numbers:
+                    continue
+                refs_index.setdefault(issue_number, []).append({
+                    "event_id": event.id,
+                    "event_type": event.event,
+                    "commit_sha": event.commit_id,
+                    "message": f"Commit referenced in issue: {event.issue.title}",
+                    "commit_url": event.commit_url,
+                    "created_at": event.created_at.isoformat() if event.created_at else None
+                })
+        except Exception as e:
+            print(f"获取仓库issue事件失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            raise
+        
+        # 与issue.get_events()的顺序保持一致
+        for commit_refs in refs_index.values():
+            commit_refs.reverse()
+        
+        print(f"共遍历 {event_count} 个issue事件，{len(refs_index)} 个Issue引用了commit")
+        if self._should_log(api_url):
+            self._log_api_response(api_url, {
+                "event_count": event_count,
+                "issues_with_commits": len(refs_index)
+            })
+        return refs_index
+
+    @instrumented
+    def get_issue_commit_refs(self, repo, issue, refs_index=None):
         """
         获取Issue关联的commit引用
         :param repo: 仓库对象
         :param issue: Issue对象
+        :param refs_index: build_issue_commit_refs_index建立的索引，提供时不再请求issue事件
         :return: commit引用列表
         """
+        if refs_index is not None:
+            return [
+                ref for ref in refs_index.get(issue.number, [])
+                if self.is_commit_in_repo(repo, ref["commit_sha"])
+            ]
+        
         try:
             # 获取issue事件
             events = issue.get_events()
@@ -478,6 +896,7 @@ class GitHubAPI:
             traceback.print_exc()
             return []
 
+    @instrumented
     def is_commit_in_repo(self, repo, commit_hash):
         """
         判断给定的commit_hash是否属于指定的仓库
@@ -488,13 +907,18 @@ class GitHubAPI:
         api_url = f"https://api.github.com/repos/{repo.owner.login}/{repo.name}/commits/{commit_hash}"
         
         try:
-            # 尝试获取commit信息
-            repo.get_commit(commit_hash)
+            git_mirror = self._get_git_mirror(repo)
+            if git_mirror:
+                return git_mirror.has_commit(commit_hash)
+            
+            # 尝试获取commit信息（结果会被缓存，后续获取修改文件时不再重复请求）
+            if self._get_commit_data(repo, commit_hash) is None:
+                return False
             # 如果成功获取commit，说明commit属于该仓库
             return True
         except Exception as e:
             # 如果获取失败，说明commit不属于该仓库
-            if self.debug:
+            if self._should_log(api_url):
                 error_data = {
                     "error": str(e),
                     "commit_hash": commit_hash,
@@ -503,41 +927,93 @@ class GitHubAPI:
                 self._log_api_response(api_url, error_data)
             return False
 
-    def get_issue_change_files (self, repo, issue):
+    @instrumented
+    def get_commit_change_files(self, repo, commit_sha):
+        """
+        获取单个commit中修改的源代码文件
+        :param repo: 仓库对象
+        :param commit_sha: commit的SHA哈希值
+        :return: 修改文件列表
+        """
+        modify_files = []
+        try:
+            git_mirror = self._get_git_mirror(repo)
+            if git_mirror:
+                # 通过本地镜像获取修改文件
+                for file in git_mirror.get_commit_files(commit_sha):
+                    if file["file_path"].endswith(tuple(CONFIG["source_code_extensions"])):
+                        modify_files.append({"commit_sha": commit_sha, **file})
+                return modify_files
+            
+            # 获取commit的修改文件
+            commit_data = self._get_commit_data(repo, commit_sha)
+            if commit_data is None:
+                raise ValueError("commit不存在")
+            for file in commit_data["files"]:
+                ## 只记录代码文件
+                if file["filename"].endswith(tuple(CONFIG["source_code_extensions"])):
+                    modify_files.append({
+                        "commit_sha": commit_sha,
+                        "file_path": file["filename"],
+                        "status": file["status"],
+                        "additions": file["additions"],
+                        "deletions": file["deletions"],
+                        "changes": file["changes"],
+                        "patch": file["patch"]
+                    })
+        except Exception as e:
+            print(f"获取commit {commit_sha} 的修改文件失败: {str(e)}")
+        
+        return modify_files
+
+    @instrumented
+    def get_issue_change_files (self, repo, issue, refs_index=None):
         """
         获取Issue关联的提交中修改的文件
         :param repo: 仓库对象
         :param issue: Issue对象
+        :param refs_index: Issue编号 -> commit引用 的索引，可选
         :return: 修改文件列表
         """
         # 获取issue关联的commit引用
-        commit_refs = self.get_issue_commit_refs(repo, issue)
+        commit_refs = self.get_issue_commit_refs(repo, issue, refs_index)
         
         modify_files = []
         for ref in commit_refs:
-            commit_sha = ref['commit_sha']
-            try:
-                # 获取commit的修改文件
-                commit = repo.get_commit(commit_sha)
-                files = commit.files
-                for file in files:
-                    ## 只记录代码文件
-                    if file.filename.endswith(tuple(CONFIG["source_code_extensions"])):
-                        modify_files.append({
-                            "commit_sha": commit_sha,
-                            "file_path": file.filename,
-                            "status": file.status,
-                            "additions": file.additions,
-                            "deletions": file.deletions,
-                            "changes": file.changes,
-                            "patch": file.patch
-                        })
-            except Exception as e:
-                print(f"获取commit {commit_sha} 的修改文件失败: {str(e)}")
-                continue
+            modify_files.extend(self.get_commit_change_files(repo, ref['commit_sha']))
         
         return modify_files
 
+    @instrumented
+    def _get_pr_files(self, pr):
+        """
+        获取PR的文件列表，第一页满时并发获取后续页
+        :param pr: PullRequest对象
+        :return: 文件对象列表
+        """
+        files = pr.get_files()
+        per_page = self.g.per_page
+        first_page = files.get_page(0)
+        if len(first_page) < per_page:
+            return first_page
+        
+        # GitHub最多返回3000个文件
+        max_page = 3000 // per_page
+        max_workers = collection_config.get("max_workers", 8)
+        all_files = list(first_page)
+        page = 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while page < max_page:
+                batch = range(page, min(page + max_workers, max_page))
+                pages = list(executor.map(files.get_page, batch))
+                for page_files in pages:
+                    all_files.extend(page_files)
+                if any(len(page_files) < per_page for page_files in pages):
+                    break
+                page += len(batch)
+        return all_files
+    
+    @instrumented
     def get_pr_change_files(self, repo, pr):
         """
         获取Pull Request关联的提交中修改的文件
@@ -545,8 +1021,16 @@ class GitHubAPI:
         :param pr: Pull Request对象
         :return: 修改文件列表
         """
-        # 获取pr关联的commit引用
-        files = repo.get_pull(pr.number).get_files()
+        git_mirror = self._get_git_mirror(repo)
+        if git_mirror:
+            # 通过本地镜像获取修改文件
+            return [
+                file for file in git_mirror.get_pr_files(pr.number, pr.base.sha)
+                if file["file_path"].endswith(tuple(CONFIG["source_code_extensions"]))
+            ]
+        
+        # 直接使用已获取的PR对象，不再重复请求
+        files = self._get_pr_files(pr)
         modify_files = []
         for file in files:
             ## 只记录代码文件
@@ -6,13 +6,17 @@ GitHub API测试文件
 """
 
 import unittest
+from unittest import mock
+from datetime import timedelta
 import sys
 import os
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from src.api.github_api import GitHubAPI
+from src.api import github_api as github_api_module
+from src.api.github_api import GitHubAPI, _format_search_time
+from src.api.mock_github_server import start_mock_server, RateLimiter
 
 from src.utils.utils import load_config
 CONFIG = load_config()
@@ -267,6 +271,54 @@ class TestGitHubAPI(unittest.TestCase):
         
 
 
+class TestSearchPartition(unittest.TestCase):
+    """
+    按合并时间分段搜索PR的测试，使用本地模拟服务(src/api/mock_github_server.py)
+    """
+    
+    @classmethod
+    def setUpClass(cls):
+        """
+        启动模拟服务，全部为PR，已合并的PR超过搜索的1000条上限
+        """
+        cls.server = start_mock_server(items=2600, pr_ratio=1.0, rate_limiter=RateLimiter(search_limit=1000))
+        cls.patches = [
+            mock.patch.dict(github_api_module.collection_config,
+                            {"api_base_url": cls.server.base_url, "seconds_between_requests": 0}),
+            mock.patch.dict(github_api_module.limits, {"max_pull_requests": 100000})
+        ]
+        for patch in cls.patches:
+            patch.start()
+        cls.github_api = GitHubAPI("mock-token", debug=False)
+    
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.patches:
+            patch.stop()
+        cls.server.shutdown()
+    
+    def test_merged_before_since_updated_after(self):
+        """
+        水位线之前合并、之后更新(如合并后有新评论)的PR不能因为合并时间分段而丢失
+        """
+        mock_repo = self.server.get_repository("octo", "windows")
+        merged = mock_repo.filter_numbers("pr", "merged")
+        # 水位线之后仍有超过1000个已合并PR，才会按合并时间分段
+        since = mock_repo.updated_at(merged[100])
+        late = merged[10]
+        mock_repo.touch([late], since + timedelta(days=1))
+        self.assertLess(mock_repo.merged_at(late), since)
+        
+        repo = self.github_api.get_repo("octo", "windows")
+        query = f"repo:{repo.full_name} is:pr is:merged updated:>={_format_search_time(since)} sort:updated-asc"
+        total = self.github_api._search_total_count(query)
+        numbers = [pr.number for pr in self.github_api._search_pull_requests(repo, query, total, since)]
+        expected = [n for n in merged if mock_repo.updated[n] >= since.timestamp()]
+        self.assertGreater(len(expected), 1000)
+        self.assertIn(late, numbers)
+        self.assertEqual(sorted(numbers), sorted(expected))
+
+
 if __name__ == '__main__':
     """
     运行测试
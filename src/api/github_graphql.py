@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GitHub GraphQL访问层，批量获取Issues及其时间线中引用的commit
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import time
+import requests
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.utils import load_config
+from src.api.http_archive import mount_http_archive
+from src.api.token_pool import get_rate_limit_wait
+from src.utils.checkpoint import CheckpointLog
+
+CONFIG = load_config()
+
+# 时间线中可能携带commit的事件类型，与REST issue events中带commit_id的事件对应
+TIMELINE_FRAGMENT = """
+    pageInfo { hasNextPage endCursor }
+    nodes {
+        __typename
+        ... on ReferencedEvent {
+            id
+            createdAt
+            commit { oid repository { nameWithOwner } }
+        }
+        ... on ClosedEvent {
+            id
+            createdAt
+            closer { __typename ... on Commit { oid repository { nameWithOwner } } }
+        }
+    }
+"""
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $pageSize: Int!, $cursor: String, $labels: [String!], $states: [IssueState!],
+      $since: DateTime, $orderBy: IssueOrder) {
+    repository(owner: $owner, name: $name) {
+        issues(first: $pageSize, after: $cursor, labels: $labels, states: $states,
+               filterBy: {since: $since}, orderBy: $orderBy) {
+            pageInfo { hasNextPage endCursor }
+            nodes {
+                databaseId
+                number
+                title
+                body
+                state
+                createdAt
+                updatedAt
+                author { login }
+                assignees(first: 1) { nodes { login } }
+                labels(first: 50) { nodes { name } }
+                timelineItems(first: 100, itemTypes: [REFERENCED_EVENT, CLOSED_EVENT]) {
+                    %s
+                }
+            }
+        }
+    }
+}
+""" % TIMELINE_FRAGMENT
+
+TIMELINE_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {
+    repository(owner: $owner, name: $name) {
+        issue(number: $number) {
+            timelineItems(first: 100, after: $cursor, itemTypes: [REFERENCED_EVENT, CLOSED_EVENT]) {
+                %s
+            }
+        }
+    }
+}
+""" % TIMELINE_FRAGMENT
+
+EVENT_TYPES = {
+    "ReferencedEvent": "referenced",
+    "ClosedEvent": "closed"
+}
+
+
+def get_graphql_url(api_base_url):
+    """
+    由REST接口地址得到GraphQL接口地址
+    github.com和模拟服务为 {base}/graphql，GitHub Enterprise的REST地址为 https://host/api/v3，GraphQL为 https://host/api/graphql
+    :param api_base_url: collection.api_base_url
+    """
+    base_url = api_base_url.rstrip("/")
+    if base_url.endswith("/api/v3"):
+        return base_url[:-len("/v3")] + "/graphql"
+    return base_url + "/graphql"
+
+
+def _parse_datetime(value):
+    """
+    将GraphQL返回的ISO时间字符串转换为datetime，与PyGithub返回的类型保持一致
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class GitHubGraphQL:
+    """
+    基于GraphQL的批量采集类，一次请求获取一批Issues及其引用的commit
+    GraphQL不提供commit的文件列表和patch，修改文件仍通过GitHubAPI按commit获取，
+    但同一批次中重复引用的commit只请求一次
+    """
+
+    def __init__(self, access_token=CONFIG["token"], page_size=None, max_workers=None, token_pool=None,
+                 telemetry=None):
+        """
+        初始化GitHubGraphQL实例
+        :param access_token: GitHub个人访问令牌
+        :param page_size: 每次请求获取的Issue数量(GitHub上限为100)
+        :param max_workers: 并发获取commit修改文件的线程数
+        :param token_pool: TokenPool实例，提供时每次请求选择graphql配额最多的令牌
+        :param telemetry: Telemetry实例，提供时GraphQL请求计入运行统计
+        """
+        collection_config = CONFIG.get("collection", {})
+        self.page_size = min(page_size or collection_config.get("graphql_page_size", 50), 100)
+        self.max_workers = max_workers or collection_config.get("max_workers", 8)
+        self.max_retries = 3
+        # 实例化时读取配置，GitHub Enterprise的GraphQL接口不在REST地址之下
+        self.graphql_url = get_graphql_url(collection_config.get("api_base_url", "https://api.github.com"))
+        self.token_pool = token_pool
+        self.telemetry = telemetry
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"bearer {access_token}",
+            "Accept": "application/vnd.github+json"
+        })
+        mount_http_archive(self.session)
+
+    def _query(self, query, variables):
+        """
+        执行一次GraphQL查询
+        速率限制时等待配额重置(有令牌池时换用其他令牌)，不计入重试次数；服务器错误和网络错误最多重试max_retries次；
+        其他GraphQL错误(如NOT_FOUND)不重试，已返回部分数据时使用这些数据
+        :param query: 查询语句
+        :param variables: 查询变量
+        :return: 响应中的data字段
+        """
+        retry_count = 0
+        while True:
+            token = None
+            headers = {}
+            if self.token_pool:
+                token = self.token_pool.acquire("graphql")
+                headers["Authorization"] = f"bearer {token}"
+            try:
+                start = time.perf_counter()
+                response = self.session.post(self.graphql_url, json={"query": query, "variables": variables},
+                                             headers=headers, timeout=50)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retry_count = self._wait_before_retry(retry_count, e)
+                continue
+            if self.telemetry:
+                self.telemetry.record_request(self.graphql_url, response.status_code, time.perf_counter() - start,
+                                              len(response.content), response.headers)
+            response_headers = {k.lower(): v for k, v in response.headers.items()}
+            if token:
+                self.token_pool.update(token, response_headers)
+
+            result = None
+            wait_seconds = get_rate_limit_wait(response.status_code, response_headers, response.text)
+            if wait_seconds is None and response.status_code == 200:
+                result = response.json()
+                if any(error.get("type") == "RATE_LIMITED" for error in result.get("errors") or []):
+                    # GraphQL的主速率限制返回HTTP 200且没有Retry-After，等待到X-RateLimit-Reset
+                    reset = float(response_headers.get("x-ratelimit-reset", time.time() + 60))
+                    wait_seconds = max(reset - time.time(), 1)
+            if wait_seconds is not None:
+                if token:
+                    # 暂停该令牌，下次请求换用其他令牌
+                    self.token_pool.block(token, "graphql", wait_seconds)
+                else:
+                    print(f"GraphQL触发速率限制，{int(wait_seconds)}秒后重试...")
+                    time.sleep(wait_seconds)
+                continue
+
+            if response.status_code >= 500:
+                retry_count = self._wait_before_retry(
+                    retry_count, RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}"))
+                continue
+            response.raise_for_status()
+            errors = result.get("errors")
+            if errors:
+                data = result.get("data")
+                if not data or not any(data.values()):
+                    raise RuntimeError(f"GraphQL错误: {errors}")
+                print(f"GraphQL返回部分错误，使用已返回的数据: {errors}")
+            return result["data"]
+
+    def _wait_before_retry(self, retry_count, error):
+        """
+        服务器错误或网络错误后按指数退避等待，超过重试次数时抛出异常
+        :return: 新的重试次数
+        """
+        retry_count += 1
+        if retry_count >= self.max_retries:
+            raise error
+        wait_seconds = 2 ** retry_count
+        print(f"GraphQL请求失败: {str(error)}，{wait_seconds}秒后重试...")
+        time.sleep(wait_seconds)
+        return retry_count
+
+    def _commit_refs_from_timeline(self, nodes, full_name, issue_title):
+        """
+        从时间线节点中提取属于本仓库的commit引用，结构与GitHubAPI.get_issue_commit_refs一致
+        """
+        commit_refs = []
+        for node in nodes:
+            if not node:
+                continue
+            if node["__typename"] == "ReferencedEvent":
+                commit = node.get("commit")
+            else:
+                commit = node.get("closer")
+                if commit and commit.get("__typename") != "Commit":
+                    commit = None
+            if not commit or not commit.get("oid"):
+                continue
+            # 只保留本仓库的commit，代替逐个调用is_commit_in_repo
+            repository = commit.get("repository") or {}
+            if repository.get("nameWithOwner", "").lower() != full_name.lower():
+                continue
+            commit_refs.append({
+                "event_id": node["id"],
+                "event_type": EVENT_TYPES[node["__typename"]],
+                "commit_sha": commit["oid"],
+                "message": f"Commit referenced in issue: {issue_title}",
+                "commit_url": f"https://api.github.com/repos/{full_name}/commits/{commit['oid']}",
+                "created_at": node.get("createdAt")
+            })
+        return commit_refs
+
+    def _fetch_remaining_timeline(self, owner, name, number, cursor):
+        """
+        时间线事件超过一页时，继续分页获取剩余节点
+        """
+        nodes = []
+        while cursor:
+            data = self._query(TIMELINE_QUERY, {"owner": owner, "name": name, "number": number, "cursor": cursor})
+            issue = (data.get("repository") or {}).get("issue")
+            if issue is None:
+                # Issue在分页期间被删除或转移
+                break
+            timeline = issue["timelineItems"]
+            nodes.extend(timeline["nodes"])
+            cursor = timeline["pageInfo"]["endCursor"] if timeline["pageInfo"]["hasNextPage"] else None
+        return nodes
+
+    def get_issues_with_commit_refs(self, owner, name, state="all", labels=[], max_issues=None, since=None):
+        """
+        分页获取Issues及其引用的commit
+        :param owner: 仓库所有者
+        :param name: 仓库名称
+        :param state: Issues状态 (open, closed, all)
+        :param labels: 标签列表，Issue需包含全部标签
+        :param max_issues: 最多获取的Issue数量
+        :param since: 只获取在该时间之后更新的Issues，用于增量采集
+        :return: Issue数据列表，每项额外包含commit_refs字段
+        """
+        full_name = f"{owner}/{name}"
+        states = None if state == "all" else [state.upper()]
+        # 增量采集按更新时间升序，与REST采集保持一致
+        if since:
+            order_by = {"field": "UPDATED_AT", "direction": "ASC"}
+        else:
+            order_by = {"field": "CREATED_AT", "direction": "DESC"}
+        if max_issues is None:
+            max_issues = CONFIG["limits"]["max_issues"]
+
+        issues_list = []
+        cursor = None
+        while len(issues_list) < max_issues:
+            variables = {
+                "owner": owner,
+                "name": name,
+                "pageSize": self.page_size,
+                "cursor": cursor,
+                "labels": labels or None,
+                "states": states,
+                "since": since.isoformat() if since else None,
+                "orderBy": order_by
+            }
+            data = self._query(ISSUES_QUERY, variables)
+            issues = data["repository"]["issues"]
+
+            for node in issues["nodes"]:
+                if len(issues_list) >= max_issues:
+                    break
+                issue_labels = [label["name"] for label in node["labels"]["nodes"]]
+                # GraphQL的labels过滤是"任一匹配"，REST是"全部匹配"，这里补齐过滤
+                if labels and not all(label in issue_labels for label in labels):
+                    continue
+
+                timeline = node["timelineItems"]
+                timeline_nodes = list(timeline["nodes"])
+                if timeline["pageInfo"]["hasNextPage"]:
+                    timeline_nodes.extend(self._fetch_remaining_timeline(
+                        owner, name, node["number"], timeline["pageInfo"]["endCursor"]))
+
+                assignees = node["assignees"]["nodes"]
+                issues_list.append({
+                    "id": node["databaseId"],
+                    "number": node["number"],
+                    "title": node["title"] or "",
+                    "body": node["body"] or "",
+                    "state": node["state"].lower(),
+                    "events_url": f"https://api.github.com/repos/{full_name}/issues/{node['number']}/events",
+                    "created_at": _parse_datetime(node["createdAt"]),
+                    "updated_at": _parse_datetime(node["updatedAt"]),
+                    "labels": issue_labels,
+                    "user": node["author"]["login"] if node["author"] else "",
+                    "assignee": assignees[0]["login"] if assignees else None,
+                    "commit_refs": self._commit_refs_from_timeline(timeline_nodes, full_name, node["title"])
+                })
+                print(f"当前获取到第 {len(issues_list)} 个Issue: {node['title']}")
+
+            if not issues["pageInfo"]["hasNextPage"]:
+                break
+            cursor = issues["pageInfo"]["endCursor"]
+
+        return issues_list
+
+    def collect_issues(self, owner, name, github_api, repo, state="all", labels=[], max_issues=None, since=None,
+                       checkpoint=None):
+        """
+        批量采集Issues及其修改文件，返回结构与DataExtractor.extract_issues一致
+        :param owner: 仓库所有者
+        :param name: 仓库名称
+        :param github_api: GitHubAPI实例，用于获取commit的修改文件
+        :param repo: 仓库对象
+        :param state: Issues状态 (open, closed, all)
+        :param labels: 标签列表
+        :param max_issues: 最多获取的Issue数量
+        :param since: 只获取在该时间之后更新的Issues
+        :param checkpoint: CheckpointLog实例，可选；已完成的Issue不再获取修改文件，每完成一个Issue立即写入
+        :return: Issues列表
+        """
+        issues_list = self.get_issues_with_commit_refs(owner, name, state, labels, max_issues, since)
+
+        done = {}
+        if checkpoint is not None:
+            for issue in issues_list:
+                record = checkpoint.get(CheckpointLog.make_key(issue["number"], issue["updated_at"]))
+                if record is not None:
+                    done[issue["number"]] = record
+            if done:
+                print(f"检查点中已有 {len(done)}/{len(issues_list)} 条记录，跳过")
+        pending = [issue for issue in issues_list if issue["number"] not in done]
+
+        commit_count = len({ref["commit_sha"] for issue in pending for ref in issue["commit_refs"]})
+        print(f"共引用 {commit_count} 个不同的commit，开始获取修改文件...")
+
+        def add_change_files(issue):
+            # 多个Issue引用同一commit时，GitHubAPI的commit缓存和按commit加锁保证只请求一次
+            commit_refs = issue.pop("commit_refs")
+            issue["change_files"] = [
+                file for ref in commit_refs for file in github_api.get_commit_change_files(repo, ref["commit_sha"])
+            ]
+            if checkpoint is not None:
+                checkpoint.append(CheckpointLog.make_key(issue["number"], issue["updated_at"]), issue)
+            return issue
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            completed = {issue["number"]: issue for issue in executor.map(add_change_files, pending)}
+        return [done.get(issue["number"]) or completed[issue["number"]] for issue in issues_list]
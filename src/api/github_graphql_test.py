@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GitHub GraphQL访问层测试文件，不访问GitHub
+"""
+
+import unittest
+from unittest import mock
+import json
+import time
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import requests
+from src.api import github_graphql as github_graphql_module
+from src.api.github_graphql import GitHubGraphQL, get_graphql_url, ISSUES_QUERY
+from src.api.mock_github_server import start_mock_server, RateLimiter
+
+
+def make_response(status, body, headers=None):
+    """
+    构造requests.Response
+    """
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode("utf-8")
+    response.headers.update(headers or {})
+    return response
+
+
+class StubSession:
+    """
+    按顺序返回预设响应的会话
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.headers = {}
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class TestGraphQLQuery(unittest.TestCase):
+    """
+    GitHubGraphQL._query的重试和错误处理测试
+    """
+
+    def setUp(self):
+        self.client = GitHubGraphQL("test-token")
+        self.sleeps = []
+        patch = mock.patch.object(github_graphql_module.time, "sleep", self.sleeps.append)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_graphql_url(self):
+        """
+        GitHub Enterprise的GraphQL接口为 /api/graphql 而不是 /api/v3/graphql
+        """
+        self.assertEqual(get_graphql_url("https://api.github.com"), "https://api.github.com/graphql")
+        self.assertEqual(get_graphql_url("https://ghe.example.com/api/v3/"), "https://ghe.example.com/api/graphql")
+        self.assertEqual(get_graphql_url("http://127.0.0.1:8765"), "http://127.0.0.1:8765/graphql")
+
+    def test_rate_limited_waits_for_reset(self):
+        """
+        RATE_LIMITED以HTTP 200返回，等待到X-RateLimit-Reset后重试，次数超过max_retries也不放弃
+        """
+        reset = str(int(time.time()) + 30)
+        limited = {"data": None, "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}
+        self.client.session = StubSession(
+            [make_response(200, limited, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+             for _ in range(self.client.max_retries + 1)]
+            + [make_response(200, {"data": {"viewer": {"login": "octocat"}}})]
+        )
+        data = self.client._query("query { viewer { login } }", {})
+        self.assertEqual(data, {"viewer": {"login": "octocat"}})
+        self.assertEqual(len(self.sleeps), self.client.max_retries + 1)
+        self.assertTrue(all(25 <= seconds <= 31 for seconds in self.sleeps))
+
+    def test_partial_errors_return_data(self):
+        """
+        部分字段NOT_FOUND时返回已有的数据，不重试
+        """
+        body = {"data": {"repository": {"issue": None, "name": "demo"}},
+                "errors": [{"type": "NOT_FOUND", "path": ["repository", "issue"], "message": "Could not resolve"}]}
+        self.client.session = StubSession([make_response(200, body)])
+        data = self.client._query("query {}", {})
+        self.assertEqual(data, body["data"])
+        self.assertEqual(self.client.session.calls, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_non_transient_error_not_retried(self):
+        """
+        没有任何数据的GraphQL错误直接抛出，不重试
+        """
+        body = {"data": {"repository": None},
+                "errors": [{"type": "NOT_FOUND", "path": ["repository"], "message": "Could not resolve"}]}
+        self.client.session = StubSession([make_response(200, body)])
+        with self.assertRaises(RuntimeError):
+            self.client._query("query {}", {})
+        self.assertEqual(self.client.session.calls, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_server_error_retried(self):
+        """
+        服务器错误按指数退避重试，超过max_retries后抛出
+        """
+        self.client.session = StubSession([make_response(502, {}), make_response(200, {"data": {"ok": True}})])
+        self.assertEqual(self.client._query("query {}", {}), {"ok": True})
+        self.assertEqual(self.sleeps, [2])
+
+        self.client.session = StubSession([make_response(503, {}) for _ in range(self.client.max_retries)])
+        with self.assertRaises(RuntimeError):
+            self.client._query("query {}", {})
+        self.assertEqual(self.client.session.calls, self.client.max_retries)
+
+
+class TestGraphQLMockServer(unittest.TestCase):
+    """
+    使用本地模拟服务(src/api/mock_github_server.py)测试GraphQL速率限制
+    """
+
+    def test_rate_limited_against_mock_server(self):
+        """
+        配额用完后等待重置，而不是中止采集
+        """
+        rate_limiter = RateLimiter(graphql_limit=1)
+        # 缩短配额窗口，测试中只需等待约1秒
+        rate_limiter.WINDOWS = {**RateLimiter.WINDOWS, "graphql": 1}
+        server = start_mock_server(items=50, rate_limiter=rate_limiter)
+        self.addCleanup(server.shutdown)
+        with mock.patch.dict(github_graphql_module.CONFIG, {"collection": {"api_base_url": server.base_url}}):
+            client = GitHubGraphQL("mock-token")
+        variables = {"owner": "octo", "name": "graphql", "pageSize": 10, "cursor": None, "labels": None,
+                     "states": None, "since": None, "orderBy": {"field": "CREATED_AT", "direction": "DESC"}}
+        for _ in range(3):
+            data = client._query(ISSUES_QUERY, variables)
+            self.assertIsNotNone(data["repository"]["issues"])
+
+
+if __name__ == '__main__':
+    """
+    运行测试
+    """
+    unittest.main()
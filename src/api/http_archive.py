@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP交互的录制与回放
+录制时把一次采集中所有REST和GraphQL请求及响应写入gzip压缩的JSONL归档，
+回放时由归档直接返回响应，可配置延迟和速率限制，用于离线、可重复地评估采集吞吐量
+"""
+import os
+import json
+import gzip
+import time
+import atexit
+import base64
+import hashlib
+import threading
+from functools import partial
+from collections import defaultdict
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from github.Requester import Requester
+from src.api.token_pool import (PooledConnectionMixin, PooledHTTPConnection, PooledHTTPSConnection,
+                                get_rate_limit_resource)
+
+
+def _request_key(method, url, body):
+    """
+    请求的归档键：方法、完整URL和请求体摘要(GraphQL请求的查询和变量都在请求体中)
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha1(body).hexdigest() if body else ""
+    return f"{method} {url} {digest}"
+
+
+def _encode_body(content):
+    """
+    响应体优先按UTF-8文本保存，二进制内容(如压缩包)用base64保存
+    """
+    try:
+        return content.decode("utf-8"), False
+    except UnicodeDecodeError:
+        return base64.b64encode(content).decode("ascii"), True
+
+
+class ArchiveRecorder:
+    """
+    把HTTP交互逐条追加写入gzip压缩的JSONL归档
+    """
+
+    def __init__(self, path):
+        """
+        初始化ArchiveRecorder实例
+        :param path: 归档文件路径(.jsonl.gz)
+        """
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def record(self, request, response, elapsed):
+        """
+        记录一次请求和响应
+        :param request: requests的PreparedRequest
+        :param response: requests的Response
+        :param elapsed: 请求耗时(秒)
+        """
+        body, is_base64 = _encode_body(response.content)
+        entry = {
+            "key": _request_key(request.method, request.url, request.body),
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "body": body,
+            "base64": is_base64,
+            "elapsed": round(elapsed, 4)
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self.count += 1
+
+    def close(self):
+        """
+        关闭归档文件
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                print(f"已录制 {self.count} 次HTTP交互到: {self.path}")
+
+
+class ReplayArchive:
+    """
+    从归档中回放HTTP响应
+    同一请求被录制多次时按录制顺序依次返回，用完后重复返回最后一次响应
+    """
+
+    def __init__(self, path, latency=0.0, latency_scale=0.0, rate_limit=None, rate_limit_window=3600):
+        """
+        初始化ReplayArchive实例
+        :param path: 归档文件路径
+        :param latency: 每个响应固定增加的延迟(秒)
+        :param latency_scale: 按录制时的耗时乘以该系数增加延迟，1.0为原速回放，0为不模拟
+        :param rate_limit: 每个令牌、每类资源在一个窗口内的配额，为None时使用录制的响应头
+        :param rate_limit_window: 配额重置周期(秒)
+        """
+        self.path = path
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.stats = {"served": 0, "missing": 0, "rate_limited": 0}
+        self._entries = defaultdict(list)
+        self._positions = defaultdict(int)
+        self._quota = {}
+        self._lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+        print(f"已加载归档: {path}，共 {sum(len(v) for v in self._entries.values())} 次HTTP交互")
+
+    def _next_entry(self, key):
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["missing"] += 1
+                return None
+            position = self._positions[key]
+            self._positions[key] = min(position + 1, len(entries) - 1)
+            self.stats["served"] += 1
+            return entries[position]
+
+    def _apply_rate_limit(self, request, headers):
+        """
+        按令牌和资源类别模拟配额，覆盖录制的速率限制响应头
+        :return: 配额耗尽时返回True
+        """
+        resource = get_rate_limit_resource(request.url)
+        token = request.headers.get("Authorization", "")
+        now = time.time()
+        with self._lock:
+            quota = self._quota.get((token, resource))
+            if quota is None or quota["reset"] <= now:
+                quota = {"remaining": self.rate_limit, "reset": int(now + self.rate_limit_window)}
+                self._quota[(token, resource)] = quota
+            exhausted = quota["remaining"] <= 0
+            if not exhausted:
+                quota["remaining"] -= 1
+            else:
+                self.stats["rate_limited"] += 1
+            headers["X-RateLimit-Limit"] = str(self.rate_limit)
+            headers["X-RateLimit-Remaining"] = str(quota["remaining"])
+            headers["X-RateLimit-Reset"] = str(quota["reset"])
+            headers["X-RateLimit-Resource"] = resource
+        return exhausted
+
+    def build_response(self, request):
+        """
+        为请求构造回放响应
+        :param request: requests的PreparedRequest
+        :return: requests的Response
+        """
+        entry = self._next_entry(_request_key(request.method, request.url, request.body))
+        if entry is None:
+            status, headers, content, elapsed = 404, {"Content-Type": "application/json"}, \
+                json.dumps({"message": "Not Found in archive"}).encode("utf-8"), 0
+        else:
+            status, headers, elapsed = entry["status"], dict(entry["headers"]), entry["elapsed"]
+            content = base64.b64decode(entry["body"]) if entry["base64"] else entry["body"].encode("utf-8")
+        headers = CaseInsensitiveDict(headers)
+        # 录制的是解压后的响应体
+        headers.pop("Content-Encoding", None)
+        headers.pop("Content-Length", None)
+        if self.rate_limit is not None and self._apply_rate_limit(request, headers):
+            status = 403
+            content = json.dumps({"message": "API rate limit exceeded"}).encode("utf-8")
+
+        delay = self.latency + elapsed * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = headers
+        response._content = content
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    正常发送请求，同时把交互写入归档
+    """
+
+    def __init__(self, recorder, *args, **kwargs):
+        self.recorder = recorder
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        start = time.time()
+        response = super().send(request, **kwargs)
+        self.recorder.record(request, response, time.time() - start)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    不发起网络请求，由归档返回响应
+    """
+
+    def __init__(self, archive, *args, **kwargs):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        return self.archive.build_response(request)
+
+    def close(self):
+        pass
+
+
+def install_http_archive(mode, path, latency=0.0, latency_scale=0.0, rate_limit=None):
+    """
+    让进程内所有PyGithub客户端通过录制或回放适配器发起请求，需在install_token_pool之前调用
+    :param mode: record 或 replay
+    :param path: 归档文件路径
+    :param latency: 回放时每个响应固定增加的延迟(秒)
+    :param latency_scale: 回放时按录制耗时乘以该系数增加延迟
+    :param rate_limit: 回放时模拟的配额，为None时使用录制的响应头
+    :return: ArchiveRecorder或ReplayArchive实例
+    """
+    if mode == "record":
+        archive = ArchiveRecorder(path)
+        atexit.register(archive.close)
+        PooledConnectionMixin.adapter_factory = partial(RecordingAdapter, archive)
+    elif mode == "replay":
+        archive = ReplayArchive(path, latency, latency_scale, rate_limit)
+        PooledConnectionMixin.adapter_factory = partial(ReplayAdapter, archive)
+    else:
+        raise ValueError(f"不支持的归档模式: {mode}")
+    Requester.injectConnectionClasses(PooledHTTPConnection, PooledHTTPSConnection)
+    return archive
+
+
+def mount_http_archive(session):
+    """
+    让独立的requests session(如GraphQL客户端)也使用已安装的录制或回放适配器
+    :param session: requests.Session
+    """
+    if PooledConnectionMixin.adapter_factory is not HTTPAdapter:
+        session.mount("https://", PooledConnectionMixin.adapter_factory())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GitHub客户端的HTTP缓存，保存ETag和Last-Modified并发送条件请求
+GitHub对带认证的条件请求返回304时不消耗速率限制配额
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from requests.structures import CaseInsensitiveDict
+from github.Requester import Requester
+from src.api.token_pool import PooledHTTPConnection, PooledHTTPSConnection
+
+# 按URL路径匹配的缓存策略，先匹配先生效；值为缓存有效期(秒)，
+# 有效期内直接使用缓存，过期后发送条件请求重新验证，为None时不缓存
+DEFAULT_TTL_POLICIES = {
+    # 速率限制查询必须每次请求
+    r"^/rate_limit": None,
+    # 按SHA获取的commit内容不可变
+    r"^/repos/[^/]+/[^/]+/commits/[0-9a-f]{40}$": 30 * 24 * 3600,
+    # 搜索结果变化频繁，每次重新验证
+    r"^/search/": 0,
+}
+
+# 这些响应头描述的是请求当时的配额，不能随缓存内容返回
+_VOLATILE_HEADERS = ("x-ratelimit-", "retry-after", "date")
+
+
+class CachedResponse:
+    """
+    由缓存内容构造的响应，接口与PyGithub的RequestsResponse一致
+    """
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self.body
+
+    def iter_content(self, chunk_size=1):
+        data = self.body.encode("utf-8")
+        step = chunk_size or len(data) or 1
+        for i in range(0, len(data), step):
+            yield data[i:i + step]
+
+    def raise_for_status(self):
+        pass
+
+
+class HttpCache:
+    """
+    条件请求缓存，响应保存在SQLite中
+    总大小超过上限时按最近访问时间淘汰，并统计命中、未命中和重新验证次数
+    """
+
+    def __init__(self, db_path="cache/http_cache.sqlite", max_size_mb=1024, ttl_policies=None, default_ttl=0):
+        """
+        初始化HttpCache实例
+        :param db_path: SQLite文件路径
+        :param max_size_mb: 缓存响应体的总大小上限(MB)
+        :param ttl_policies: URL路径正则 -> 缓存有效期(秒)，优先于默认策略
+        :param default_ttl: 未匹配任何策略时的缓存有效期(秒)，0表示每次都重新验证
+        """
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.default_ttl = default_ttl
+        policies = dict(ttl_policies or {})
+        for pattern, ttl in DEFAULT_TTL_POLICIES.items():
+            policies.setdefault(pattern, ttl)
+        self.policies = [(re.compile(pattern), ttl) for pattern, ttl in policies.items()]
+        self.stats = {
+            "hits": 0,            # 有效期内直接使用缓存
+            "misses": 0,          # 没有缓存，完整请求
+            "revalidated": 0,     # 条件请求返回304，使用缓存
+            "updated": 0,         # 条件请求返回新内容，更新缓存
+            "bypassed": 0,        # 不缓存的请求
+            "evicted": 0,         # 超出大小上限被淘汰
+            "bytes_from_cache": 0
+        }
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, headers TEXT NOT NULL, "
+            "body TEXT NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)")
+        self._db.commit()
+        self._total_size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        # 上限调小后启动时先淘汰
+        with self._lock:
+            self._evict()
+            self._db.commit()
+
+    def get_ttl(self, path):
+        """
+        获取URL路径对应的缓存有效期
+        :param path: 请求路径(不含查询参数)
+        :return: 有效期(秒)，None表示不缓存
+        """
+        for pattern, ttl in self.policies:
+            if pattern.search(path):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, key):
+        """
+        查找缓存的响应
+        :return: 缓存记录字典，未缓存时返回None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "headers": json.loads(row[2]),
+                "body": row[3], "stored_at": row[4]}
+
+    def touch(self, key, stored_at=None, etag=None):
+        """
+        更新访问时间，重新验证成功时同时刷新保存时间
+        """
+        now = time.time()
+        with self._lock:
+            if stored_at is None:
+                self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            else:
+                self._db.execute(
+                    "UPDATE responses SET last_access = ?, stored_at = ?, etag = COALESCE(?, etag) WHERE key = ?",
+                    (now, stored_at, etag, key)
+                )
+            self._db.commit()
+
+    def store(self, key, headers, body):
+        """
+        保存响应，只保存带有验证信息或允许缓存的响应
+        :param key: 缓存键
+        :param headers: 响应头
+        :param body: 响应体文本
+        """
+        stable_headers = {k: v for k, v in headers.items() if not k.lower().startswith(_VOLATILE_HEADERS)}
+        size = len(body.encode("utf-8"))
+        if size > self.max_size:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, headers, body, size, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, headers.get("ETag"), headers.get("Last-Modified"), json.dumps(stable_headers),
+                 body, size, now, now)
+            )
+            self._total_size += size - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """
+        总大小超过上限时淘汰最久未访问的响应，淘汰到上限的90%以减少频繁淘汰
+        调用方需持有锁
+        """
+        if self._total_size <= self.max_size:
+            return
+        target = self.max_size * 0.9
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if self._total_size <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total_size -= size
+            self.stats["evicted"] += 1
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def summary(self):
+        """
+        返回缓存统计信息
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size_mb"] = round(self._total_size / 1024 / 1024, 2)
+        requests_saved = stats["hits"] + stats["revalidated"]
+        total = requests_saved + stats["misses"] + stats["updated"]
+        stats["hit_rate"] = round(requests_saved / total, 4) if total else 0.0
+        return stats
+
+    def close(self):
+        """
+        关闭SQLite连接
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class CachingConnectionMixin:
+    """
+    在令牌池连接类之上增加条件请求缓存
+    """
+
+    # 由install_http_cache设置，同一进程内共享
+    http_cache = None
+
+    def getresponse(self):
+        cache = self.http_cache
+        if cache is None or self.verb != "GET" or self.stream:
+            return super().getresponse()
+
+        path = self.url.split("?", 1)[0]
+        ttl = cache.get_ttl(path)
+        if ttl is None:
+            cache.count("bypassed")
+            return super().getresponse()
+
+        # 同一URL不同Accept返回的内容不同
+        key = f"{self.protocol}://{self.host}{self.url}|{self.headers.get('Accept', '')}"
+        entry = cache.lookup(key)
+        if entry is not None:
+            if time.time() - entry["stored_at"] < ttl:
+                cache.count("hits")
+                cache.count("bytes_from_cache", len(entry["body"]))
+                cache.touch(key)
+                return CachedResponse(200, CaseInsensitiveDict(entry["headers"]), entry["body"])
+            if entry["etag"]:
+                self.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                self.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().getresponse()
+        if response.status == 304 and entry is not None:
+            cache.count("revalidated")
+            cache.count("bytes_from_cache", len(entry["body"]))
+            cache.touch(key, stored_at=time.time(), etag=response.headers.get("ETag"))
+            # 使用本次响应的配额信息，PyGithub据此更新速率限制
+            headers = CaseInsensitiveDict(entry["headers"])
+            headers.update(response.headers)
+            return CachedResponse(200, headers, entry["body"])
+
+        cache.count("updated" if entry is not None else "misses")
+        if response.status == 200 and (ttl > 0 or "ETag" in response.headers or "Last-Modified" in response.headers):
+            cache.store(key, response.headers, response.read())
+        return response
+
+
+class CachingHTTPSConnection(CachingConnectionMixin, PooledHTTPSConnection):
+    pass
+
+
+class CachingHTTPConnection(CachingConnectionMixin, PooledHTTPConnection):
+    pass
+
+
+def install_http_cache(cache):
+    """
+    让进程内所有PyGithub客户端通过条件请求缓存发起请求，需在install_token_pool之后调用
+    :param cache: HttpCache实例
+    """
+    CachingConnectionMixin.http_cache = cache
+    Requester.injectConnectionClasses(CachingHTTPConnection, CachingHTTPSConnection)
@@ -0,0 +1,847 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地模拟GitHub REST/GraphQL服务，覆盖采集器用到的接口
+(仓库、Issues、issue事件、commit、PR、PR文件、搜索、contents和GraphQL Issues查询)
+数据按编号确定性生成，可模拟十万级Issue的仓库，并支持分页Link头、主/二次速率限制、
+条件请求和慢响应，用于在无网络的环境中对GitHubAPI和DataExtractor做压力测试
+
+用法: python src/api/mock_github_server.py --port 8765 --items 100000
+然后在config.json中设置 collection.api_base_url 为 http://127.0.0.1:8765
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode, unquote
+from src.api.token_pool import get_rate_limit_resource
+
+LABELS = ["bug", "enhancement", "feature", "documentation", "performance", "question", "dependencies"]
+SEARCH_RESULT_CAP = 1000
+
+
+def _sha(*parts):
+    return hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _format_time(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ") if value else None
+
+
+def _parse_time(value):
+    """
+    解析查询参数和搜索语句中的时间，支持日期和ISO时间
+    """
+    value = value.strip()
+    if len(value) == 10:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class MockRepository:
+    """
+    确定性生成的仓库数据，编号1..items依次创建，更新时间随编号单调递增，
+    因此按创建时间和按更新时间排序的结果一致，since过滤可用二分查找
+    关闭和合并时间与生成时的更新时间相同，touch可以推后更新时间而不改变关闭和合并时间
+    """
+
+    def __init__(self, owner, name, items=1000, pr_ratio=0.3, seed=0, interval=3600,
+                 start=datetime(2015, 1, 1, tzinfo=timezone.utc)):
+        """
+        初始化MockRepository实例
+        :param owner: 仓库所有者
+        :param name: 仓库名称
+        :param items: Issue和PR的总数
+        :param pr_ratio: PR所占比例
+        :param seed: 随机种子
+        :param interval: 相邻编号的创建时间间隔(秒)
+        :param start: 第一个Issue的创建时间
+        """
+        self.owner = owner
+        self.name = name
+        self.full_name = f"{owner}/{name}"
+        self.items = items
+        self.seed = seed
+        self.interval = interval
+        self.start = start
+        self.repo_id = int(_sha(seed, self.full_name)[:8], 16)
+        # 预先生成每个编号的元数据，便于列表过滤
+        self.is_pull = [False] * (items + 1)
+        self.state = ["open"] * (items + 1)
+        self.merged = [False] * (items + 1)
+        self.labels = [()] * (items + 1)
+        self.updated = [0.0] * (items + 1)
+        self.closed_time = [0.0] * (items + 1)
+        self.commit_counts = [0] * (items + 1)
+        base = start.timestamp()
+        for n in range(1, items + 1):
+            rng = random.Random(f"{seed}-{self.full_name}-{n}")
+            self.is_pull[n] = rng.random() < pr_ratio
+            if rng.random() < 0.8:
+                self.state[n] = "closed"
+                self.merged[n] = self.is_pull[n] and rng.random() < 0.7
+            self.labels[n] = tuple(sorted(rng.sample(LABELS, rng.randint(0, 2))))
+            self.updated[n] = base + n * interval + rng.randint(0, interval - 1)
+            self.closed_time[n] = self.updated[n]
+            if not self.is_pull[n] and self.state[n] == "closed":
+                self.commit_counts[n] = rng.randint(0, 3)
+        self._filter_cache = {}
+        self._touched = set()
+        self._events = None
+        self._lock = threading.Lock()
+
+    # ---------- 基础字段 ----------
+
+    def created_at(self, n):
+        return datetime.fromtimestamp(self.start.timestamp() + n * self.interval, tz=timezone.utc)
+
+    def updated_at(self, n):
+        return datetime.fromtimestamp(self.updated[n], tz=timezone.utc)
+
+    def closed_at(self, n):
+        return datetime.fromtimestamp(self.closed_time[n], tz=timezone.utc) if self.state[n] == "closed" else None
+
+    def merged_at(self, n):
+        return self.closed_at(n) if self.merged[n] else None
+
+    def touch(self, numbers, when):
+        """
+        模拟合并之后的评论、标签等修改：只推后更新时间，合并时间不变
+        :param numbers: 编号列表
+        :param when: 新的更新时间
+        """
+        with self._lock:
+            for n in numbers:
+                self.updated[n] = when.timestamp()
+                self._touched.add(n)
+
+    def commit_sha(self, n, i):
+        return _sha(self.seed, self.full_name, "commit", n, i)
+
+    def commit_exists(self, sha):
+        # 约1/16的被引用commit来自fork，不属于本仓库
+        return re.fullmatch(r"[0-9a-f]{40}", sha) is not None and not sha.endswith("0")
+
+    def filter_numbers(self, kind, state="all", labels=(), any_label=False, since=None):
+        """
+        按条件筛选编号，结果按编号升序，相同条件的结果会缓存
+        :param kind: issue、pr或all
+        :param state: open、closed、merged或all
+        :param labels: 标签
+        :param any_label: True表示包含任一标签即可(搜索和GraphQL)，否则需包含全部标签(REST)
+        :param since: 只保留在该时间戳之后更新的编号
+        """
+        key = (kind, state, tuple(labels), any_label)
+        with self._lock:
+            numbers = self._filter_cache.get(key)
+        if numbers is None:
+            numbers = []
+            for n in range(1, self.items + 1):
+                if kind == "issue" and self.is_pull[n] or kind == "pr" and not self.is_pull[n]:
+                    continue
+                if state == "merged" and not self.merged[n]:
+                    continue
+                if state in ("open", "closed") and self.state[n] != state:
+                    continue
+                if labels:
+                    matches = [label in self.labels[n] for label in labels]
+                    if not (any(matches) if any_label else all(matches)):
+                        continue
+                numbers.append(n)
+            with self._lock:
+                self._filter_cache[key] = numbers
+        if since is not None and self._touched:
+            # touch过的编号不再满足单调性，逐个比较
+            numbers = [n for n in numbers if self.updated[n] >= since]
+        elif since is not None:
+            # 更新时间随编号单调递增，二分查找第一个满足条件的位置
+            first = bisect_left(range(self.items + 1), since, key=lambda n: self.updated[n])
+            numbers = numbers[bisect_left(numbers, first):]
+        return numbers
+
+    # ---------- JSON对象 ----------
+
+    def user(self, login):
+        return {"login": login, "id": int(_sha(login)[:8], 16), "type": "User",
+                "url": f"{{base}}/users/{login}"}
+
+    def repo_json(self):
+        return {
+            "id": self.repo_id,
+            "name": self.name,
+            "full_name": self.full_name,
+            "owner": self.user(self.owner),
+            "private": False,
+            "default_branch": "main",
+            "url": f"{{base}}/repos/{self.full_name}",
+            "html_url": f"{{web}}/{self.full_name}",
+            "created_at": _format_time(self.start),
+            "updated_at": _format_time(self.updated_at(self.items)),
+            "open_issues_count": self.state.count("open") - 1
+        }
+
+    def issue_json(self, n):
+        rng = random.Random(f"{self.seed}-{self.full_name}-{n}-text")
+        kind = "pull" if self.is_pull[n] else "issues"
+        data = {
+            "id": self.repo_id * 1000000 + n,
+            "number": n,
+            "title": f"{'Implement' if self.is_pull[n] else 'Support'} feature {n} in module {rng.randint(0, 9)}",
+            "body": f"Synthetic description for #{n}. " * rng.randint(1, 20),
+            "state": self.state[n],
+            "locked": False,
+            "user": self.user(f"user{n % 97}"),
+            "assignee": self.user(f"dev{n % 13}") if n % 3 == 0 else None,
+            "assignees": [],
+            "labels": [{"name": label, "id": LABELS.index(label) + 1} for label in self.labels[n]],
+            "comments": rng.randint(0, 10),
+            "created_at": _format_time(self.created_at(n)),
+            "updated_at": _format_time(self.updated_at(n)),
+            "closed_at": _format_time(self.closed_at(n)) if self.state[n] == "closed" else None,
+            "url": f"{{base}}/repos/{self.full_name}/issues/{n}",
+            "html_url": f"{{web}}/{self.full_name}/{kind}/{n}",
+            "events_url": f"{{base}}/repos/{self.full_name}/issues/{n}/events",
+            "labels_url": f"{{base}}/repos/{self.full_name}/issues/{n}/labels{{/name}}",
+            "comments_url": f"{{base}}/repos/{self.full_name}/issues/{n}/comments",
+            "repository_url": f"{{base}}/repos/{self.full_name}"
+        }
+        if self.is_pull[n]:
+            data["pull_request"] = {
+                "url": f"{{base}}/repos/{self.full_name}/pulls/{n}",
+                "html_url": f"{{web}}/{self.full_name}/pull/{n}",
+                "merged_at": _format_time(self.merged_at(n)) if self.merged[n] else None
+            }
+        return data
+
+    def pull_json(self, n):
+        data = self.issue_json(n)
+        data.pop("pull_request")
+        data.update({
+            "url": f"{{base}}/repos/{self.full_name}/pulls/{n}",
+            "issue_url": f"{{base}}/repos/{self.full_name}/issues/{n}",
+            "merged_at": _format_time(self.merged_at(n)) if self.merged[n] else None,
+            "merge_commit_sha": _sha(self.seed, self.full_name, "merge", n),
+            "head": {"ref": f"feature/{n}", "sha": _sha(self.seed, self.full_name, "head", n),
+                     "label": f"{self.owner}:feature/{n}"},
+            "base": {"ref": "main", "sha": _sha(self.seed, self.full_name, "base", n),
+                     "label": f"{self.owner}:main"},
+            "draft": False
+        })
+        return data
+
+    def full_pull_json(self, n):
+        # 单个PR接口比列表多出merged、changed_files等字段
+        data = self.pull_json(n)
+        data.update({
+            "merged": self.merged[n],
+            "changed_files": len(self.pull_files(n)),
+            "commits": 1 + n % 5,
+            "additions": n % 300,
+            "deletions": n % 120
+        })
+        return data
+
+    def events(self, n):
+        """
+        Issue的时间线事件，关闭的Issue引用若干commit，部分关闭事件也带有commit
+        """
+        events = []
+        base = self.created_at(n)
+        for i in range(self.commit_counts[n]):
+            sha = self.commit_sha(n, i)
+            events.append(self.event_json(n, i, "referenced", base + timedelta(seconds=60 * (i + 1)), sha))
+        if self.state[n] == "closed":
+            i = self.commit_counts[n]
+            sha = self.commit_sha(n, 0) if self.commit_counts[n] and n % 2 == 0 else None
+            events.append(self.event_json(n, i, "closed", base + timedelta(seconds=60 * (i + 1)), sha))
+        return events
+
+    def event_json(self, n, i, event, created_at, sha):
+        return {
+            "id": self.repo_id * 10000000 + n * 10 + i,
+            "event": event,
+            "actor": self.user(f"dev{n % 13}"),
+            "commit_id": sha,
+            "commit_url": f"{{base}}/repos/{self.full_name}/commits/{sha}" if sha else None,
+            "created_at": _format_time(created_at),
+            "url": f"{{base}}/repos/{self.full_name}/issues/events/{self.repo_id * 10000000 + n * 10 + i}",
+            "issue": {k: v for k, v in self.issue_json(n).items() if k != "body"}
+        }
+
+    def repo_events(self):
+        """
+        仓库级issue事件的(编号, 序号)列表，按时间倒序，首次使用时生成
+        """
+        with self._lock:
+            if self._events is None:
+                events = []
+                for n in range(1, self.items + 1):
+                    count = self.commit_counts[n] + (1 if self.state[n] == "closed" else 0)
+                    events.extend((n, i) for i in range(count))
+                events.reverse()
+                self._events = events
+            return self._events
+
+    def files(self, seed_text, count):
+        """
+        生成修改文件列表，结构与GitHub API返回的files一致
+        """
+        rng = random.Random(seed_text)
+        files = []
+        for i in range(count):
+            module, cls = rng.randint(0, 9), rng.randint(0, 19)
+            if rng.random() < 0.85:
+                filename = f"src/main/java/com/example/module{module}/Class{cls}_{i}.java"
+            else:
+                filename = f"docs/module{module}/README_{i}.md"
+            additions, deletions = rng.randint(0, 40), rng.randint(0, 20)
+            patch = "@@ -1,%d +1,%d @@\n" % (deletions + 1, additions + 1)
+            patch += "\n".join(f"-    int old{j} = {j};" for j in range(deletions))
+            patch += "\n" + "\n".join(f"+    int value{j} = {j};" for j in range(additions))
+            files.append({
+                "sha": _sha(seed_text, filename),
+                "filename": filename,
+                "status": rng.choice(["modified", "modified", "added", "removed"]),
+                "additions": additions,
+                "deletions": deletions,
+                "changes": additions + deletions,
+                "blob_url": f"{{web}}/{self.full_name}/blob/{_sha(seed_text)}/{filename}",
+                "raw_url": f"{{web}}/{self.full_name}/raw/{_sha(seed_text)}/{filename}",
+                "contents_url": f"{{base}}/repos/{self.full_name}/contents/{filename}",
+                "patch": patch
+            })
+        return files
+
+    def commit_json(self, sha):
+        rng = random.Random(sha)
+        files = self.files(sha, rng.randint(1, 6))
+        additions = sum(f["additions"] for f in files)
+        deletions = sum(f["deletions"] for f in files)
+        return {
+            "sha": sha,
+            "url": f"{{base}}/repos/{self.full_name}/commits/{sha}",
+            "html_url": f"{{web}}/{self.full_name}/commit/{sha}",
+            "commit": {
+                "message": f"Fix issue in module {rng.randint(0, 9)}",
+                "author": {"name": "dev", "email": "dev@example.com", "date": _format_time(self.start)},
+                "committer": {"name": "dev", "email": "dev@example.com", "date": _format_time(self.start)}
+            },
+            "parents": [{"sha": _sha(sha, "parent")}],
+            "stats": {"additions": additions, "deletions": deletions, "total": additions + deletions},
+            "files": files
+        }
+
+    def pull_files(self, n):
+        # 少数PR修改文件较多，用于测试文件列表分页
+        count = 250 if n % 97 == 0 else random.Random(f"pr-files-{n}").randint(1, 8)
+        return self.files(f"{self.full_name}-pr-{n}", count)
+
+    def source_file(self, path):
+        cls = os.path.splitext(os.path.basename(path))[0]
+        package = os.path.dirname(path).replace("src/main/java/", "").replace("/", ".")
+        return (f"package {package};\n\n/**\n * Synthetic class {cls}\n */\npublic class {cls} {{\n"
+                f"    private int value;\n\n    public int getValue() {{\n        return value;\n    }}\n}}\n")
+
+
+class RateLimiter:
+    """
+    模拟GitHub的主速率限制(按令牌和资源类别计数)和二次速率限制(并发请求数)
+    """
+
+    WINDOWS = {"core": 3600, "search": 60, "graphql": 3600}
+
+    def __init__(self, core_limit=5000, search_limit=30, graphql_limit=5000, max_concurrent=100, retry_after=60):
+        self.limits = {"core": core_limit, "search": search_limit, "graphql": graphql_limit}
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self._quota = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        """
+        开始处理请求，超过并发上限时返回False(二次速率限制)
+        """
+        with self._lock:
+            if self.max_concurrent and self._active >= self.max_concurrent:
+                return False
+            self._active += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._active -= 1
+
+    def consume(self, token, resource, charge=True):
+        """
+        消耗一次配额
+        :return: (是否允许, 速率限制响应头)
+        """
+        now = time.time()
+        with self._lock:
+            quota = self._quota.get((token, resource))
+            if quota is None or quota["reset"] <= now:
+                quota = {"used": 0, "reset": int(now) + self.WINDOWS[resource]}
+                self._quota[(token, resource)] = quota
+            limit = self.limits[resource]
+            allowed = quota["used"] < limit
+            if allowed and charge:
+                quota["used"] += 1
+            headers = {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(max(limit - quota["used"], 0)),
+                "X-RateLimit-Used": str(quota["used"]),
+                "X-RateLimit-Reset": str(quota["reset"]),
+                "X-RateLimit-Resource": resource
+            }
+        return allowed, headers
+
+
+class MockGitHubServer(ThreadingHTTPServer):
+    """
+    模拟GitHub服务，任意owner/repo在首次访问时按相同参数生成
+    """
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, items=1000, pr_ratio=0.3, seed=0, latency=0.0, slow_ratio=0.0,
+                 slow_latency=2.0, rate_limiter=None):
+        """
+        初始化MockGitHubServer实例
+        :param address: (host, port)
+        :param items: 每个仓库的Issue和PR总数
+        :param pr_ratio: PR所占比例
+        :param seed: 随机种子
+        :param latency: 每个响应的基础延迟(秒)
+        :param slow_ratio: 慢响应所占比例
+        :param slow_latency: 慢响应的额外延迟(秒)
+        :param rate_limiter: RateLimiter实例，为None时使用GitHub的默认配额
+        """
+        super().__init__(address, MockGitHubHandler)
+        self.items = items
+        self.pr_ratio = pr_ratio
+        self.seed = seed
+        self.latency = latency
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_latency
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.request_count = 0
+        self._repos = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def get_repository(self, owner, name):
+        key = f"{owner}/{name}".lower()
+        with self._lock:
+            if key not in self._repos:
+                self._repos[key] = MockRepository(owner, name, self.items, self.pr_ratio, self.seed)
+            return self._repos[key]
+
+    def response_delay(self):
+        with self._lock:
+            self.request_count += 1
+            slow = self.slow_ratio and self._random.random() < self.slow_ratio
+        return self.latency + (self.slow_latency if slow else 0)
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    """
+    请求处理，路由到各接口的实现
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("GET", r"^/rate_limit$", "rate_limit"),
+        ("GET", r"^/search/issues$", "search_issues"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)$", "get_repo"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/issues$", "list_issues"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/issues/events$", "list_repo_events"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/issues/(\d+)$", "get_issue"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/issues/(\d+)/events$", "list_issue_events"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/commits/([0-9a-zA-Z]+)$", "get_commit"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/pulls$", "list_pulls"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/pulls/(\d+)$", "get_pull"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/pulls/(\d+)/files$", "list_pull_files"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/contents/?(.*)$", "get_contents"),
+        ("POST", r"^/graphql$", "graphql"),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    # ---------- 请求处理框架 ----------
+
+    def _dispatch(self, method):
+        parts = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.base = f"http://{self.headers.get('Host', 'localhost')}"
+        body = b""
+        if "Content-Length" in self.headers:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+
+        server = self.server
+        if not server.rate_limiter.enter():
+            self._send_json(403, {"message": "You have exceeded a secondary rate limit. Please wait a few minutes "
+                                             "before you try again."},
+                            {"Retry-After": str(server.rate_limiter.retry_after)})
+            return
+        try:
+            delay = server.response_delay()
+            if delay:
+                time.sleep(delay)
+            resource = get_rate_limit_resource(parts.path)
+            token = self.headers.get("Authorization", "")
+            for route_method, pattern, handler in self.ROUTES:
+                match = re.match(pattern, parts.path)
+                if route_method == method and match:
+                    break
+            else:
+                self._send_json(404, {"message": "Not Found"})
+                return
+            if handler == "rate_limit":
+                self._send_json(200, self.rate_limit(token))
+                return
+
+            allowed, rate_headers = server.rate_limiter.consume(token, resource, charge=False)
+            if not allowed and resource == "graphql":
+                # GraphQL的主速率限制与GitHub一致返回HTTP 200和RATE_LIMITED错误，没有Retry-After
+                self._send_json(200, {"data": None, "errors": [
+                    {"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}, rate_headers)
+                return
+            if not allowed:
+                self._send_json(403, {"message": "API rate limit exceeded"}, rate_headers)
+                return
+            args = [unquote(group) for group in match.groups()]
+            if method == "POST":
+                args.append(json.loads(body or b"{}"))
+            status, data, headers = getattr(self, handler)(*args)
+            payload = json.dumps(data).replace("{base}", self.base).replace("{web}", self.base)
+            etag = f'"{hashlib.md5(payload.encode("utf-8")).hexdigest()}"'
+            # 条件请求命中时返回304，与GitHub一致不消耗配额
+            if method == "GET" and status == 200 and self.headers.get("If-None-Match") == etag:
+                _, rate_headers = server.rate_limiter.consume(token, resource, charge=False)
+                self._send_raw(304, b"", {"ETag": etag, **rate_headers})
+                return
+            _, rate_headers = server.rate_limiter.consume(token, resource)
+            headers = {**headers, **rate_headers}
+            if status == 200 and method == "GET":
+                headers["ETag"] = etag
+            self._send_raw(status, payload.encode("utf-8"), {"Content-Type": "application/json; charset=utf-8",
+                                                             **headers})
+        except Exception as e:
+            self._send_json(500, {"message": f"Mock server error: {e}"})
+        finally:
+            server.rate_limiter.leave()
+
+    def _send_raw(self, status, payload, headers):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status, data, headers=None):
+        self._send_raw(status, json.dumps(data).encode("utf-8"),
+                       {"Content-Type": "application/json; charset=utf-8", **(headers or {})})
+
+    def _paginate(self, items, render, max_results=None):
+        """
+        按page/per_page分页并生成Link头
+        :param items: 全部结果(编号等轻量对象)
+        :param render: 把单个结果转换为JSON对象
+        :param max_results: 可访问的结果上限(搜索为1000)
+        :return: (当前页JSON列表, 响应头)，超出上限时返回None
+        """
+        per_page = min(int(self.query.get("per_page", 30)), 100)
+        page = max(int(self.query.get("page", 1)), 1)
+        available = len(items) if max_results is None else min(len(items), max_results)
+        start = (page - 1) * per_page
+        if max_results is not None and start >= available and start > 0:
+            return None, {}
+        last_page = max((available + per_page - 1) // per_page, 1)
+        links = []
+
+        def link(target, rel):
+            query = dict(self.query, page=str(target), per_page=str(per_page))
+            return f'<{self.base}{urlsplit(self.path).path}?{urlencode(query)}>; rel="{rel}"'
+
+        if page < last_page:
+            links += [link(page + 1, "next"), link(last_page, "last")]
+        if page > 1:
+            links += [link(1, "first"), link(page - 1, "prev")]
+        headers = {"Link": ", ".join(links)} if links else {}
+        return [render(item) for item in items[start:min(start + per_page, available)]], headers
+
+    def rate_limit(self, token):
+        resources = {}
+        for resource in ("core", "search", "graphql"):
+            _, headers = self.server.rate_limiter.consume(token, resource, charge=False)
+            resources[resource] = {"limit": int(headers["X-RateLimit-Limit"]),
+                                   "remaining": int(headers["X-RateLimit-Remaining"]),
+                                   "reset": int(headers["X-RateLimit-Reset"]),
+                                   "used": int(headers["X-RateLimit-Used"])}
+        return {"resources": resources, "rate": resources["core"]}
+
+    # ---------- REST接口 ----------
+
+    def get_repo(self, owner, name):
+        return 200, self.server.get_repository(owner, name).repo_json(), {}
+
+    def list_issues(self, owner, name):
+        repo = self.server.get_repository(owner, name)
+        labels = [label for label in self.query.get("labels", "").split(",") if label]
+        since = _parse_time(self.query["since"]).timestamp() if "since" in self.query else None
+        numbers = repo.filter_numbers("all", self.query.get("state", "open"), labels, since=since)
+        # 默认按创建时间倒序
+        if self.query.get("direction", "desc") == "desc":
+            numbers = numbers[::-1]
+        items, headers = self._paginate(numbers, repo.issue_json)
+        return 200, items, headers
+
+    def get_issue(self, owner, name, number):
+        repo = self.server.get_repository(owner, name)
+        number = int(number)
+        if not 1 <= number <= repo.items:
+            return 404, {"message": "Not Found"}, {}
+        return 200, repo.issue_json(number), {}
+
+    def list_issue_events(self, owner, name, number):
+        repo = self.server.get_repository(owner, name)
+        number = int(number)
+        if not 1 <= number <= repo.items:
+            return 404, {"message": "Not Found"}, {}
+        items, headers = self._paginate(repo.events(number), lambda event: event)
+        return 200, items, headers
+
+    def list_repo_events(self, owner, name):
+        repo = self.server.get_repository(owner, name)
+        items, headers = self._paginate(repo.repo_events(), lambda ref: repo.events(ref[0])[ref[1]])
+        return 200, items, headers
+
+    def get_commit(self, owner, name, sha):
+        repo = self.server.get_repository(owner, name)
+        if not repo.commit_exists(sha):
+            return 422, {"message": f"No commit found for SHA: {sha}"}, {}
+        return 200, repo.commit_json(sha), {}
+
+    def list_pulls(self, owner, name):
+        repo = self.server.get_repository(owner, name)
+        numbers = repo.filter_numbers("pr", self.query.get("state", "open"))
+        if self.query.get("sort") == "updated":
+            numbers = sorted(numbers, key=lambda n: repo.updated[n])
+        if self.query.get("direction", "desc") == "desc":
+            numbers = numbers[::-1]
+        items, headers = self._paginate(numbers, repo.pull_json)
+        return 200, items, headers
+
+    def get_pull(self, owner, name, number):
+        repo = self.server.get_repository(owner, name)
+        number = int(number)
+        if not 1 <= number <= repo.items or not repo.is_pull[number]:
+            return 404, {"message": "Not Found"}, {}
+        return 200, repo.full_pull_json(number), {}
+
+    def list_pull_files(self, owner, name, number):
+        repo = self.server.get_repository(owner, name)
+        number = int(number)
+        if not 1 <= number <= repo.items or not repo.is_pull[number]:
+            return 404, {"message": "Not Found"}, {}
+        items, headers = self._paginate(repo.pull_files(number), lambda f: f)
+        return 200, items, headers
+
+    def get_contents(self, owner, name, path):
+        repo = self.server.get_repository(owner, name)
+        path = path.strip("/")
+        root = "src/main/java/com/example"
+        if path.endswith(".java"):
+            content = repo.source_file(path).encode("utf-8")
+            return 200, {
+                "type": "file", "name": os.path.basename(path), "path": path, "size": len(content),
+                "sha": _sha(path), "encoding": "base64", "content": base64.b64encode(content).decode("ascii"),
+                "url": f"{{base}}/repos/{repo.full_name}/contents/{path}"
+            }, {}
+        if path == root:
+            entries = [(f"{root}/module{i}", "dir") for i in range(10)]
+        elif path == "" or root.startswith(path + "/"):
+            child = root.split("/")[len(path.split("/")) if path else 0]
+            entries = [(f"{path}/{child}".strip("/"), "dir")]
+        elif re.fullmatch(rf"{root}/module\d", path):
+            entries = [(f"{path}/Class{i}.java", "file") for i in range(20)]
+        else:
+            return 404, {"message": "Not Found"}, {}
+        return 200, [{"type": kind, "name": os.path.basename(p), "path": p, "sha": _sha(p),
+                      "url": f"{{base}}/repos/{repo.full_name}/contents/{p}"} for p, kind in entries], {}
+
+    def search_issues(self):
+        """
+        支持采集器用到的搜索限定词: repo、is、label、merged、updated、created和sort
+        """
+        q = self.query.get("q", "")
+        tokens = re.findall(r'(\w+):((?:"[^"]*"(?:,"[^"]*")*)|\S+)', q)
+        repo = None
+        kind, state, labels = "all", "all", []
+        ranges = []
+        order = self.query.get("order", "desc")
+        sort = self.query.get("sort")
+        for key, value in tokens:
+            if key == "repo":
+                repo = self.server.get_repository(*value.split("/", 1))
+            elif key == "is" and value in ("pr", "issue"):
+                kind = value
+            elif key == "is" and value in ("open", "closed", "merged"):
+                state = value
+            elif key == "label":
+                labels = [label.strip('"') for label in value.split(",")]
+            elif key in ("merged", "updated", "created"):
+                ranges.append((key, value))
+            elif key == "sort":
+                sort = value.rsplit("-", 1)[0]
+                order = "asc" if value.endswith("-asc") else "desc"
+        if repo is None:
+            return 422, {"message": "Validation Failed", "errors": [{"message": "repo qualifier required"}]}, {}
+
+        numbers = repo.filter_numbers(kind, state, labels, any_label=True)
+        for key, value in ranges:
+            if ".." in value:
+                low, high = (_parse_time(v).timestamp() for v in value.split("..", 1))
+            elif value.startswith(">="):
+                low, high = _parse_time(value[2:]).timestamp(), float("inf")
+            else:
+                continue
+            if key == "created":
+                numbers = [n for n in numbers if low <= repo.created_at(n).timestamp() <= high]
+            elif key == "merged":
+                numbers = [n for n in numbers if repo.merged[n] and low <= repo.closed_time[n] <= high]
+            else:
+                numbers = [n for n in numbers if low <= repo.updated[n] <= high]
+        if sort == "updated":
+            numbers = sorted(numbers, key=lambda n: repo.updated[n])
+        if order == "desc":
+            numbers = numbers[::-1]
+        items, headers = self._paginate(numbers, repo.issue_json, max_results=SEARCH_RESULT_CAP)
+        if items is None:
+            return 422, {"message": "Only the first 1000 search results are available"}, {}
+        return 200, {"total_count": len(numbers), "incomplete_results": False, "items": items}, headers
+
+    # ---------- GraphQL ----------
+
+    def graphql(self, request):
+        query = request.get("query", "")
+        variables = request.get("variables") or {}
+        repo = self.server.get_repository(variables["owner"], variables["name"])
+        if "issue(number" in query:
+            # 生成的Issue时间线不超过一页
+            return 200, {"data": {"repository": {"issue": {"timelineItems": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": []}}}}}, {}
+
+        states = variables.get("states") or []
+        state = states[0].lower() if len(states) == 1 else "all"
+        since = _parse_time(variables["since"]).timestamp() if variables.get("since") else None
+        numbers = repo.filter_numbers("issue", state, variables.get("labels") or [], any_label=True, since=since)
+        order_by = variables.get("orderBy") or {"direction": "ASC"}
+        if order_by.get("direction") == "DESC":
+            numbers = numbers[::-1]
+        offset = int(base64.b64decode(variables["cursor"]).decode()) if variables.get("cursor") else 0
+        page_size = min(variables.get("pageSize", 50), 100)
+        page = numbers[offset:offset + page_size]
+        end = offset + len(page)
+        nodes = [self._graphql_issue(repo, n) for n in page]
+        data = {"repository": {"issues": {
+            "pageInfo": {"hasNextPage": end < len(numbers), "endCursor": base64.b64encode(str(end).encode()).decode()},
+            "nodes": nodes
+        }}}
+        return 200, {"data": data}, {}
+
+    def _graphql_issue(self, repo, n):
+        issue = repo.issue_json(n)
+        timeline = []
+        for event in repo.events(n):
+            if not event["commit_id"]:
+                continue
+            owner = repo.full_name if repo.commit_exists(event["commit_id"]) else "fork/" + repo.name
+            commit = {"__typename": "Commit", "oid": event["commit_id"], "repository": {"nameWithOwner": owner}}
+            node = {"id": f"E_{event['id']}", "createdAt": event["created_at"]}
+            if event["event"] == "referenced":
+                node.update({"__typename": "ReferencedEvent", "commit": commit})
+            else:
+                node.update({"__typename": "ClosedEvent", "closer": commit})
+            timeline.append(node)
+        return {
+            "databaseId": issue["id"],
+            "number": n,
+            "title": issue["title"],
+            "body": issue["body"],
+            "state": issue["state"].upper(),
+            "createdAt": issue["created_at"],
+            "updatedAt": issue["updated_at"],
+            "author": {"login": issue["user"]["login"]},
+            "assignees": {"nodes": [{"login": issue["assignee"]["login"]}] if issue["assignee"] else []},
+            "labels": {"nodes": [{"name": label["name"]} for label in issue["labels"]]},
+            "timelineItems": {"pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": timeline}
+        }
+
+
+def start_mock_server(host="127.0.0.1", port=0, **options):
+    """
+    在后台线程中启动模拟服务
+    :param host: 监听地址
+    :param port: 端口，0表示随机端口
+    :param options: MockGitHubServer的其他参数
+    :return: MockGitHubServer实例，base_url为 http://host:port
+    """
+    server = MockGitHubServer((host, port), **options)
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟GitHub API服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--items", type=int, default=1000, help="每个仓库的Issue和PR总数")
+    parser.add_argument("--pr-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个响应的基础延迟(秒)")
+    parser.add_argument("--slow-ratio", type=float, default=0.0, help="慢响应所占比例")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="慢响应的额外延迟(秒)")
+    parser.add_argument("--core-limit", type=int, default=5000)
+    parser.add_argument("--search-limit", type=int, default=30)
+    parser.add_argument("--graphql-limit", type=int, default=5000)
+    parser.add_argument("--max-concurrent", type=int, default=100, help="超过该并发数时触发二次速率限制")
+    parser.add_argument("--retry-after", type=int, default=60)
+    args = parser.parse_args()
+
+    rate_limiter = RateLimiter(args.core_limit, args.search_limit, args.graphql_limit,
+                               args.max_concurrent, args.retry_after)
+    server = MockGitHubServer((args.host, args.port), items=args.items, pr_ratio=args.pr_ratio, seed=args.seed,
+                              latency=args.latency, slow_ratio=args.slow_ratio, slow_latency=args.slow_latency,
+                              rate_limiter=rate_limiter)
+    print(f"模拟GitHub服务已启动: http://{args.host}:{args.port}，每个仓库 {args.items} 个Issue和PR")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于录制归档的离线采集基准测试
+先将config.json中collection.http_archive.mode设为record正常运行一次采集，
+再用本脚本回放归档，比较不同并发线程数下Issues和PR的采集耗时
+
+用法: python src/api/replay_benchmark.py <归档路径> [线程数 ...]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import time
+from src.utils.utils import load_config
+from src.api.github_api import GitHubAPI
+from src.api.http_archive import install_http_archive
+from src.api.commit_cache import CommitCache
+from src.extractor.data_extractor import DataExtractor
+
+CONFIG = load_config()
+
+
+def run_once(archive_path, max_workers, latency_scale=1.0, rate_limit=None):
+    """
+    回放归档完成一次采集
+    :param archive_path: 归档路径
+    :param max_workers: 并发线程数
+    :param latency_scale: 按录制耗时回放延迟的系数
+    :param rate_limit: 模拟的配额，为None时使用录制的响应头
+    :return: 统计结果字典
+    """
+    # 每次运行重新加载归档，从头开始回放
+    archive = install_http_archive("replay", archive_path, latency_scale=latency_scale, rate_limit=rate_limit)
+    GitHubAPI.http_archive = archive
+    github_api = GitHubAPI(CONFIG["token"], debug=False)
+    # 使用空的内存缓存，避免本地缓存影响结果
+    github_api.commit_cache = CommitCache(db_path=None)
+    extractor = DataExtractor()
+
+    start = time.time()
+    repo = github_api.get_repo(CONFIG["owner"], CONFIG["repo"])
+    issues = github_api.get_issues(repo, state=CONFIG["issue_state"], labels=CONFIG["filter_labels"])
+    issues_list = extractor.extract_issues(issues, github_api, repo, max_workers=max_workers)
+    issues_seconds = time.time() - start
+
+    start = time.time()
+    prs = github_api.get_pull_requests(repo, state="closed")
+    prs_list = extractor.extract_pull_requests(prs, github_api, repo, max_workers=max_workers)
+    prs_seconds = time.time() - start
+
+    return {
+        "max_workers": max_workers,
+        "issues": len(issues_list),
+        "issues_seconds": round(issues_seconds, 2),
+        "pull_requests": len(prs_list),
+        "pull_requests_seconds": round(prs_seconds, 2),
+        "requests": archive.stats["served"],
+        "missing": archive.stats["missing"]
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python src/api/replay_benchmark.py <归档路径> [线程数 ...]")
+        sys.exit(1)
+    archive_path = sys.argv[1]
+    worker_counts = [int(n) for n in sys.argv[2:]] or [1, 4, 8, 16]
+    results = [run_once(archive_path, n) for n in worker_counts]
+    print("\n线程数\tIssues\t耗时(秒)\tPR\t耗时(秒)\t请求数\t未命中")
+    for r in results:
+        print(f"{r['max_workers']}\t{r['issues']}\t{r['issues_seconds']}\t{r['pull_requests']}\t"
+              f"{r['pull_requests_seconds']}\t{r['requests']}\t{r['missing']}")
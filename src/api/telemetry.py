@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+采集过程的运行统计
+按GitHubAPI方法统计调用次数和耗时，按HTTP接口统计请求数、耗时、传输字节数、缓存命中和剩余配额，
+运行结束时导出JSON汇总，可选定时输出一行进度
+"""
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+from collections import defaultdict, Counter
+from github.Requester import Requester
+from src.api.token_pool import get_endpoint, get_rate_limit_resource
+from src.api.http_cache import CachedResponse, CachingHTTPConnection, CachingHTTPSConnection
+
+# 耗时直方图的桶上界(秒)，最后一个桶记录超过60秒的请求
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class LatencyHistogram:
+    """
+    固定分桶的耗时直方图，内存占用与请求数无关，百分位数取所在桶的上界
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """
+        :param q: 0到1之间的分位数
+        :return: 耗时(秒)，落在最后一个桶时返回最大值
+        """
+        if not self.count:
+            return 0.0
+        threshold = q * self.count
+        cumulative = 0
+        for index, bucket in enumerate(self.buckets):
+            cumulative += bucket
+            if cumulative >= threshold:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 3),
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": round(self.max, 4),
+            "histogram": dict(zip([f"<={b}" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}"], self.buckets))
+        }
+
+
+class Telemetry:
+    """
+    线程安全的统计收集器，同一进程内的GitHubAPI实例共享
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._methods = defaultdict(lambda: {"calls": 0, "errors": 0, "latency": LatencyHistogram()})
+        self._endpoints = defaultdict(lambda: {
+            "requests": 0, "cache_hits": 0, "bytes": 0, "statuses": Counter(), "latency": LatencyHistogram()
+        })
+        self._quota = {}
+        self._live_stop = None
+
+    def record_call(self, name, seconds, error=False):
+        """
+        记录一次GitHubAPI方法调用
+        :param name: 方法名
+        :param seconds: 耗时(秒)
+        :param error: 是否抛出异常
+        """
+        with self._lock:
+            method = self._methods[name]
+            method["calls"] += 1
+            method["errors"] += int(error)
+            method["latency"].add(seconds)
+
+    def record_request(self, url, status, seconds, size=0, headers=None, cache_hit=False):
+        """
+        记录一次HTTP请求
+        :param url: 请求URL或路径
+        :param status: 响应状态码
+        :param seconds: 耗时(秒)
+        :param size: 响应体字节数，缓存命中时为0
+        :param headers: 响应头，用于读取剩余配额
+        :param cache_hit: 是否由HTTP缓存返回
+        """
+        headers = headers or {}
+        remaining = headers.get("X-RateLimit-Remaining")
+        with self._lock:
+            endpoint = self._endpoints[get_endpoint(url)]
+            endpoint["requests"] += 1
+            endpoint["cache_hits"] += int(cache_hit)
+            endpoint["bytes"] += size
+            endpoint["statuses"][str(status)] += 1
+            endpoint["latency"].add(seconds)
+            if remaining is not None:
+                resource = headers.get("X-RateLimit-Resource") or get_rate_limit_resource(url)
+                quota = self._quota.setdefault(resource, {"min_remaining": None})
+                quota["remaining"] = int(float(remaining))
+                quota["limit"] = int(float(headers.get("X-RateLimit-Limit", 0)))
+                quota["reset"] = int(float(headers.get("X-RateLimit-Reset", 0)))
+                if quota["min_remaining"] is None or quota["remaining"] < quota["min_remaining"]:
+                    quota["min_remaining"] = quota["remaining"]
+
+    def summary(self):
+        """
+        返回统计汇总
+        """
+        with self._lock:
+            endpoints = {
+                name: {
+                    "requests": stats["requests"],
+                    "cache_hits": stats["cache_hits"],
+                    "bytes": stats["bytes"],
+                    "statuses": dict(stats["statuses"]),
+                    "latency": stats["latency"].summary()
+                }
+                for name, stats in self._endpoints.items()
+            }
+            methods = {
+                name: {"calls": stats["calls"], "errors": stats["errors"], "latency": stats["latency"].summary()}
+                for name, stats in self._methods.items()
+            }
+            quota = {resource: dict(values) for resource, values in self._quota.items()}
+        return {
+            "elapsed_seconds": round(time.time() - self.started_at, 1),
+            "requests": sum(e["requests"] for e in endpoints.values()),
+            "cache_hits": sum(e["cache_hits"] for e in endpoints.values()),
+            "bytes": sum(e["bytes"] for e in endpoints.values()),
+            "endpoints": dict(sorted(endpoints.items(), key=lambda item: -item[1]["latency"]["total_seconds"])),
+            "methods": dict(sorted(methods.items(), key=lambda item: -item[1]["latency"]["total_seconds"])),
+            "quota": quota
+        }
+
+    def progress_line(self):
+        """
+        返回一行进度：请求数、缓存命中、速率、耗时最多的接口和各类配额余量
+        """
+        summary = self.summary()
+        elapsed = max(summary["elapsed_seconds"], 0.1)
+        line = (f"[统计] {summary['requests']} 次请求 ({summary['requests'] / elapsed:.1f}/秒)，"
+                f"缓存命中 {summary['cache_hits']}，{summary['bytes'] / 1024 / 1024:.1f} MB")
+        if summary["endpoints"]:
+            name, stats = next(iter(summary["endpoints"].items()))
+            line += f"，最耗时接口 {name} ({stats['requests']} 次，p50 {stats['latency']['p50']}秒)"
+        for resource, quota in summary["quota"].items():
+            line += f"，{resource}剩余 {quota['remaining']}/{quota['limit']}"
+        return line
+
+    def start_live(self, interval):
+        """
+        在后台线程中每隔interval秒输出一行进度
+        """
+        if self._live_stop is not None:
+            return
+        self._live_stop = threading.Event()
+        stop = self._live_stop
+
+        def run():
+            while not stop.wait(interval):
+                print(self.progress_line())
+        threading.Thread(target=run, name="telemetry-progress", daemon=True).start()
+
+    def stop_live(self):
+        if self._live_stop is not None:
+            self._live_stop.set()
+            self._live_stop = None
+
+    def export(self, path):
+        """
+        停止进度输出并把汇总写入JSON文件
+        :param path: 文件路径
+        :return: 汇总字典
+        """
+        self.stop_live()
+        summary = self.summary()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(self.progress_line())
+        print(f"运行统计已保存到: {path}")
+        return summary
+
+
+def instrumented(method):
+    """
+    GitHubAPI方法的装饰器，实例的telemetry不为None时记录调用次数和耗时
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        telemetry = self.telemetry
+        if telemetry is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        error = False
+        try:
+            return method(self, *args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            telemetry.record_call(method.__name__, time.perf_counter() - start, error)
+    return wrapper
+
+
+class TelemetryConnectionMixin:
+    """
+    最外层的连接类，统计每个HTTP请求，包括由缓存直接返回的请求
+    """
+
+    # 由install_telemetry设置，同一进程内共享
+    telemetry = None
+
+    def getresponse(self):
+        telemetry = self.telemetry
+        if telemetry is None:
+            return super().getresponse()
+        start = time.perf_counter()
+        response = super().getresponse()
+        cache_hit = isinstance(response, CachedResponse)
+        size = 0
+        if not cache_hit and not self.stream:
+            size = len(response.response.content)
+        telemetry.record_request(self.url, response.status, time.perf_counter() - start,
+                                 size, response.headers, cache_hit)
+        return response
+
+
+class TelemetryHTTPSConnection(TelemetryConnectionMixin, CachingHTTPSConnection):
+    pass
+
+
+class TelemetryHTTPConnection(TelemetryConnectionMixin, CachingHTTPConnection):
+    pass
+
+
+def install_telemetry(telemetry):
+    """
+    让进程内所有PyGithub客户端的请求计入统计，需在install_http_cache之后调用
+    :param telemetry: Telemetry实例
+    """
+    TelemetryConnectionMixin.telemetry = telemetry
+    Requester.injectConnectionClasses(TelemetryHTTPConnection, TelemetryHTTPSConnection)
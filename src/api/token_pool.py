@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多令牌速率限制管理，按响应头中的剩余配额把请求路由到余量最多的令牌
+"""
+import re
+import time
+import threading
+import requests
+from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+from github.Requester import Requester, HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, RequestsResponse
+
+
+def get_rate_limit_resource(url):
+    """
+    根据请求URL判断所属的速率限制类别，GitHub对core、search、graphql分别计算配额
+    """
+    path = url.split("?", 1)[0]
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/search/" in path:
+        return "search"
+    return "core"
+
+
+def get_endpoint(url):
+    """
+    把请求URL归一化为接口名，用于按接口统计
+    去掉仓库名和查询参数，编号替换为:number，SHA替换为:sha，
+    如 /repos/{owner}/{repo}/issues/12/events 归一化为 issues/:number/events
+    """
+    parts = urlparse(url).path.strip("/").split("/")
+    if "repos" in parts:
+        index = parts.index("repos")
+        parts = parts[index + 3:] or ["repo"]
+    elif parts[:2] == ["api", "v3"]:
+        # GitHub Enterprise的API路径前缀
+        parts = parts[2:]
+    return "/".join(
+        ":number" if part.isdigit() else ":sha" if re.fullmatch(r"[0-9a-f]{7,40}", part) else part
+        for part in parts
+    )
+
+
+class TokenPool:
+    """
+    令牌池，记录每个令牌在各类别下的剩余配额和重置时间
+    选择令牌时优先使用剩余配额最多的令牌，配额消耗过半后按剩余时间均匀分配请求
+    """
+
+    # 未收到响应头前按GitHub的默认配额估计
+    DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+
+    def __init__(self, tokens, min_interval=0.1, pace_threshold=0.5):
+        """
+        初始化TokenPool实例
+        :param tokens: 令牌列表
+        :param min_interval: 同一令牌两次请求之间的最小间隔(秒)
+        :param pace_threshold: 剩余配额低于该比例时开始按重置时间均匀分配请求
+        """
+        self.tokens = list(dict.fromkeys(token for token in tokens if token))
+        if not self.tokens:
+            raise ValueError("令牌池至少需要一个令牌")
+        self.min_interval = min_interval
+        self.pace_threshold = pace_threshold
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return len(self.tokens)
+
+    def _state(self, token, resource):
+        key = (token, resource)
+        if key not in self._states:
+            limit = self.DEFAULT_LIMITS.get(resource, 5000)
+            self._states[key] = {
+                "remaining": limit,
+                "limit": limit,
+                "reset": 0,
+                "blocked_until": 0,
+                "next_request": 0
+            }
+        return self._states[key]
+
+    def _available_at(self, state, now):
+        """
+        计算令牌下一次可以发起请求的时间
+        """
+        available = max(state["blocked_until"], state["next_request"])
+        if state["remaining"] <= 0 and state["reset"] > now:
+            available = max(available, state["reset"])
+        return available
+
+    def acquire(self, resource="core"):
+        """
+        选择一个令牌用于下一次请求，所有令牌都不可用时等待
+        :param resource: 速率限制类别 (core, search, graphql)
+        :return: 令牌
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                candidates = []
+                for token in self.tokens:
+                    state = self._state(token, resource)
+                    candidates.append((self._available_at(state, now), -state["remaining"], token))
+                available_at, _, token = min(candidates)
+                if available_at <= now:
+                    state = self._state(token, resource)
+                    state["remaining"] -= 1
+                    state["next_request"] = now + self._interval(state, now)
+                    return token
+                wait_seconds = available_at - now
+            if wait_seconds > 5:
+                print(f"所有令牌的{resource}配额暂不可用，等待 {int(wait_seconds)} 秒...")
+            time.sleep(wait_seconds)
+
+    def _interval(self, state, now):
+        """
+        计算同一令牌的请求间隔，配额充足时使用最小间隔，不足时把剩余配额均匀分配到重置前
+        """
+        interval = self.min_interval
+        if state["reset"] > now and state["remaining"] < state["limit"] * self.pace_threshold:
+            interval = max(interval, (state["reset"] - now) / max(state["remaining"], 1))
+        return interval
+
+    def update(self, token, headers):
+        """
+        根据响应头更新令牌的剩余配额
+        :param token: 发起请求的令牌
+        :param headers: 响应头(键为小写)
+        """
+        if "x-ratelimit-remaining" not in headers:
+            return
+        resource = headers.get("x-ratelimit-resource", "core")
+        with self._lock:
+            state = self._state(token, resource)
+            state["remaining"] = int(float(headers["x-ratelimit-remaining"]))
+            if "x-ratelimit-limit" in headers:
+                state["limit"] = int(float(headers["x-ratelimit-limit"]))
+            if "x-ratelimit-reset" in headers:
+                state["reset"] = int(float(headers["x-ratelimit-reset"]))
+
+    def block(self, token, resource, seconds):
+        """
+        令牌触发速率限制后暂停使用
+        :param token: 令牌
+        :param resource: 速率限制类别
+        :param seconds: 暂停时长(秒)
+        """
+        with self._lock:
+            state = self._state(token, resource)
+            state["blocked_until"] = max(state["blocked_until"], time.time() + seconds)
+
+    def summary(self):
+        """
+        返回各令牌的配额情况，令牌只保留末4位
+        """
+        with self._lock:
+            return [
+                {"token": f"...{token[-4:]}", "resource": resource, "remaining": state["remaining"],
+                 "limit": state["limit"], "reset": state["reset"]}
+                for (token, resource), state in self._states.items()
+            ]
+
+
+def get_rate_limit_wait(status, headers, body):
+    """
+    判断响应是否为速率限制错误
+    :return: 需要等待的秒数，不是速率限制错误时返回None
+    """
+    if status not in (403, 429):
+        return None
+    if "retry-after" in headers:
+        return int(float(headers["retry-after"]))
+    if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+        return max(int(float(headers["x-ratelimit-reset"])) - time.time(), 1)
+    if "secondary rate limit" in body.lower():
+        # 二次速率限制没有给出等待时间时，GitHub建议至少等待一分钟
+        return 60
+    return None
+
+
+class PooledConnectionMixin:
+    """
+    替换PyGithub的连接类：每次请求从令牌池选择令牌，
+    遇到速率限制时暂停该令牌并立即换用其他令牌重试，不再整体等待
+    """
+
+    # 由install_token_pool设置，同一进程内共享
+    token_pool = None
+    # 创建传输适配器的工厂，录制/回放时替换为http_archive中的适配器
+    adapter_factory = requests.adapters.HTTPAdapter
+    # injectConnectionClasses后PyGithub每次请求都新建连接对象，共享session以复用TCP连接
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        # 速率限制由令牌池处理时只重试服务器错误，否则沿用客户端的重试策略
+        use_pool = self.token_pool is not None
+        if use_pool or retry is None:
+            retry = Retry(total=5, backoff_factor=2, status_forcelist=[500, 502, 503, 504])
+        with self._sessions_lock:
+            key = (self.protocol, host, self.port, use_pool, self.adapter_factory)
+            if key not in self._sessions:
+                session = requests.Session()
+                session.auth = Requester.noopAuth
+                adapter = self.adapter_factory(
+                    max_retries=retry,
+                    pool_connections=pool_size or requests.adapters.DEFAULT_POOLSIZE,
+                    pool_maxsize=pool_size or requests.adapters.DEFAULT_POOLSIZE,
+                )
+                session.mount(f"{self.protocol}://", adapter)
+                self._sessions[key] = session
+            self.session = self._sessions[key]
+
+    def _send(self):
+        verb = getattr(self.session, self.verb.lower())
+        url = f"{self.protocol}://{self.host}:{self.port}{self.url}"
+        return verb(
+            url,
+            headers=self.headers,
+            data=self.input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+        )
+
+    def getresponse(self):
+        pool = self.token_pool
+        # 跨域重定向时PyGithub会移除Authorization，这类请求不使用令牌
+        if pool is None or "Authorization" not in self.headers:
+            return RequestsResponse(self._send())
+
+        resource = get_rate_limit_resource(self.url)
+        for attempt in range(pool.size + 1):
+            token = pool.acquire(resource)
+            self.headers["Authorization"] = f"token {token}"
+            r = self._send()
+            headers = {k.lower(): v for k, v in r.headers.items()}
+            pool.update(token, headers)
+            wait_seconds = get_rate_limit_wait(r.status_code, headers, r.text)
+            if wait_seconds is None:
+                break
+            print(f"令牌 ...{token[-4:]} 触发速率限制，暂停 {int(wait_seconds)} 秒并切换令牌")
+            pool.block(token, resource, wait_seconds)
+        return RequestsResponse(r)
+
+    def close(self):
+        # session在连接之间共享，不随连接关闭
+        pass
+
+
+class PooledHTTPSConnection(PooledConnectionMixin, HTTPSRequestsConnectionClass):
+    protocol = "https"
+    default_port = 443
+
+
+class PooledHTTPConnection(PooledConnectionMixin, HTTPRequestsConnectionClass):
+    protocol = "http"
+    default_port = 80
+
+
+def install_token_pool(pool):
+    """
+    让进程内所有PyGithub客户端通过令牌池发起请求
+    :param pool: TokenPool实例
+    """
+    PooledConnectionMixin.token_pool = pool
+    Requester.injectConnectionClasses(PooledHTTPConnection, PooledHTTPSConnection)
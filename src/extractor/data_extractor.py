@@ -7,7 +7,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 from src.utils.utils import read_json_file
 from src.api.github_api import GitHubAPI
 from os import rename
-from src.utils.utils import load_config
+from src.utils.utils import load_config, parse_datetime
+from src.utils.checkpoint import CheckpointLog
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 import json
 """
 数据抽取与解析层，负责从GitHub API返回的数据中抽取和解析信息
@@ -47,148 +50,264 @@ class DataExtractor:
         # 如果提供了limits参数，更新默认值
         if limits:
             self.limits.update(limits)
+        
+        # 并发获取Issue关联文件的线程数，为1时串行处理
+        self.max_workers = 8
+        if CONFIG and "collection" in CONFIG:
+            self.max_workers = CONFIG["collection"].get("max_workers", self.max_workers)
     
-    def extract_issues(self, issues, github_api=None, repo=None):
+    def extract_issues(self, issues, github_api=None, repo=None, max_workers=None, refs_index=None, checkpoint=None):
         """
         从Issues迭代器中抽取信息
+        关联文件的获取在线程池中并发进行，结果保持Issues的原始顺序
         :param issues: Issues迭代器
         :param github_api: GitHubAPI实例，用于获取commit引用
+        :param max_workers: 并发线程数，为None时使用配置文件中的值
+        :param refs_index: Issue编号 -> commit引用 的索引，提供时不再逐个Issue请求事件
+        :param checkpoint: CheckpointLog实例，已在检查点中的Issue直接复用，新处理的Issue立即写入
         :return: Issues列表
         """
-        issues_list = []
-        for issue in issues:
-            try:
-                issue_data = {
-                    "id": issue.id,
-                    "number": issue.number,
-                    "title": issue.title or "",
-                    "body": issue.body or "",
-                    "state": issue.state,
-                    "events_url": issue.events_url,
-                    "created_at": issue.created_at,
-                    "updated_at": issue.updated_at,
-                    "labels": [label.name for label in issue.labels],
-                    "user": issue.user.login if issue.user else "",
-                    "assignee": issue.assignee.login if issue.assignee else None
-                }
-                
-                # 获取影响的文件列表
-                if github_api:
-                    issue_data["change_files"] = github_api.get_issue_change_files(repo, issue)
-                
-                issues_list.append(issue_data)
-            except Exception as item_error:
-                print(f"处理Issue #{issue.number} 时出错: {str(item_error)}")
-                import traceback
-                traceback.print_exc()
-                continue
-        return issues_list
+        return list(self.iter_issues(issues, github_api, repo, max_workers, refs_index, checkpoint))
+    
+    def iter_issues(self, issues, github_api=None, repo=None, max_workers=None, refs_index=None, checkpoint=None):
+        """
+        与extract_issues相同，但处理完一个Issue就按原始顺序返回一个，不在内存中保留全部结果
+        :return: Issue数据字典的生成器
+        """
+        extract = lambda issue: self._extract_issue(issue, github_api, repo, refs_index)
+        return self._iter_extract(issues, extract, max_workers, github_api, checkpoint)
+    
+    def _iter_extract(self, items, extract, max_workers=None, github_api=None, checkpoint=None):
+        """
+        并发处理Issues或PR，按原始顺序逐个返回结果
+        同时在处理中的对象不超过并发线程数的4倍，已完成的结果不会在内存中堆积
+        :param items: Issue或PR对象的迭代器
+        :param extract: 处理单个对象的函数，出错时返回None
+        :param max_workers: 并发线程数，为None时使用配置文件中的值
+        :param github_api: GitHubAPI实例，为None时串行处理
+        :param checkpoint: CheckpointLog实例，可选
+        :return: 记录的生成器
+        """
+        if max_workers is None:
+            max_workers = self.max_workers
+        items = list(items)
+        
+        def extract_with_checkpoint(item):
+            key = CheckpointLog.make_key(item.number, item.updated_at)
+            record = checkpoint.get(key)
+            if record is None:
+                record = extract(item)
+                if record is not None:
+                    checkpoint.append(key, record)
+            return record
+        
+        if checkpoint is not None:
+            done = sum(1 for item in items
+                       if checkpoint.get(CheckpointLog.make_key(item.number, item.updated_at)) is not None)
+            if done:
+                print(f"检查点中已有 {done}/{len(items)} 条记录，跳过")
+            run = extract_with_checkpoint
+        else:
+            run = extract
+        
+        if max_workers <= 1 or not github_api:
+            for item in items:
+                record = run(item)
+                if record is not None:
+                    yield record
+            return
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(run, item))
+                if len(pending) >= max_workers * 4:
+                    record = pending.popleft().result()
+                    if record is not None:
+                        yield record
+            while pending:
+                record = pending.popleft().result()
+                if record is not None:
+                    yield record
+    
+    def _extract_issue(self, issue, github_api=None, repo=None, refs_index=None):
+        """
+        抽取单个Issue的信息，并获取其影响的文件列表
+        :param issue: Issue对象
+        :param github_api: GitHubAPI实例
+        :param repo: 仓库对象
+        :param refs_index: Issue编号 -> commit引用 的索引，可选
+        :return: Issue数据字典，出错时返回None
+        """
+        try:
+            issue_data = {
+                "id": issue.id,
+                "number": issue.number,
+                "title": issue.title or "",
+                "body": issue.body or "",
+                "state": issue.state,
+                "events_url": issue.events_url,
+                "created_at": issue.created_at,
+                "updated_at": issue.updated_at,
+                "labels": [label.name for label in issue.labels],
+                "user": issue.user.login if issue.user else "",
+                "assignee": issue.assignee.login if issue.assignee else None
+            }
+            
+            # 获取影响的文件列表
+            if github_api:
+                github_api.wait_for_rate_limit()
+                issue_data["change_files"] = github_api.get_issue_change_files(repo, issue, refs_index)
+            
+            return issue_data
+        except Exception as item_error:
+            print(f"处理Issue #{issue.number} 时出错: {str(item_error)}")
+            import traceback
+            traceback.print_exc()
+            return None
     
     
-    def extract_pull_requests(self, prs, github_api=None, repo=None):
+    def extract_pull_requests(self, prs, github_api=None, repo=None, max_workers=None, checkpoint=None):
         """
         从Pull Requests迭代器中抽取信息
+        关联文件的获取在线程池中并发进行，结果保持PR的原始顺序
         :param prs: Pull Requests迭代器
         :param github_api: GitHubAPI实例，用于获取commit引用
+        :param max_workers: 并发线程数，为None时使用配置文件中的值
+        :param checkpoint: CheckpointLog实例，已在检查点中的PR直接复用，新处理的PR立即写入
         :return: Pull Requests列表
         """
-        prs_list = []
-        for pr in prs:
-            try:
-                labels = []
-                if pr.labels:
-                    labels = [label.name for label in pr.labels]
-                
-                pr_data = {
-                    "id": pr.id,
-                    "number": pr.number,
-                    "title": pr.title or "",
-                    "body": pr.body or "",
-                    "state": pr.state,
-                    "created_at": pr.created_at,
-                    "updated_at": pr.updated_at,
-                    "merged_at": pr.merged_at,
-                    "user": pr.user.login if pr.user else "",
-                    "assignee": pr.assignee.login if pr.assignee else None,
-                    "labels": labels,
-                    "head": pr.head.ref,
-                    "base": pr.base.ref,
-                    "merged": pr.merged,
-                    "merge_commit_sha": pr.merge_commit_sha
-                }
-                
-                # 获取PR影响的文件列表
-                if github_api:
-                    pr_data["change_files"] = github_api.get_pr_change_files(repo, pr)
-                print(f"处理PR #{pr.number} 成功")
-                prs_list.append(pr_data)
-            except Exception as item_error:
-                print(f"处理PR #{pr.number} 时出错: {str(item_error)}")
-                import traceback
-                traceback.print_exc()
-                continue
-        return prs_list
+        return list(self.iter_pull_requests(prs, github_api, repo, max_workers, checkpoint))
     
-    def extract_requirements(self, issues=[], prs=[]):
+    def iter_pull_requests(self, prs, github_api=None, repo=None, max_workers=None, checkpoint=None):
+        """
+        与extract_pull_requests相同，但处理完一个PR就按原始顺序返回一个，不在内存中保留全部结果
+        :return: PR数据字典的生成器
+        """
+        extract = lambda pr: self._extract_pull_request(pr, github_api, repo)
+        return self._iter_extract(prs, extract, max_workers, github_api, checkpoint)
+    
+    def _extract_pull_request(self, pr, github_api=None, repo=None):
+        """
+        抽取单个PR的信息，并获取其影响的文件列表
+        只读取PR列表数据中已有的字段，访问缺失字段会触发额外的补全请求
+        :param pr: PullRequest对象
+        :param github_api: GitHubAPI实例
+        :param repo: 仓库对象
+        :return: PR数据字典，出错时返回None
+        """
+        try:
+            labels = []
+            if pr.labels:
+                labels = [label.name for label in pr.labels]
+            
+            pr_data = {
+                "id": pr.id,
+                "number": pr.number,
+                "title": pr.title or "",
+                "body": pr.body or "",
+                "state": pr.state,
+                "created_at": pr.created_at,
+                "updated_at": pr.updated_at,
+                "merged_at": pr.merged_at,
+                "user": pr.user.login if pr.user else "",
+                "assignee": pr.assignee.login if pr.assignee else None,
+                "labels": labels,
+                "head": pr.head.ref,
+                "base": pr.base.ref,
+                # 列表数据中没有merged字段，由merged_at推断
+                "merged": pr.merged_at is not None,
+                "merge_commit_sha": pr.merge_commit_sha
+            }
+            
+            # 获取PR影响的文件列表
+            if github_api:
+                github_api.wait_for_rate_limit()
+                pr_data["change_files"] = github_api.get_pr_change_files(repo, pr)
+            print(f"处理PR #{pr.number} 成功")
+            return pr_data
+        except Exception as item_error:
+            print(f"处理PR #{pr.number} 时出错: {str(item_error)}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def extract_requirements(self, issues=[], prs=[], project=None):
         """
         从Issues和PRs中提取需求数据
         :param issues: Issues列表
         :param prs: PRs列表
+        :param project: 仓库全名 owner/repo，为None时使用配置文件中的仓库
         :return: 需求列表
         """
         requirements = []
-        project = f"{CONFIG['owner']}/{CONFIG['repo']}"
-        # 处理Issues
         for issue in issues:
-            try:
-                req_id = f"ISSUE-{issue['number']}"
-                req_data = {
-                    "req_id": req_id,
-                    "source": "GitHub Issue",
-                    "repository": project,
-                    "title": issue['title'],
-                    "description": issue['body'],
-                    "status": issue['state'],
-                    "author": issue['user'],
-                    "created_at": issue['created_at'].isoformat() if issue['created_at'] else None,
-                    "labels": issue['labels'],
-                    "url": f"https://github.com/{project}/issues/{issue['number']}",
-                    "change_files": issue.get('change_files', [])
-                }
+            req_data = self.issue_to_requirement(issue, project)
+            if req_data is not None:
                 requirements.append(req_data)
-            except Exception as e:
-                print(f"处理Issue #{issue['number']} 时出错: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
-        
-        # 处理PRs
         for pr in prs:
-            try:
-                req_id = f"PR-{pr['number']}"
-                req_data = {
-                    "req_id": req_id,
-                    "source": "GitHub Pull Request",
-                    "project": project,
-                    "title": pr['title'],
-                    "description": pr['body'],
-                    "status": pr['state'],
-                    "author": pr['user'],
-                    "created_at": pr['created_at'].isoformat() if pr['created_at'] else None,
-                    "labels": pr['labels'],
-                    "url": f"https://github.com/{project}/pull/{pr['number']}",
-                    "change_files": pr.get('change_files', [])
-                }
+            req_data = self.pr_to_requirement(pr, project)
+            if req_data is not None:
                 requirements.append(req_data)
-            except Exception as e:
-                print(f"处理PR #{pr['number']} 时出错: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
-        
         return requirements
     
-
+    def issue_to_requirement(self, issue, project=None):
+        """
+        把单个Issue转换为需求数据
+        :param issue: Issue数据字典
+        :param project: 仓库全名 owner/repo，为None时使用配置文件中的仓库
+        :return: 需求字典，出错时返回None
+        """
+        if project is None:
+            project = f"{CONFIG['owner']}/{CONFIG['repo']}"
+        try:
+            return {
+                "req_id": f"ISSUE-{issue['number']}",
+                "source": "GitHub Issue",
+                "repository": project,
+                "title": issue['title'],
+                "description": issue['body'],
+                "status": issue['state'],
+                "author": issue['user'],
+                "created_at": parse_datetime(issue['created_at']).isoformat() if issue['created_at'] else None,
+                "labels": issue['labels'],
+                "url": f"https://github.com/{project}/issues/{issue['number']}",
+                "change_files": issue.get('change_files', [])
+            }
+        except Exception as e:
+            print(f"处理Issue #{issue['number']} 时出错: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def pr_to_requirement(self, pr, project=None):
+        """
+        把单个PR转换为需求数据
+        :param pr: PR数据字典
+        :param project: 仓库全名 owner/repo，为None时使用配置文件中的仓库
+        :return: 需求字典，出错时返回None
+        """
+        if project is None:
+            project = f"{CONFIG['owner']}/{CONFIG['repo']}"
+        try:
+            return {
+                "req_id": f"PR-{pr['number']}",
+                "source": "GitHub Pull Request",
+                "project": project,
+                "title": pr['title'],
+                "description": pr['body'],
+                "status": pr['state'],
+                "author": pr['user'],
+                "created_at": parse_datetime(pr['created_at']).isoformat() if pr['created_at'] else None,
+                "labels": pr['labels'],
+                "url": f"https://github.com/{project}/pull/{pr['number']}",
+                "change_files": pr.get('change_files', [])
+            }
+        except Exception as e:
+            print(f"处理PR #{pr['number']} 时出错: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
     
     def filter_source_files(self, files):
         """
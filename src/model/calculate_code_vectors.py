@@ -1,5 +1,4 @@
 import os
-import json
 import torch
 import sys
 import numpy as np
@@ -7,6 +6,8 @@ from tqdm import tqdm
 # 添加项目根目录到Python路径
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from src.utils.utils import load_config,save_data
+from src.utils.blob_store import open_blob_store, text_key
+from src.JavaCodeAnalyzer.analysis_store import AnalysisStore, get_analysis_store_path
 from src.model.encoder_factory import EncoderFactory
 CONFIG = load_config()
 ##排除的目录路径
@@ -23,7 +24,7 @@ def get_pt_file_name():
 
 def process_analysis_files(directory):
     """
-    处理指定目录下的所有_analysis.json文件，计算方法向量并保存
+    读取analyze_directory保存的代码分析结果，计算文件、类和方法的代码向量并保存
     """
     # 获取配置
     encode_model_name = CONFIG.get("encode_model_name", "unixcoder")
@@ -34,8 +35,16 @@ def process_analysis_files(directory):
     pt_file_name = get_pt_file_name()
     pt_file_path = os.path.join(os.path.dirname(directory), pt_file_name)
     
-    if os.path.exists(pt_file_path) and not CONFIG["re_generate_code_embeddings"]:
+    store_path = get_analysis_store_path(directory)
+    if not os.path.exists(store_path):
+        print(f"未找到代码分析结果 {store_path}，请先运行analyze_directory")
+        return
+    analysis_store = AnalysisStore(store_path)
+    # 分析结果在向量文件之后更新过，说明有文件被重新分析或删除
+    analysis_changed = os.path.exists(pt_file_path) and analysis_store.updated_at() > os.path.getmtime(pt_file_path)
+    if os.path.exists(pt_file_path) and not CONFIG["re_generate_code_embeddings"] and not analysis_changed:
         print(f"目录 {directory} 已存在代码向量 ({pt_file_name})，跳过处理")
+        analysis_store.close()
         return
     
     print(f"正在加载编码器: {encode_model_name}")
@@ -43,13 +52,10 @@ def process_analysis_files(directory):
     embedding_dim = encoder.get_embedding_dim()
     print(f"编码器加载完成，向量维度: {embedding_dim}")
     
-    # 将不变的路径计算移出循环
-    src_dir = os.path.join('data', CONFIG.get('repo', ''), 'origin_src')
-    
-    print(f"正在读取与解析目录: {directory}")
+    print(f"正在读取分析结果: {store_path}")
     print("=" * 60)
     
-    exclude_count = 0
+    excluded_paths = set()
     
     # 临时列表，用于收集所有待编码的数据
     texts_to_encode = []
@@ -58,79 +64,28 @@ def process_analysis_files(directory):
     class_names = []
     original_codes = []
     snippet_types = []  # 新增：代码片段类型
-
-    # 第一阶段：极速遍历与解析文件（不涉及深度学习计算）
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith('_analysis.json'):
-                file_path = os.path.join(root, file)
-                # 排除指定目录
-                if any(exclude_dir in file_path for exclude_dir in exclude_dirs):
-                    exclude_count += 1
-                    continue
-                
-                relative_path = os.path.relpath(file_path, src_dir).replace('_analysis.json', '.java')
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        analysis_data = json.load(f)
-                    source_code = analysis_data.get("source_code", "")
-                    
-                    # 处理完整代码
-                    texts_to_encode.append(source_code)
-                    file_paths.append(relative_path)
-                    method_names.append("")
-                    class_names.append("")
-                    original_codes.append(source_code)
-                    snippet_types.append("code_FC")
-                    
-                    if not analysis_data.get("classes"):
-                        continue
-                    
-                    for cls in analysis_data["classes"]:
-                        class_name = cls.get("name", "")
-                        class_code = cls.get("original_code", "")
-                        class_snippets = cls.get("code_snippets", {"default": class_code})
-                        
-                        # 处理类的所有代码片段类型（编码所有类型）
-                        for snippet_type, snippet_code in class_snippets.items():
-                            if snippet_code: # 过滤空字符串
-                                texts_to_encode.append(snippet_code)
-                                file_paths.append(relative_path)
-                                method_names.append("")
-                                class_names.append(class_name)
-                                original_codes.append(class_code)
-                                snippet_types.append(f"class_{snippet_type}")
-                        
-                        # 处理方法
-                        if analyze_by_method:
-                            for method in cls.get("methods", []):
-                                method_name = method.get("name", "")
-                                method_code = method.get("original_code", "")
-                                method_snippets = method.get("code_snippets", {"default": method_code})
-                                
-                                # 处理方法的所有代码片段类型（编码所有类型）
-                                for snippet_type, snippet_code in method_snippets.items():
-                                    if snippet_code: # 过滤空字符串
-                                        texts_to_encode.append(snippet_code)
-                                        file_paths.append(relative_path)
-                                        method_names.append(method_name)
-                                        class_names.append(class_name)
-                                        original_codes.append(method_code)
-                                        snippet_types.append(f"method_{snippet_type}")
-                                
-                                # 处理方法注释 (MC)
-                                # method_comment = method.get("comments", "")
-                                # if method_comment:
-                                #     texts_to_encode.append(method_comment)
-                                #     file_paths.append(relative_path)
-                                #     method_names.append(method_name)
-                                #     class_names.append(class_name)
-                                #     original_codes.append(method_comment)
-                                #     snippet_types.append("method_MC")
-                                    
-                except Exception as e:
-                    print(f"解析文件 {file_path} 时出错: {e}")
+    
+    # 第一阶段：按文件路径顺序扫描分析存储，文件完整代码、顶层类及其方法的所有片段类型都编码
+    prefixes = {"file": "code", "class": "class", "interface": "class", "method": "method", "interface_method": "method"}
+    for snippet in analysis_store.iter_snippets(max_depth=0):
+        # 排除指定目录
+        file_path = os.path.join(directory, *snippet["path"].split("/"))
+        if any(exclude_dir in file_path for exclude_dir in exclude_dirs):
+            excluded_paths.add(snippet["path"])
+            continue
+        if prefixes[snippet["kind"]] == "method" and not analyze_by_method:
+            continue
+        # 完整代码即使为空也保留，类和方法的空片段过滤掉
+        if snippet["kind"] != "file" and not snippet["code"]:
+            continue
+        texts_to_encode.append(snippet["code"])
+        file_paths.append(snippet["path"].replace("/", os.sep))
+        method_names.append(snippet["method_name"] or "")
+        class_names.append(snippet["class_name"] or "")
+        original_codes.append(snippet["original_code"])
+        snippet_types.append(f"{prefixes[snippet['kind']]}_{snippet['snippet_type']}")
+    analysis_store.close()
+    exclude_count = len(excluded_paths)
 
     # 第二阶段：批量计算向量 (Batch Encoding)
     total_samples = len(texts_to_encode)
@@ -139,13 +94,25 @@ def process_analysis_files(directory):
         return
 
     print(f"\n共解析到 {total_samples} 个代码片段，过滤了 {exclude_count} 个文件。")
+    # 按片段内容复用已有的向量(包括其他快照中相同的代码)，相同内容只编码一次
+    store = open_blob_store(CONFIG)
+    keys = [text_key(text) for text in texts_to_encode]
+    vectors = {}
+    if store is not None:
+        for key, data in store.get_embeddings(encode_model_name, set(keys)).items():
+            vectors[key] = torch.from_numpy(np.frombuffer(data, dtype=np.float32).copy())
+    pending = {}
+    for key, text in zip(keys, texts_to_encode):
+        if key not in vectors and key not in pending:
+            pending[key] = text
+    pending_keys = list(pending)
+    print(f"复用 {total_samples - len(pending_keys)} 个已有向量，需要编码 {len(pending_keys)} 个代码片段")
     print(f"开始批量提取向量 (Batch Size: {batch_size})...")
     
-    all_embeddings = []
-    
     # 使用 tqdm 分批次进行编码，防止 OOM (显存/内存溢出)
-    for i in tqdm(range(0, total_samples, batch_size), desc="编码进度"):
-        batch_texts = texts_to_encode[i: i + batch_size]
+    for i in tqdm(range(0, len(pending_keys), batch_size), desc="编码进度"):
+        batch_keys = pending_keys[i: i + batch_size]
+        batch_texts = [pending[key] for key in batch_keys]
         
         # 将一个批次的文本传给 encoder (模型内部会并行处理)
         # 注意: 你的 encoder.encode 必须支持传入列表并返回批量向量
@@ -154,12 +121,18 @@ def process_analysis_files(directory):
         # 转为 tensor
         if not isinstance(batch_emb, torch.Tensor):
             batch_emb = torch.tensor(batch_emb)
-            
-        all_embeddings.append(batch_emb.cpu())
+        batch_emb = batch_emb.detach().cpu().float()
+        
+        for key, emb in zip(batch_keys, batch_emb):
+            vectors[key] = emb
+        if store is not None:
+            store.put_embeddings(encode_model_name, [(key, emb.numpy().tobytes()) for key, emb in zip(batch_keys, batch_emb)])
         torch.cuda.empty_cache()
     
-    # 将所有的批次拼接起来
-    final_embeddings = torch.cat(all_embeddings, dim=0)
+    if store is not None:
+        store.close()
+    # 按片段顺序拼接
+    final_embeddings = torch.stack([vectors[key] for key in keys])
     
     # 构建最终的数据结构
     data = {
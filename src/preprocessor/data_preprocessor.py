@@ -207,13 +207,18 @@ class DataPreprocessor:
         :param issues: Issues列表
         :return: 预处理后的Issues列表
         """
-        processed_issues = []
-        for issue in issues:
-            processed_issue = issue.copy()
-            processed_issue['title'] = self.preprocess_text(issue['title'])
-            processed_issue['body'] = self.preprocess_text(issue['body'])
-            processed_issues.append(processed_issue)
-        return processed_issues
+        return [self.preprocess_issue(issue) for issue in issues]
+    
+    def preprocess_issue(self, issue):
+        """
+        预处理单个Issue
+        :param issue: Issue数据字典
+        :return: 预处理后的Issue
+        """
+        processed_issue = issue.copy()
+        processed_issue['title'] = self.preprocess_text(issue['title'])
+        processed_issue['body'] = self.preprocess_text(issue['body'])
+        return processed_issue
     
     def preprocess_commits(self, commits):
         """
@@ -234,10 +239,15 @@ class DataPreprocessor:
         :param prs: Pull Requests列表
         :return: 预处理后的Pull Requests列表
         """
-        processed_prs = []
-        for pr in prs:
-            processed_pr = pr.copy()
-            processed_pr['title'] = self.preprocess_text(pr['title'])
-            processed_pr['body'] = self.preprocess_text(pr['body'])
-            processed_prs.append(processed_pr)
-        return processed_prs
+        return [self.preprocess_pull_request(pr) for pr in prs]
+    
+    def preprocess_pull_request(self, pr):
+        """
+        预处理单个Pull Request
+        :param pr: Pull Request数据字典
+        :return: 预处理后的Pull Request
+        """
+        processed_pr = pr.copy()
+        processed_pr['title'] = self.preprocess_text(pr['title'])
+        processed_pr['body'] = self.preprocess_text(pr['body'])
+        return processed_pr
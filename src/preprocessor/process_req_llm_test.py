@@ -8,9 +8,9 @@
 
 import sys
 import os
-import json
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from src.utils.utils import save_data, get_requirements_processed_file_name
+from src.utils.utils import get_requirements_processed_file_name
+from src.utils.record_stream import artifact_path, find_artifact, iter_records, write_records
 
 
 from src.utils.utils import load_config
@@ -31,12 +31,12 @@ def main():
     preprocessor = DataPreprocessor()
     
     # 从文件读取测试需求数据
-    test_data_file = f"data\\{CONFIG['repo']}\\requirements_raw.json"
+    data_dir = os.path.join("data", CONFIG['repo'])
+    test_data_file = find_artifact(data_dir, "requirements_raw")
     print(f"\n从文件读取测试数据: {test_data_file}")
     
     try:
-        with open(test_data_file, 'r', encoding='utf-8') as f:
-            test_requirements = json.load(f)
+        test_requirements = list(iter_records(test_data_file))
     except Exception as e:
         print(f"读取测试数据失败: {e}")
         return
@@ -47,8 +47,8 @@ def main():
     print("\n开始预处理需求...")
     processed_requirements = preprocessor.preprocess_requirements(test_requirements)
     req_processed_file_name=get_requirements_processed_file_name()
-    req_file_path = f"data\\{CONFIG['repo']}\\{req_processed_file_name}"
-    save_data(processed_requirements, req_file_path)
+    req_file_path = artifact_path(data_dir, req_processed_file_name)
+    write_records(processed_requirements, req_file_path)
     print(f"\n预处理完成，剩余需求数量: {len(processed_requirements)}")
     
     # 打印处理结果
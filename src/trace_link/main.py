@@ -5,6 +5,7 @@ from tqdm import tqdm
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from src.model.calculate_code_vectors import get_pt_file_name
 from src.utils.utils import load_config, get_trace_link_result_file_name, get_requirements_processed_file_name
+from src.utils.record_stream import read_records
 from src.JavaCodeAnalyzer.tree_sitter_java_analyzer import analyze_directory
 from src.model.calculate_code_vectors import process_analysis_files
 from src.LLMapi.LLM_tset import check_requirement_code_relation
@@ -39,11 +40,7 @@ def get_encoder():
 
 def load_requirements():
     """加载处理后的需求数据"""
-    req_file = os.path.join('data', CONFIG['repo'], get_requirements_processed_file_name())
-    if os.path.exists(req_file):
-        with open(req_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    return read_records(os.path.join('data', CONFIG['repo']), get_requirements_processed_file_name())
 
 def filter_req_by_type(requirements):
     """过滤需求类型"""
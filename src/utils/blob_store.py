@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按git blob SHA保存源码文件及其分析结果，供多个历史快照共享
+相同内容的文件在所有快照中只保存、解析、编码一次：
+    objects/ab/cdef...    文件内容，快照目录中的文件是它的硬链接
+    index.sqlite          analyses表保存每个blob的代码分析结果，embeddings表保存代码片段的向量
+"""
+import os
+import json
+import zlib
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+
+def git_blob_sha(content):
+    """
+    计算内容的git blob SHA，与 git hash-object 的结果一致
+    :param content: 文件内容(bytes)
+    :return: 40位十六进制SHA
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def text_key(text):
+    """
+    代码片段向量的缓存键：UTF-8编码后的SHA-256
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """
+    blob内容保存为文件以便硬链接，分析结果和向量保存在SQLite中
+    """
+
+    def __init__(self, root):
+        """
+        初始化BlobStore实例
+        :param root: 存储目录
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "sha TEXT NOT NULL, version TEXT NOT NULL, data BLOB NOT NULL, PRIMARY KEY (sha, version))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, data BLOB NOT NULL, PRIMARY KEY (model, key))"
+        )
+        self._db.commit()
+
+    def blob_path(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], sha[2:])
+
+    def has_blob(self, sha):
+        return os.path.exists(self.blob_path(sha))
+
+    def put_blob(self, content, sha=None):
+        """
+        保存文件内容，已存在时不重复写入
+        :param content: 文件内容(bytes)
+        :param sha: 已知的blob SHA，为None时计算
+        :return: blob SHA
+        """
+        if sha is None:
+            sha = git_blob_sha(content)
+        path = self.blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return sha
+
+    def link_blob(self, sha, dest):
+        """
+        把blob放到快照目录中，优先使用硬链接，跨文件系统等不支持时复制
+        快照中的文件与存储共享inode，不要原地修改
+        """
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        try:
+            os.link(self.blob_path(sha), dest)
+        except OSError:
+            shutil.copyfile(self.blob_path(sha), dest)
+
+    def get_analysis(self, sha, version):
+        """
+        读取blob的分析结果
+        :param sha: blob SHA
+        :param version: 分析器版本，版本变化后旧结果不再使用
+        :return: 分析结果，不存在时返回None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM analyses WHERE sha = ? AND version = ?", (sha, str(version))
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put_analysis(self, sha, version, analysis):
+        """
+        保存blob的分析结果
+        """
+        self.put_analyses(version, [(sha, analysis)])
+
+    def put_analyses(self, version, items):
+        """
+        批量保存分析结果，源码就是blob本身，分析结果中不需要再包含
+        :param version: 分析器版本
+        :param items: (blob SHA, 可JSON序列化的分析结果) 的可迭代对象
+        """
+        rows = [
+            (sha, str(version), zlib.compress(json.dumps(analysis, ensure_ascii=False, separators=(",", ":")).encode("utf-8")))
+            for sha, analysis in items
+        ]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO analyses (sha, version, data) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def get_embeddings(self, model, keys):
+        """
+        批量读取代码片段向量
+        :param model: 编码模型名称
+        :param keys: text_key列表
+        :return: key -> 向量字节(float32)
+        """
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # SQLite单条语句的参数数量有上限，分批查询
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, data FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(batch))})",
+                    (model, *batch)
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_embeddings(self, model, items):
+        """
+        批量保存代码片段向量
+        :param model: 编码模型名称
+        :param items: (key, 向量字节) 的可迭代对象
+        """
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, data) VALUES (?, ?, ?)",
+                [(model, key, data) for key, data in items]
+            )
+            self._db.commit()
+
+    def close(self):
+        """
+        关闭SQLite连接
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+def open_blob_store(config, default_root=None):
+    """
+    按配置打开blob存储，默认不启用
+    :param config: 配置字典，code_analysis.blob_store为存储目录，未配置或为空时不使用
+    :param default_root: 未配置code_analysis.blob_store时使用的目录；显式配置为空时仍不使用
+    :return: BlobStore实例或None
+    """
+    root = ((config or {}).get("code_analysis") or {}).get("blob_store", default_root)
+    return BlobStore(root) if root else None
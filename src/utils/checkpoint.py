@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+采集断点续传，每处理完一个Issue或PR立即追加写入检查点日志
+"""
+import os
+import json
+import threading
+
+
+class CheckpointLog:
+    """
+    追加写入的JSONL检查点日志，每行一条已处理完成的记录
+    重新运行时读取日志，跳过已完成的记录；中途崩溃时最后一行可能不完整，读取时忽略
+    """
+
+    def __init__(self, path):
+        """
+        初始化CheckpointLog实例
+        :param path: 日志文件路径
+        """
+        self.path = path
+        self._records = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._records[entry["key"]] = entry["record"]
+        if self._records:
+            print(f"从检查点恢复 {len(self._records)} 条记录: {path}")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        # 上次中断时写了一半的行单独成行，避免与新记录连在一起
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    @staticmethod
+    def make_key(number, updated_at):
+        """
+        记录的键：编号和更新时间，记录在两次运行之间被更新过时会重新处理
+        """
+        return f"{number}@{updated_at}"
+
+    def get(self, key):
+        """
+        获取已完成的记录
+        :return: 记录字典，未完成时返回None
+        """
+        with self._lock:
+            return self._records.get(key)
+
+    def append(self, key, record):
+        """
+        追加一条已完成的记录并立即写入磁盘
+        :param key: 记录的键
+        :param record: 记录字典
+        """
+        # 与save_data一致，datetime等类型按字符串保存
+        line = json.dumps({"key": key, "record": record}, ensure_ascii=False, default=str)
+        # 本次运行新处理的记录不再查询，只写入磁盘，不在内存中保留
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def __len__(self):
+        return len(self._records)
+
+    def clear(self):
+        """
+        数据保存完成后删除检查点
+        """
+        with self._lock:
+            self._file.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._records = {}
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+采集断点续传测试文件
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.utils.checkpoint import CheckpointLog
+
+
+class TestCheckpointLog(unittest.TestCase):
+    """
+    CheckpointLog的恢复测试
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "checkpoints", "issues.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resume(self):
+        """
+        重新打开时恢复已写入的记录，更新时间不同的键视为未完成
+        """
+        log = CheckpointLog(self.path)
+        key = CheckpointLog.make_key(1, "2024-01-01 00:00:00+00:00")
+        log.append(key, {"number": 1, "title": "需求"})
+        log._file.close()
+
+        resumed = CheckpointLog(self.path)
+        self.assertEqual(len(resumed), 1)
+        self.assertEqual(resumed.get(key), {"number": 1, "title": "需求"})
+        self.assertIsNone(resumed.get(CheckpointLog.make_key(1, "2024-02-01 00:00:00+00:00")))
+        resumed.clear()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_truncated_last_line(self):
+        """
+        中途崩溃留下的不完整最后一行被忽略，之后追加的记录单独成行
+        """
+        log = CheckpointLog(self.path)
+        log.append("1@a", {"number": 1})
+        log.append("2@b", {"number": 2})
+        log._file.close()
+        # 模拟写入第3条记录时进程被终止
+        line = json.dumps({"key": "3@c", "record": {"number": 3}})
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line[:len(line) // 2])
+
+        resumed = CheckpointLog(self.path)
+        self.assertEqual(len(resumed), 2)
+        self.assertIsNone(resumed.get("3@c"))
+        resumed.append("3@c", {"number": 3})
+        resumed._file.close()
+
+        again = CheckpointLog(self.path)
+        self.assertEqual(len(again), 3)
+        self.assertEqual(again.get("3@c"), {"number": 3})
+        again._file.close()
+
+
+if __name__ == '__main__':
+    """
+    运行测试
+    """
+    unittest.main()
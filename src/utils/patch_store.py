@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+patch内容寻址存储，相同的patch只保存一份
+记录的change_files中用patch_ref(内容的SHA-256)代替完整的patch文本，需要时再按引用读取
+"""
+import os
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+
+class PatchStore:
+    """
+    按内容哈希保存patch文本，zlib压缩后存入SQLite
+    """
+
+    def __init__(self, db_path):
+        """
+        初始化PatchStore实例
+        :param db_path: SQLite文件路径
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS patches (key TEXT PRIMARY KEY, data BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(patch):
+        """
+        patch的引用键：UTF-8编码后的SHA-256
+        """
+        return hashlib.sha256(patch.encode("utf-8")).hexdigest()
+
+    def put(self, patch):
+        """
+        保存patch，已存在时不重复写入
+        :param patch: patch文本
+        :return: 引用键
+        """
+        key = self.make_key(patch)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO patches (key, data) VALUES (?, ?)",
+                (key, zlib.compress(patch.encode("utf-8")))
+            )
+        return key
+
+    def get(self, key):
+        """
+        按引用键读取patch
+        :param key: 引用键
+        :return: patch文本，不存在时返回None
+        """
+        with self._lock:
+            row = self._db.execute("SELECT data FROM patches WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def load_patch(self, change_file):
+        """
+        读取change_files中一项的patch，兼容仍内联patch的旧数据
+        :param change_file: change_files中的一项
+        :return: patch文本，没有patch(如二进制文件)时返回None
+        """
+        if change_file.get("patch") is not None:
+            return change_file["patch"]
+        key = change_file.get("patch_ref")
+        return self.get(key) if key else None
+
+    def externalize(self, record):
+        """
+        把记录change_files中的patch移入存储，替换为patch_ref
+        :param record: Issue或PR数据字典
+        :return: 替换后的新记录，原记录不变
+        """
+        change_files = record.get("change_files")
+        if not change_files:
+            return record
+        externalized = []
+        for change_file in change_files:
+            if "patch" in change_file:
+                change_file = dict(change_file)
+                patch = change_file.pop("patch")
+                if patch is not None:
+                    change_file["patch_ref"] = self.put(patch)
+            externalized.append(change_file)
+        with self._lock:
+            self._db.commit()
+        record = dict(record)
+        record["change_files"] = externalized
+        return record
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM patches").fetchone()[0]
+
+    def close(self):
+        """
+        关闭SQLite连接
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
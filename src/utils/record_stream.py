@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+采集结果的流式读写，每条记录产生后立即写入文件，读取时逐条返回
+支持三种格式，由文件扩展名决定:
+    .json       JSON数组，与save_data的输出兼容
+    .jsonl      每行一条记录
+    .jsonl.zst  zstd压缩的JSONL，需要安装zstandard
+"""
+import io
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.utils.utils import load_config, json_default
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CONFIG = load_config()
+
+ARTIFACT_FORMATS = ("json", "jsonl", "jsonl.zst")
+
+
+def _require_zstandard(path):
+    if zstandard is None:
+        raise RuntimeError(f"读写 {path} 需要zstandard，请先执行 pip install zstandard")
+
+
+def artifact_path(data_dir, file_name, output_format=None):
+    """
+    按配置的输出格式生成数据文件路径
+    :param data_dir: 仓库数据目录
+    :param file_name: 文件名，可带或不带.json扩展名，如 issues_raw 或 requirements_processed.json
+    :param output_format: json、jsonl或jsonl.zst，为None时使用配置文件中的collection.output_format
+    :return: 文件路径
+    """
+    if output_format is None:
+        output_format = ((CONFIG or {}).get("collection") or {}).get("output_format", "json")
+    if output_format not in ARTIFACT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    if file_name.endswith(".json"):
+        file_name = file_name[:-len(".json")]
+    return os.path.join(data_dir, f"{file_name}.{output_format}")
+
+
+def find_artifact(data_dir, file_name):
+    """
+    查找已保存的数据文件，优先使用配置的输出格式，其次依次尝试其他格式
+    :param data_dir: 仓库数据目录
+    :param file_name: 文件名，可带或不带.json扩展名
+    :return: 存在的文件路径，都不存在时返回按配置格式生成的路径
+    """
+    preferred = artifact_path(data_dir, file_name)
+    if os.path.exists(preferred):
+        return preferred
+    for output_format in ARTIFACT_FORMATS:
+        path = artifact_path(data_dir, file_name, output_format)
+        if os.path.exists(path):
+            return path
+    return preferred
+
+
+class RecordWriter:
+    """
+    逐条写入记录
+    先写入临时文件，close时替换目标文件，中途出错时保留上一次的数据
+    """
+
+    def __init__(self, path):
+        """
+        初始化RecordWriter实例
+        :param path: 目标文件路径，格式由扩展名决定
+        """
+        self.path = os.path.normpath(path)
+        self.count = 0
+        self._tmp_path = self.path + ".tmp"
+        self._is_json = self.path.endswith(".json")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.path.endswith(".zst"):
+            _require_zstandard(self.path)
+            self._raw = open(self._tmp_path, 'wb')
+            self._compressor = zstandard.ZstdCompressor().stream_writer(self._raw)
+            self._file = io.TextIOWrapper(self._compressor, encoding='utf-8')
+        else:
+            self._raw = None
+            self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        if self._is_json:
+            self._file.write("[")
+
+    def write(self, record):
+        """
+        写入一条记录
+        :param record: 记录字典
+        """
+        if self._is_json:
+            line = json.dumps(record, ensure_ascii=False, indent=2, default=json_default)
+            self._file.write(("," if self.count else "") + "\n  " + line.replace("\n", "\n  "))
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False, default=json_default) + "\n")
+        self.count += 1
+
+    def close(self):
+        """
+        完成写入并替换目标文件
+        """
+        if self._file.closed:
+            return
+        if self._is_json:
+            self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """
+        放弃写入，删除临时文件
+        """
+        if not self._file.closed:
+            self._file.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(records, path):
+    """
+    把记录迭代器逐条写入文件
+    :param records: 记录的可迭代对象，可以是生成器
+    :param path: 文件路径
+    :return: 写入的记录数
+    """
+    with RecordWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    print(f"数据保存成功: {writer.path}，共 {writer.count} 条")
+    return writer.count
+
+
+def iter_records(path):
+    """
+    逐条读取记录，文件不存在时不返回任何记录
+    .json文件需要整体解析，只有JSONL格式能做到流式读取
+    :param path: 文件路径
+    :return: 记录的生成器
+    """
+    if not os.path.exists(path):
+        return
+    if path.endswith(".json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield from data or []
+        return
+    if path.endswith(".zst"):
+        _require_zstandard(path)
+        with open(path, 'rb') as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(raw)
+            with io.TextIOWrapper(reader, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_records(data_dir, file_name):
+    """
+    读取某类数据的全部记录，自动识别保存格式
+    :param data_dir: 仓库数据目录
+    :param file_name: 文件名，可带或不带.json扩展名
+    :return: 记录列表，文件不存在时返回空列表
+    """
+    return list(iter_records(find_artifact(data_dir, file_name)))
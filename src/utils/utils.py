@@ -7,6 +7,8 @@
 import sys
 import json
 import os
+import heapq
+from datetime import datetime, timezone
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 def load_config(config_file="config.json"):
@@ -27,6 +29,17 @@ def load_config(config_file="config.json"):
 
 CONFIG = load_config()
 
+def json_default(obj):
+    """
+    json序列化时处理复杂类型
+    """
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    elif isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', errors='replace')
+    else:
+        return str(obj)
+
 def save_data(data, file_path):
     """
     保存数据到指定文件
@@ -44,16 +57,7 @@ def save_data(data, file_path):
         
         # 保存数据
         with open(file_path, 'w', encoding='utf-8') as f:
-            # 自定义序列化函数，处理复杂类型
-            def default_serializer(obj):
-                if hasattr(obj, '__dict__'):
-                    return obj.__dict__
-                elif isinstance(obj, (bytes, bytearray)):
-                    return obj.decode('utf-8', errors='replace')
-                else:
-                    return str(obj)
-            
-            json.dump(data, f, ensure_ascii=False, indent=2, default=default_serializer)
+            json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
         print(f"数据保存成功: {file_path}")
     except Exception as e:
         print(f"保存数据失败: {str(e)}")
@@ -123,3 +127,70 @@ def read_json_file(file_path):
         import traceback
         traceback.print_exc()
         return None
+
+
+def load_collection_state(data_dir):
+    """
+    读取仓库的增量采集状态（各类数据的updated_at水位线）
+    :param data_dir: 仓库数据目录，如 data/{repo}
+    :return: 状态字典，不存在时返回空字典
+    """
+    state_file = os.path.join(data_dir, "collection_state.json")
+    if not os.path.exists(state_file):
+        return {}
+    return read_json_file(state_file) or {}
+
+
+def save_collection_state(state, data_dir):
+    """
+    保存仓库的增量采集状态
+    :param state: 状态字典
+    :param data_dir: 仓库数据目录
+    """
+    save_data(state, os.path.join(data_dir, "collection_state.json"))
+
+
+def parse_datetime(value):
+    """
+    将datetime或ISO格式字符串统一转换为带时区的UTC datetime
+    从json文件读回的数据中时间字段是字符串，新采集的数据中是datetime
+    :param value: datetime、ISO字符串或None
+    :return: datetime或None
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def get_watermark(records, previous=None):
+    """
+    计算一批记录的updated_at水位线
+    :param records: 记录列表，每项包含updated_at字段
+    :param previous: 之前的水位线(ISO字符串)
+    :return: 新的水位线(ISO字符串)，没有记录时返回previous
+    """
+    times = [parse_datetime(record.get("updated_at")) for record in records]
+    times = [t for t in times if t]
+    if previous:
+        times.append(parse_datetime(previous))
+    if not times:
+        return previous
+    return max(times).isoformat()
+
+
+def iter_merged_records(existing, new_records):
+    """
+    按number合并增量采集的记录，新记录覆盖旧记录
+    已有记录逐条读取，按number降序保存的数据合并后仍按number降序排列
+    :param existing: 已有记录的迭代器
+    :param new_records: 新采集的记录列表
+    :return: 合并后记录的生成器
+    """
+    new_records = sorted(new_records, key=lambda record: record["number"], reverse=True)
+    numbers = {record["number"] for record in new_records}
+    existing = (record for record in existing if record["number"] not in numbers)
+    return heapq.merge(new_records, existing, key=lambda record: -record["number"])
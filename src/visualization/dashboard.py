@@ -18,6 +18,7 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 from src.utils.utils import load_config, save_config, get_requirements_processed_file_name
+from src.utils.record_stream import find_artifact
 from src.model.calculate_code_vectors import get_pt_file_name
 st.set_page_config(
     page_title="需求追踪链接工具",
@@ -384,7 +385,8 @@ def main():
                     pt_file_name: '代码向量文件'
                 }
                 for fname, desc in data_files.items():
-                    fpath = os.path.join(repo_path, fname)
+                    # 需求数据可能以json、jsonl或jsonl.zst格式保存
+                    fpath = find_artifact(repo_path, fname) if fname.endswith('.json') else os.path.join(repo_path, fname)
                     exists = "✅" if os.path.exists(fpath) else "❌"
                     st.text(f"{exists} {desc}")
             